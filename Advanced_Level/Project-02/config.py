@@ -24,6 +24,11 @@ class Config:
     scale_factor:        float = 1.1
     min_neighbors:       int   = 5
     face_padding:        float = 0.20           # padding % around detected face
+    detect_scale:        float = 1.0            # detect on frame downscaled by this
+    detect_max_width:    int   = 0              # …and at most this wide (0 = off; ~640 for live)
+    detect_roi_search:   bool  = False          # realtime: search near last faces only
+    detect_roi_margin:   float = 0.5            # ROI growth, fraction of face size
+    detect_full_every:   int   = 10             # full-frame detect every N frames
 
     # ── Recognition ───────────────────────────────────────────────
     recognizer_type:     str   = "lbph"         # lbph | eigenfaces | fisherfaces | deep
@@ -39,10 +44,41 @@ class Config:
     capture_delay_ms:    int   = 200            # ms between sample captures
     min_registration_samples: int = 10
 
+    # ── Enrollment / Training ─────────────────────────────────────
+    enroll_workers:      int   = max(1, (os.cpu_count() or 2) - 1)
+    enroll_chunk_size:   int   = 16             # images per worker task
+
+    # ── Batch Video Analysis ──────────────────────────────────────
+    batch_workers:         int   = max(1, (os.cpu_count() or 2) - 1)
+    batch_segment_seconds: float = 120.0      # video split into segments this long
+    batch_gap_seconds:     float = 2.0        # unseen this long → appearance ends
+
+    # ── Multi-Camera Server ───────────────────────────────────────
+    multicam_workers:    int   = max(1, min(4, (os.cpu_count() or 2) - 1))
+    multicam_batch_frames: int = 4              # frames (cameras) per worker batch
+    multicam_reconnect_seconds: float = 5.0     # RTSP retry delay
+    multicam_stats_seconds: float = 10.0        # console stats interval
+    multicam_tile_size:  Tuple = (480, 270)     # mosaic tile for --show
+
+    # ── Headless Mode ─────────────────────────────────────────────
+    event_repeat_seconds: float = 5.0           # re-announce an unchanged track
+    event_stats_seconds: float = 10.0           # interval of "stats" events
+    event_queue_size:    int   = 1000           # events buffered before dropping
+    preview_fps:         float = 2.0            # MJPEG preview frame rate
+    preview_width:       int   = 640
+
     # ── Anti-Spoofing ──────────────────────────────────────────────
     spoof_blink_threshold:   int   = 3          # blinks required to pass
     spoof_texture_threshold: float = 10.0       # Laplacian variance threshold
     spoof_motion_frames:     int   = 5
+    spoof_max_tracks:        int   = 32         # liveness states kept (LRU)
+    spoof_track_ttl:         float = 10.0       # seconds before a silent track is dropped
+    spoof_flow_every:        int   = 3          # optical flow every k frames per track
+    spoof_flow_size:         Tuple = (64, 64)   # downscaled ROI for optical flow
+
+    # ── Tracking ──────────────────────────────────────────────────
+    track_iou_threshold: float = 0.3
+    track_max_missed:    int   = 15             # frames before a track expires
 
     # ── Display ───────────────────────────────────────────────────
     window_width:        int   = 1280
@@ -55,6 +91,9 @@ class Config:
     log_level:           str   = "INFO"
     log_to_file:         bool  = True
     log_recognition_events: bool = True
+    log_batch_size:      int   = 50             # events per DB write
+    log_flush_ms:        int   = 500            # max delay before a write
+    log_dedup_seconds:   float = 2.0            # suppress repeats of same person
 
     def __post_init__(self):
         for d in [self.data_dir, self.dataset_dir, self.model_dir,
@@ -69,10 +108,27 @@ class Config:
     def label_map_path(self) -> str:
         return os.path.join(self.model_dir, "label_map.pkl")
 
+    @property
+    def gallery_path(self) -> str:
+        return os.path.join(self.model_dir, "gallery.npy")
+
+    @property
+    def gallery_ids_path(self) -> str:
+        return os.path.join(self.model_dir, "gallery_ids.npy")
+
+    @property
+    def gallery_names_path(self) -> str:
+        return os.path.join(self.model_dir, "gallery_names.json")
+
     @property
     def embeddings_path(self) -> str:
+        """Pickled {name: embeddings} from older deep training; only read to migrate it."""
         return os.path.join(self.model_dir, "embeddings.pkl")
 
+    @property
+    def enroll_checkpoint_dir(self) -> str:
+        return os.path.join(self.model_dir, "checkpoints")
+
     @property
     def dnn_prototxt(self) -> str:
         return os.path.join(self.cascade_dir, "deploy.prototxt")
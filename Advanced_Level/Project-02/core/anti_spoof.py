@@ -8,37 +8,72 @@ Liveness detection using multiple passive cues:
 """
 
 import cv2
+import time
 import numpy as np
-from collections import deque
-from typing import Optional
+from collections import deque, OrderedDict
+from functools   import lru_cache
+from typing import Hashable, Optional
 from config          import Config
-from core.detector   import FaceDetection
+from core.detector   import FaceDetection, load_cascade
+from core.frame      import FrameContext
+
+
+@lru_cache(maxsize=None)
+def _load_shape_predictor(path: str):
+    import dlib
+    return dlib.shape_predictor(path)
+
+
+class _LivenessState:
+    """Liveness evidence gathered for one tracked face."""
+
+    def __init__(self, cfg: Config):
+        self.blink_count = 0
+        self.ear_buf     = deque(maxlen=10)
+        self.prev_gray   = None
+        self.prev_frame  = 0         # frame index of prev_gray
+        self.motion_buf  = deque(maxlen=cfg.spoof_motion_frames)
+        self.passed      = False     # once liveness verified, keep flag
+        self.frames      = 0
+        self.last_seen   = time.monotonic()
 
 
 class AntiSpoofing:
     def __init__(self, cfg: Config):
-        self.cfg          = cfg
-        self._blink_count = 0
-        self._ear_buf     = deque(maxlen=10)
-        self._prev_gray   = None
-        self._motion_buf  = deque(maxlen=cfg.spoof_motion_frames)
-        self._passed      = False    # once liveness verified, keep flag
+        self.cfg     = cfg
+        self._tracks : "OrderedDict[Hashable, _LivenessState]" = OrderedDict()
 
         # Try to load dlib for EAR-based blink detection
         try:
-            import dlib
-            self._shape_predictor = dlib.shape_predictor(
+            self._shape_predictor = _load_shape_predictor(
                 "data/shape_predictor_68_face_landmarks.dat"
             )
             self._dlib_available = True
         except Exception:
             self._dlib_available = False
+        self._eye_cascade = load_cascade("haarcascade_eye.xml")
+
+    # ── Per-track State ───────────────────────────────────────────
+    def _state(self, track_id: Hashable) -> _LivenessState:
+        """Fetch (or create) a track's state; evicts stale / least-recent tracks."""
+        now   = time.monotonic()
+        state = self._tracks.pop(track_id, None) or _LivenessState(self.cfg)
+        state.last_seen = now
+        self._tracks[track_id] = state
+
+        while self._tracks:
+            oldest_id, oldest = next(iter(self._tracks.items()))
+            if (len(self._tracks) > self.cfg.spoof_max_tracks
+                    or now - oldest.last_seen > self.cfg.spoof_track_ttl):
+                del self._tracks[oldest_id]
+            else:
+                break
+        return state
 
     # ── Texture Score ─────────────────────────────────────────────
-    def _texture_score(self, face_roi: np.ndarray) -> float:
+    def _texture_score(self, face_gray: np.ndarray) -> float:
         """Laplacian variance — blurry prints score low."""
-        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
-        return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        return float(cv2.Laplacian(face_gray, cv2.CV_64F).var())
 
     # ── Colour Diversity ──────────────────────────────────────────
     def _colour_diversity(self, face_roi: np.ndarray) -> float:
@@ -47,17 +82,31 @@ class AntiSpoofing:
         return float(np.std(hsv[:,:,0]))   # Hue std
 
     # ── Motion Score ──────────────────────────────────────────────
-    def _motion_score(self, gray: np.ndarray) -> float:
-        if self._prev_gray is None or self._prev_gray.shape != gray.shape:
-            self._prev_gray = gray
+    def _motion_score(self, state: _LivenessState,
+                      face_gray: np.ndarray) -> Optional[float]:
+        """
+        Farneback flow on a downscaled ROI, only every `spoof_flow_every`
+        frames. Returned as per-frame motion in face-crop pixels so the
+        threshold is independent of the flow size and interval.
+        Returns None on frames where flow is skipped.
+        """
+        if state.prev_gray is not None and \
+                state.frames - state.prev_frame < self.cfg.spoof_flow_every:
+            return None
+        small = cv2.resize(face_gray, self.cfg.spoof_flow_size,
+                           interpolation=cv2.INTER_AREA)
+        if state.prev_gray is None:
+            state.prev_gray, state.prev_frame = small, state.frames
             return 1.0
         flow = cv2.calcOpticalFlowFarneback(
-            self._prev_gray, gray, None,
-            0.5, 3, 15, 3, 5, 1.2, 0
+            state.prev_gray, small, None,
+            0.5, 2, 9, 3, 5, 1.1, 0
         )
-        self._prev_gray = gray.copy()
+        elapsed = state.frames - state.prev_frame
+        state.prev_gray, state.prev_frame = small, state.frames
         mag, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
-        return float(mag.mean())
+        scale  = face_gray.shape[1] / self.cfg.spoof_flow_size[0]
+        return float(mag.mean()) * scale / elapsed
 
     # ── EAR Blink Detection ───────────────────────────────────────
     def _eye_aspect_ratio(self, eye_pts: np.ndarray) -> float:
@@ -66,12 +115,11 @@ class AntiSpoofing:
         C = np.linalg.norm(eye_pts[0] - eye_pts[3])
         return (A + B) / (2.0 * C + 1e-6)
 
-    def _detect_blink_dlib(self, frame: np.ndarray,
+    def _detect_blink_dlib(self, state: _LivenessState, gray: np.ndarray,
                             detection: FaceDetection) -> bool:
         import dlib
         x, y, w, h = detection.bbox
         rect = dlib.rectangle(x, y, x+w, y+h)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         shape = self._shape_predictor(gray, rect)
         pts   = np.array([[shape.part(i).x, shape.part(i).y]
                           for i in range(68)])
@@ -79,37 +127,45 @@ class AntiSpoofing:
         left_ear  = self._eye_aspect_ratio(pts[42:48])
         right_ear = self._eye_aspect_ratio(pts[36:42])
         ear       = (left_ear + right_ear) / 2.0
-        self._ear_buf.append(ear)
+        state.ear_buf.append(ear)
 
         EAR_THRESH = 0.25
         if ear < EAR_THRESH:
-            if len(self._ear_buf) >= 2 and self._ear_buf[-2] >= EAR_THRESH:
-                self._blink_count += 1
-        return self._blink_count >= self.cfg.spoof_blink_threshold
+            if len(state.ear_buf) >= 2 and state.ear_buf[-2] >= EAR_THRESH:
+                state.blink_count += 1
+        return state.blink_count >= self.cfg.spoof_blink_threshold
 
-    def _detect_blink_simple(self, face_roi: np.ndarray) -> bool:
+    def _detect_blink_simple(self, state: _LivenessState,
+                             face_gray: np.ndarray) -> bool:
         """Haar-based eye detection as blink proxy (less accurate)."""
-        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
-        eye_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + "haarcascade_eye.xml"
-        )
-        eyes = eye_cascade.detectMultiScale(gray, 1.1, 4, minSize=(20,20))
+        eyes = self._eye_cascade.detectMultiScale(face_gray, 1.1, 4, minSize=(20,20))
         # If eyes not found → likely blinking
         if len(eyes) == 0:
-            self._blink_count += 1
-        return self._blink_count >= self.cfg.spoof_blink_threshold
+            state.blink_count += 1
+        return state.blink_count >= self.cfg.spoof_blink_threshold
 
     # ── Main Decision ──────────────────────────────────────────────
     def is_real(self, face_roi: np.ndarray, frame: np.ndarray,
-                detection: Optional[FaceDetection] = None) -> bool:
-        """Returns True if face passes liveness checks."""
-        if self._passed:
+                detection: Optional[FaceDetection] = None,
+                ctx: Optional[FrameContext] = None,
+                track_id: Hashable = 0) -> bool:
+        """
+        Returns True if the face on track `track_id` passes liveness checks.
+        Any hashable key works, e.g. `(camera, track)` when tracks are per camera.
+        """
+        state = self._state(track_id)
+        if state.passed:
             return True
+        state.frames += 1
 
         scores = {}
+        if ctx is not None and detection is not None:
+            face_gray = ctx.face(detection, gray=True)
+        else:
+            face_gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
 
         # 1. Texture
-        tex = self._texture_score(face_roi)
+        tex = self._texture_score(face_gray)
         scores['texture'] = tex > self.cfg.spoof_texture_threshold
 
         # 2. Colour diversity
@@ -117,38 +173,39 @@ class AntiSpoofing:
         scores['colour'] = cdiv > 8.0
 
         # 3. Motion
-        gray  = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        face_gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
-        mot   = self._motion_score(face_gray)
-        self._motion_buf.append(mot)
-        scores['motion'] = np.mean(self._motion_buf) > 0.3
+        mot   = self._motion_score(state, face_gray)
+        if mot is not None:
+            state.motion_buf.append(mot)
+        scores['motion'] = np.mean(state.motion_buf) > 0.3
 
         # 4. Blink
         if self._dlib_available and detection:
-            blinked = self._detect_blink_dlib(frame, detection)
+            gray    = ctx.gray if ctx else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            blinked = self._detect_blink_dlib(state, gray, detection)
         else:
-            blinked = self._detect_blink_simple(face_roi)
+            blinked = self._detect_blink_simple(state, face_gray)
         scores['blink'] = blinked
 
         passed_count = sum(scores.values())
         result       = passed_count >= 3    # at least 3/4 checks pass
 
         if result:
-            self._passed = True
+            state.passed = True
 
         return result
 
-    def reset(self):
-        """Reset state between subjects."""
-        self._blink_count = 0
-        self._ear_buf.clear()
-        self._motion_buf.clear()
-        self._prev_gray = None
-        self._passed    = False
+    def reset(self, track_id: Optional[Hashable] = None):
+        """Reset one track's state, or every track when `track_id` is None."""
+        if track_id is None:
+            self._tracks.clear()
+        else:
+            self._tracks.pop(track_id, None)
 
-    def get_status(self) -> dict:
+    def get_status(self, track_id: Hashable = 0) -> dict:
+        state = self._tracks.get(track_id)
         return {
-            "blinks":  self._blink_count,
-            "passed":  self._passed,
+            "blinks":  state.blink_count if state else 0,
+            "passed":  state.passed if state else False,
             "needed":  self.cfg.spoof_blink_threshold,
-        }
\ No newline at end of file
+            "tracks":  len(self._tracks),
+        }
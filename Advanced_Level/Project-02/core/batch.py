@@ -0,0 +1,213 @@
+"""
+core/batch.py
+Offline batch video analysis — splits a video into frame segments,
+recognizes faces in each segment on a process pool (optionally only
+every `stride`-th frame) and merges the results into a compact timeline
+of identity appearances.
+"""
+
+import cv2
+import os
+import io
+import csv
+import json
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from config      import Config
+from core.logger import SystemLogger
+
+# Per-process recognizer, built once by _init_worker
+_worker: Dict = {}
+
+
+# ── Worker Side ───────────────────────────────────────────────────
+def _init_worker(cfg: Config):
+    import warnings
+    warnings.filterwarnings('ignore')
+    from core.database   import FaceDatabase
+    from core.detector   import FaceDetector
+    from core.recognizer import FacialRecognizer
+    with contextlib.redirect_stdout(io.StringIO()):
+        db  = FaceDatabase(cfg)
+        det = FaceDetector(cfg)
+        _worker['rec'] = FacialRecognizer(cfg, db, det, None, SystemLogger(cfg))
+
+
+def _add_sighting(spans: Dict[str, List[list]], name: str, frame_idx: int,
+                  conf: float, gap: int):
+    """Extend the person's open span or start a new one after a gap."""
+    person = spans.setdefault(name, [])
+    if person and frame_idx - person[-1][1] <= gap:
+        span = person[-1]
+        span[1] = frame_idx
+        span[2] = max(span[2], conf)
+        span[3] += 1
+    else:
+        person.append([frame_idx, frame_idx, conf, 1])
+
+
+def _analyze_segment(task: Tuple) -> Dict:
+    """Process frames [start, end) → {name: [[first, last, max_conf, hits], ...]}."""
+    from core.frame import FrameContext
+    path, start, end, stride, gap, out_path = task
+    rec    = _worker['rec']
+    cap    = cv2.VideoCapture(path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    writer = None
+    if out_path:
+        w   = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h   = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25
+        writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+
+    spans     : Dict[str, List[list]] = {}
+    last      = []       # (detection, result) of the last analysed frame
+    processed = 0
+    for idx in range(start, end):
+        sample = idx % stride == 0
+        if not sample and writer is None:
+            if not cap.grab():            # skip without decoding to BGR
+                break
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if sample:
+            processed += 1
+            ctx  = FrameContext(frame, rec.cfg)
+            last = [(d, rec.recognize_face(frame, d, ctx))
+                    for d in rec.det.detect(frame, ctx)]
+            for _, result in last:
+                if result.is_known:
+                    _add_sighting(spans, result.name, idx, result.confidence, gap)
+        if writer is not None:
+            for d, result in last:
+                frame = rec.draw_overlay(frame, d, result)
+            writer.write(frame)
+
+    cap.release()
+    if writer is not None:
+        writer.release()
+    return {"spans": spans, "processed": processed, "start": start, "end": end}
+
+
+# ──────────────────────────────────────────────────────────────────
+class BatchVideoAnalyzer:
+    def __init__(self, cfg: Config, log: SystemLogger,
+                 workers: Optional[int] = None, stride: int = 1):
+        self.cfg     = cfg
+        self.log     = log
+        self.workers = max(1, workers or cfg.batch_workers)
+        self.stride  = max(1, stride)
+
+    def analyze(self, path: str, timeline_path: Optional[str] = None,
+                annotate_path: Optional[str] = None) -> List[Dict]:
+        cap         = cv2.VideoCapture(path)
+        fps         = cap.get(cv2.CAP_PROP_FPS) or 25
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if frame_count <= 0:
+            print(f"   ❌ Could not read frame count from {path}")
+            return []
+
+        seg_len  = max(self.stride, int(self.cfg.batch_segment_seconds * fps))
+        bounds   = [(s, min(s + seg_len, frame_count))
+                    for s in range(0, frame_count, seg_len)]
+        gap      = max(self.stride, int(self.cfg.batch_gap_seconds * fps))
+        seg_outs = [f"{annotate_path}.seg{i:04d}.mp4" if annotate_path else None
+                    for i in range(len(bounds))]
+        tasks    = [(path, s, e, self.stride, gap, o)
+                    for (s, e), o in zip(bounds, seg_outs)]
+
+        print(f"\n   🎞️  {frame_count} frames @ {fps:.1f} fps → {len(tasks)} segment(s), "
+              f"stride {self.stride}, {self.workers} worker(s)")
+        results = []
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.cfg,)) as pool:
+            for i, res in enumerate(pool.map(_analyze_segment, tasks), 1):
+                results.append(res)
+                pct = int(i / len(tasks) * 100)
+                bar = '█' * (pct // 5) + '░' * (20 - pct // 5)
+                end = '\n' if i == len(tasks) else ''
+                print(f"\r   [{bar}] {i}/{len(tasks)} segments", end=end, flush=True)
+
+        timeline = self._merge(results, gap, fps)
+        processed = sum(r["processed"] for r in results)
+        print(f"   ✅ {processed} frames analysed | {len(timeline)} appearance(s) "
+              f"of {len({t['person'] for t in timeline})} person(s)")
+
+        if annotate_path:
+            self._concat(seg_outs, annotate_path, fps)
+            print(f"   ✅ Annotated video → {annotate_path}")
+
+        timeline_path = timeline_path or os.path.join(
+            self.cfg.output_dir,
+            os.path.splitext(os.path.basename(path))[0] + "_timeline.json")
+        self._write_timeline(timeline, timeline_path)
+        print(f"   ✅ Timeline → {timeline_path}")
+        self.log.info(f"Batch analysis: {path} | {processed} frames | {len(timeline)} appearances")
+        return timeline
+
+    # ── Merging ───────────────────────────────────────────────────
+    @staticmethod
+    def _merge(results: List[Dict], gap: int, fps: float) -> List[Dict]:
+        """Join spans that continue across segment boundaries."""
+        merged: Dict[str, List[list]] = {}
+        for res in sorted(results, key=lambda r: r["start"]):
+            for name, spans in res["spans"].items():
+                person = merged.setdefault(name, [])
+                for first, last, conf, hits in spans:
+                    if person and first - person[-1][1] <= gap:
+                        prev = person[-1]
+                        prev[1] = last
+                        prev[2] = max(prev[2], conf)
+                        prev[3] += hits
+                    else:
+                        person.append([first, last, conf, hits])
+
+        timeline = [{
+            "person":         name,
+            "first_seen":     round(first / fps, 2),
+            "last_seen":      round(last / fps, 2),
+            "first_frame":    first,
+            "last_frame":     last,
+            "max_confidence": round(conf, 1),
+            "detections":     hits,
+        } for name, spans in merged.items() for first, last, conf, hits in spans]
+        return sorted(timeline, key=lambda t: (t["first_frame"], t["person"]))
+
+    @staticmethod
+    def _write_timeline(timeline: List[Dict], path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if path.lower().endswith(".csv"):
+            fields = ["person", "first_seen", "last_seen", "first_frame",
+                      "last_frame", "max_confidence", "detections"]
+            with open(path, 'w', newline='') as f:
+                w = csv.DictWriter(f, fieldnames=fields)
+                w.writeheader()
+                w.writerows(timeline)
+        else:
+            with open(path, 'w') as f:
+                json.dump(timeline, f, indent=2)
+
+    @staticmethod
+    def _concat(parts: List[str], out_path: str, fps: float):
+        """Stitch per-segment annotated clips back into one video."""
+        writer = None
+        for part in parts:
+            cap = cv2.VideoCapture(part)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*'mp4v'),
+                                             fps, (w, h))
+                writer.write(frame)
+            cap.release()
+            os.remove(part)
+        if writer is not None:
+            writer.release()
@@ -0,0 +1,261 @@
+"""
+core/benchmark.py
+Headless throughput benchmark — builds a synthetic gallery in a scratch
+data dir, replays a generated (or recorded) clip through every detector
+backend × recognizer type and reports FPS, per-stage p50/p95 latency,
+memory and identity recall as JSON.
+"""
+
+import cv2
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import contextlib
+import dataclasses
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from config          import Config
+from core.logger     import SystemLogger
+from core.database   import FaceDatabase
+from core.detector   import FaceDetector, FaceDetection
+from core.frame      import FrameContext
+
+BACKENDS    = ("haarcascade", "dnn", "mtcnn")
+RECOGNIZERS = ("lbph", "eigenfaces", "fisherfaces", "deep")
+STAGES      = ("decode", "detect", "recognize", "total")
+
+
+def _rss_mb() -> Tuple[float, float]:
+    """(current, peak) resident set size in MB."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak / 1024 if sys.platform != "darwin" else peak / 1024 ** 2
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        current = peak
+    return round(current, 1), round(peak, 1)
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ms = np.asarray(samples) * 1000
+    if not len(ms):
+        return {"p50": None, "p95": None, "mean": None}
+    return {"p50":  round(float(np.percentile(ms, 50)), 3),
+            "p95":  round(float(np.percentile(ms, 95)), 3),
+            "mean": round(float(ms.mean()), 3)}
+
+
+# ──────────────────────────────────────────────────────────────────
+class FaceBenchmark:
+    def __init__(self, cfg: Config, log: SystemLogger,
+                 identities: int = 20, samples: int = 15,
+                 frames: int = 200, faces: int = 3,
+                 video: Optional[str] = None, workers: Optional[int] = None):
+        self.base       = cfg
+        self.log        = log
+        self.identities = max(2, identities)      # Fisherfaces needs ≥ 2 classes
+        self.samples    = max(2, samples)
+        self.frames     = frames
+        self.faces      = max(1, min(faces, self.identities))
+        self.video      = video
+        self.workers    = workers
+        self._rng       = np.random.default_rng(0)
+
+    # ── Synthetic Data ────────────────────────────────────────────
+    def _identity_patterns(self) -> List[np.ndarray]:
+        """One smooth random texture per identity, face_size, grayscale."""
+        w, h = self.base.face_size
+        return [cv2.GaussianBlur(self._rng.integers(0, 255, (h, w), dtype=np.uint8),
+                                 (9, 9), 0)
+                for _ in range(self.identities)]
+
+    def _augment(self, base: np.ndarray) -> np.ndarray:
+        noise = self._rng.integers(-20, 20, base.shape)
+        gain  = self._rng.uniform(0.85, 1.15)
+        return np.clip(base.astype(np.float32) * gain + noise, 0, 255).astype(np.uint8)
+
+    def _build_gallery(self, cfg: Config, db: FaceDatabase,
+                       patterns: List[np.ndarray]) -> List[str]:
+        names = []
+        for i, pattern in enumerate(patterns):
+            name  = f"id_{i:04d}"
+            label = db.add_person(name)
+            pdir  = os.path.join(cfg.dataset_dir, name)
+            os.makedirs(pdir, exist_ok=True)
+            for k in range(self.samples):
+                cv2.imwrite(os.path.join(pdir, f"{label}_{k:04d}.jpg"), self._augment(pattern))
+            db.increment_sample_count(name, self.samples)
+            names.append(name)
+        return names
+
+    def _make_clip(self, path: str, names: List[str],
+                   patterns: List[np.ndarray]) -> List[List[Tuple[str, FaceDetection]]]:
+        """
+        Write a clip with `faces` identities drifting across a textured
+        background; returns per-frame ground truth. Boxes are chosen so the
+        padded crop is exactly the pasted pattern.
+        """
+        W, H   = self.base.window_width, self.base.window_height
+        pw, ph = self.base.face_size
+        pad    = self.base.face_padding
+        bg     = cv2.GaussianBlur(self._rng.integers(0, 255, (H, W, 3), dtype=np.uint8), (7, 7), 0)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 25.0, (W, H))
+        truth  = []
+        cast   = self._rng.choice(len(names), self.faces, replace=False)
+        for f in range(self.frames):
+            if f and f % 50 == 0:                       # new cast every 2 s
+                cast = self._rng.choice(len(names), self.faces, replace=False)
+            frame, gt = bg.copy(), []
+            for slot, idx in enumerate(cast):
+                x = int((slot + 0.5) * W / self.faces - pw / 2 + 20 * np.sin(f / 15 + slot))
+                y = int(H / 2 - ph / 2 + 15 * np.cos(f / 20 + slot))
+                x, y = max(0, min(W - pw, x)), max(0, min(H - ph, y))
+                frame[y:y+ph, x:x+pw] = cv2.cvtColor(self._augment(patterns[idx]),
+                                                     cv2.COLOR_GRAY2BGR)
+                bw, bh = int(round(pw / (1 + 2 * pad))), int(round(ph / (1 + 2 * pad)))
+                gt.append((names[idx], FaceDetection(x + int(bw * pad), y + int(bh * pad), bw, bh)))
+            writer.write(frame)
+            truth.append(gt)
+        writer.release()
+        return truth
+
+    # ── Runs ──────────────────────────────────────────────────────
+    def _train(self, cfg: Config, db: FaceDatabase) -> float:
+        from core.trainer import FaceTrainer
+        with contextlib.redirect_stdout(io.StringIO()):
+            trainer = FaceTrainer(cfg, db, FaceDetector(cfg, verbose=False),
+                                  self.log, self.workers)
+            t0 = time.perf_counter()
+            trainer.train(resume=True)
+        return time.perf_counter() - t0
+
+    def _run_combo(self, cfg: Config, db: FaceDatabase, clip: str,
+                   truth: Optional[List]) -> Dict:
+        from core.recognizer import FacialRecognizer
+        with contextlib.redirect_stdout(io.StringIO()):
+            det = FaceDetector(cfg, verbose=False)
+            rec = FacialRecognizer(cfg, db, det, None, self.log)
+
+        times  = {s: [] for s in STAGES}
+        hits = gt_total = detected = known = 0
+        cap    = cv2.VideoCapture(clip)
+        n      = 0
+        wall   = time.perf_counter()
+        while True:
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            t1  = time.perf_counter()
+            ctx = FrameContext(frame, cfg)
+            dets = det.detect(frame, ctx)
+            t2  = time.perf_counter()
+            # Generated clips: recognize at the ground-truth boxes so recall
+            # measures the recognizer, not whether the detector fires on
+            # synthetic textures.
+            boxes   = [d for _, d in truth[n]] if truth else dets
+            results = [rec.recognize_face(frame, d, ctx) for d in boxes]
+            t3  = time.perf_counter()
+
+            times["decode"].append(t1 - t0)
+            times["detect"].append(t2 - t1)
+            times["recognize"].append(t3 - t2)
+            times["total"].append(t3 - t0)
+            detected += len(dets)
+            known    += sum(r.is_known for r in results)
+            if truth:
+                gt_total += len(truth[n])
+                hits     += sum(r.name == name for (name, _), r in zip(truth[n], results))
+            n += 1
+        wall = time.perf_counter() - wall
+        cap.release()
+
+        rss, peak = _rss_mb()
+        return {
+            "frames":        n,
+            "fps":           round(n / wall, 2) if wall > 0 else None,
+            "stages_ms":     {s: _percentiles(v) for s, v in times.items()},
+            "faces_detected": detected,
+            "recognized":    known,
+            "recall":        round(hits / gt_total, 4) if gt_total else None,
+            "backend_fallback": det.is_fallback,
+            "rss_mb":        rss,
+            "peak_rss_mb":   peak,
+        }
+
+    def run(self, backends: List[str] = BACKENDS,
+            recognizers: List[str] = RECOGNIZERS,
+            output: Optional[str] = None) -> Dict:
+        tmp = tempfile.mkdtemp(prefix="frs_bench_")
+        cfg = dataclasses.replace(
+            self.base,
+            data_dir    = os.path.join(tmp, "data"),
+            dataset_dir = os.path.join(tmp, "data", "dataset"),
+            model_dir   = os.path.join(tmp, "data", "models"),
+            log_dir     = os.path.join(tmp, "data", "logs"),
+            output_dir  = os.path.join(tmp, "output"),
+            log_to_file = False,
+            log_recognition_events = False,
+        )
+        try:
+            db       = FaceDatabase(cfg)
+            patterns = self._identity_patterns()
+            names    = self._build_gallery(cfg, db, patterns)
+            if self.video:
+                clip, truth = self.video, None
+            else:
+                clip  = os.path.join(tmp, "bench_clip.mp4")
+                truth = self._make_clip(clip, names, patterns)
+            print(f"\n   🧪 {len(names)} identities × {self.samples} samples | "
+                  f"clip: {self.video or f'generated, {self.frames} frames, {self.faces} faces'}")
+
+            results = []
+            for rtype in recognizers:
+                rcfg     = dataclasses.replace(cfg, recognizer_type=rtype)
+                train_s  = self._train(rcfg, db)
+                for backend in backends:
+                    bcfg = dataclasses.replace(rcfg, detector_backend=backend)
+                    res  = {"backend": backend, "recognizer": rtype,
+                            "train_s": round(train_s, 3), **self._run_combo(bcfg, db, clip, truth)}
+                    results.append(res)
+                    recall = "—" if res["recall"] is None else f"{res['recall']:.1%}"
+                    note   = " (haar fallback)" if res["backend_fallback"] else ""
+                    print(f"   {backend:<12} {rtype:<12} {res['fps']:>7} FPS  "
+                          f"p95 {res['stages_ms']['total']['p95']:>8} ms  "
+                          f"recall {recall:>6}  RSS {res['rss_mb']} MB{note}")
+            db.close()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        report = {
+            "meta": {
+                "timestamp":  datetime.now().isoformat(timespec="seconds"),
+                "python":     platform.python_version(),
+                "opencv":     cv2.__version__,
+                "machine":    platform.machine(),
+                "cpus":       os.cpu_count(),
+                "identities": self.identities,
+                "samples":    self.samples,
+                "video":      self.video,
+                "frames":     self.frames if not self.video else None,
+                "faces":      self.faces if not self.video else None,
+                "frame_size": [self.base.window_width, self.base.window_height],
+            },
+            "results": results,
+        }
+        output = output or os.path.join(
+            self.base.output_dir, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n   ✅ Benchmark → {output}")
+        self.log.info(f"Benchmark: {len(results)} runs → {output}")
+        return report
@@ -4,18 +4,160 @@ SQLite-backed face database — stores persons, embeddings, recognition events.
 """
 
 import os
+import time
+import queue
+import atexit
 import sqlite3
 import pickle
 import json
+import threading
+import numpy as np
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from config import Config
 
 
+class RecognitionLogWriter:
+    """
+    Write-behind buffer for recognition events.
+    Callers enqueue without touching SQLite; a background thread inserts
+    batches every `log_batch_size` events or `log_flush_ms` milliseconds.
+    Repeats of the same (person, source, spoof) within `log_dedup_seconds`
+    are dropped, so someone standing in view is one row, not 30 per second.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db: "FaceDatabase"):
+        self.db        = db
+        self.cfg       = db.cfg
+        self._queue    = queue.Queue()
+        self._last     : Dict[Tuple, float] = {}
+        self._lock     = threading.Lock()
+        self._flushed  = threading.Condition()
+        self._pending  = 0
+        self._thread   = threading.Thread(target=self._run, name="frs-log-writer",
+                                          daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, name: str, confidence: float, source: str,
+               spoof: bool) -> bool:
+        """Queue one event; returns False if it was deduplicated away."""
+        now = time.monotonic()
+        key = (name, source, bool(spoof))
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.cfg.log_dedup_seconds:
+                return False
+            self._last[key] = now
+            if len(self._last) > 10_000:          # forget people long gone
+                cutoff = now - self.cfg.log_dedup_seconds
+                self._last = {k: t for k, t in self._last.items() if t >= cutoff}
+        with self._flushed:
+            self._pending += 1
+        self._queue.put((name, confidence, datetime.now().isoformat(),
+                         source, int(spoof)))
+        return True
+
+    def _run(self):
+        batch    = []
+        interval = self.cfg.log_flush_ms / 1000.0
+        deadline = time.monotonic() + interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is self._STOP:
+                self._write(batch)
+                self.db._close_local()
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.cfg.log_batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch    = []
+                deadline = time.monotonic() + interval
+
+    def _write(self, batch: list):
+        if batch:
+            self.db._insert_recognitions(batch)
+        with self._flushed:
+            self._pending -= len(batch)
+            self._flushed.notify_all()
+
+    def flush(self, timeout: float = 5.0):
+        """Block until every queued event has been written."""
+        with self._flushed:
+            self._flushed.wait_for(lambda: self._pending <= 0, timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout=5.0)
+
+
+class IdentityCache:
+    """
+    In-process person index (name → person, label → person), loaded with
+    one query on first use and dropped whenever persons are added, changed
+    or deleted. Returned dicts are copies, so callers can't corrupt it.
+    """
+
+    def __init__(self, db: "FaceDatabase"):
+        self._db       = db
+        self._lock     = threading.Lock()
+        self._by_name  : Optional[Dict[str, Dict]] = None
+        self._by_label : Optional[Dict[int, Dict]] = None
+
+    def _index(self) -> Tuple[Dict[str, Dict], Dict[int, Dict]]:
+        with self._lock:
+            if self._by_name is None:
+                persons        = self._db._query_persons()
+                self._by_name  = {p['name']: p for p in persons}
+                self._by_label = {p['label']: p for p in persons}
+            return self._by_name, self._by_label
+
+    def invalidate(self):
+        with self._lock:
+            self._by_name = self._by_label = None
+
+    def get(self, name: str) -> Optional[Dict]:
+        person = self._index()[0].get(name)
+        return dict(person) if person else None
+
+    def by_label(self, label: int) -> Optional[Dict]:
+        person = self._index()[1].get(label)
+        return dict(person) if person else None
+
+    def name_for(self, label: int, default: str = "Unknown") -> str:
+        person = self._index()[1].get(label)
+        return person['name'] if person else default
+
+    def persons(self) -> List[Dict]:
+        return [dict(p) for _, p in sorted(self._index()[1].items())]
+
+    def label_map(self) -> Dict[int, str]:
+        """{label: name}"""
+        return {label: p['name'] for label, p in self._index()[1].items()}
+
+    def name_to_label(self) -> Dict[str, int]:
+        return {name: p['label'] for name, p in self._index()[0].items()}
+
+
+# ──────────────────────────────────────────────────────────────────
 class FaceDatabase:
+    # rollup granularity → ISO timestamp prefix length
+    _GRANULARITIES = (("hour", 13), ("day", 10))
+
     def __init__(self, cfg: Config):
         self.cfg     = cfg
         self.db_path = os.path.join(cfg.data_dir, "faces.db")
+        self._local  = threading.local()
+        self._writer : Optional[RecognitionLogWriter] = None
+        self.identities = IdentityCache(self)
+        self._writer_lock = threading.Lock()
         self._init_db()
 
     # ── Schema ────────────────────────────────────────────────────
@@ -43,18 +185,91 @@ class FaceDatabase:
                 CREATE TABLE IF NOT EXISTS embeddings (
                     id          INTEGER PRIMARY KEY AUTOINCREMENT,
                     person_id   INTEGER NOT NULL,
-                    embedding   BLOB    NOT NULL,
+                    embedding   BLOB    NOT NULL,   -- raw little-endian float32
                     created     TEXT    NOT NULL,
+                    dim         INTEGER,
                     FOREIGN KEY(person_id) REFERENCES persons(id)
                 );
+
+                -- Pre-aggregated counts, maintained by _insert_recognitions
+                CREATE TABLE IF NOT EXISTS recognition_rollup (
+                    granularity TEXT    NOT NULL,   -- 'hour' | 'day'
+                    bucket      TEXT    NOT NULL,   -- '2024-05-01T13' | '2024-05-01'
+                    person_name TEXT    NOT NULL,
+                    total       INTEGER NOT NULL DEFAULT 0,
+                    spoofs      INTEGER NOT NULL DEFAULT 0,
+                    max_conf    REAL    NOT NULL DEFAULT 0,
+                    PRIMARY KEY (granularity, bucket, person_name)
+                ) WITHOUT ROWID;
+
+                CREATE INDEX IF NOT EXISTS idx_log_timestamp ON recognition_log(timestamp);
+                CREATE INDEX IF NOT EXISTS idx_log_person    ON recognition_log(person_name, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_log_spoof     ON recognition_log(timestamp) WHERE spoof = 1;
+                CREATE INDEX IF NOT EXISTS idx_emb_person    ON embeddings(person_id);
+            """)
+            self._migrate_embeddings(conn)
+            self._backfill_rollups(conn)
+
+    def _migrate_embeddings(self, conn):
+        """Convert pickled embedding rows (pre-`dim` schema) to float32 bytes."""
+        cols = [r[1] for r in conn.execute("PRAGMA table_info(embeddings)")]
+        if "dim" not in cols:
+            conn.execute("ALTER TABLE embeddings ADD COLUMN dim INTEGER")
+        legacy = conn.execute(
+            "SELECT id, embedding FROM embeddings WHERE dim IS NULL"
+        ).fetchall()
+        if legacy:
+            rows = [self._encode(pickle.loads(blob)) + (row_id,)
+                    for row_id, blob in legacy]
+            conn.executemany(
+                "UPDATE embeddings SET embedding=?, dim=? WHERE id=?", rows
+            )
+
+    def _backfill_rollups(self, conn):
+        """Build rollups once for logs written before the rollup table existed."""
+        if conn.execute("SELECT 1 FROM recognition_rollup LIMIT 1").fetchone():
+            return
+        if not conn.execute("SELECT 1 FROM recognition_log LIMIT 1").fetchone():
+            return
+        for gran, width in self._GRANULARITIES:
+            conn.execute(f"""
+                INSERT INTO recognition_rollup
+                    (granularity, bucket, person_name, total, spoofs, max_conf)
+                SELECT '{gran}', substr(timestamp, 1, {width}), person_name,
+                       COUNT(*), SUM(spoof), MAX(confidence)
+                FROM recognition_log
+                GROUP BY substr(timestamp, 1, {width}), person_name
             """)
 
-    def _conn(self):
-        return sqlite3.connect(self.db_path)
+    def _conn(self) -> sqlite3.Connection:
+        """One persistent connection per thread, WAL + synchronous=NORMAL."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Flush buffered events and close this thread's connection."""
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        self._close_local()
+
+    def _close_local(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
 
     # ── Person Management ─────────────────────────────────────────
     def add_person(self, name: str) -> int:
         """Register new person; returns their label integer."""
+        existing = self.identities.get(name)
+        if existing:
+            return existing['label']
         with self._conn() as conn:
             existing = conn.execute(
                 "SELECT label FROM persons WHERE name=?", (name,)
@@ -71,31 +286,20 @@ class FaceDatabase:
                 "INSERT INTO persons (name, label, registered, sample_count) VALUES (?,?,?,0)",
                 (name, label, datetime.now().isoformat())
             )
-            return label
+        self.identities.invalidate()
+        return label
 
     def get_person_by_label(self, label: int) -> Optional[Dict]:
-        with self._conn() as conn:
-            row = conn.execute(
-                "SELECT id, name, label, registered, sample_count FROM persons WHERE label=?",
-                (label,)
-            ).fetchone()
-        if row:
-            return {"id": row[0], "name": row[1], "label": row[2],
-                    "registered": row[3], "sample_count": row[4]}
-        return None
+        return self.identities.by_label(label)
 
     def get_person_by_name(self, name: str) -> Optional[Dict]:
-        with self._conn() as conn:
-            row = conn.execute(
-                "SELECT id, name, label, registered, sample_count FROM persons WHERE name=?",
-                (name,)
-            ).fetchone()
-        if row:
-            return {"id": row[0], "name": row[1], "label": row[2],
-                    "registered": row[3], "sample_count": row[4]}
-        return None
+        return self.identities.get(name)
 
     def list_persons(self) -> List[Dict]:
+        return self.identities.persons()
+
+    def _query_persons(self) -> List[Dict]:
+        """The single query behind IdentityCache."""
         with self._conn() as conn:
             rows = conn.execute(
                 "SELECT id, name, label, registered, sample_count FROM persons ORDER BY label"
@@ -109,16 +313,18 @@ class FaceDatabase:
                 "UPDATE persons SET sample_count = sample_count + ? WHERE name=?",
                 (count, name)
             )
+        self.identities.invalidate()
 
     def delete_person(self, name: str):
         with self._conn() as conn:
             conn.execute("DELETE FROM embeddings WHERE person_id=(SELECT id FROM persons WHERE name=?)", (name,))
             conn.execute("DELETE FROM persons WHERE name=?", (name,))
+        self.identities.invalidate()
 
     # ── Label Map ──────────────────────────────────────────────────
     def get_label_map(self) -> Dict[int, str]:
         """Returns {label: name} for all persons."""
-        return {p['label']: p['name'] for p in self.list_persons()}
+        return self.identities.label_map()
 
     def save_label_map(self):
         with open(self.cfg.label_map_path, 'wb') as f:
@@ -131,60 +337,152 @@ class FaceDatabase:
             return pickle.load(f)
 
     # ── Embeddings ─────────────────────────────────────────────────
-    def save_embeddings(self, person_name: str, embeddings: list):
+    @staticmethod
+    def _encode(emb) -> tuple:
+        vec = np.asarray(emb, dtype='<f4').ravel()
+        return sqlite3.Binary(vec.tobytes()), len(vec)
+
+    def save_embeddings(self, person_name: str, embeddings: list,
+                        replace: bool = False):
+        """Store embeddings as raw float32 BLOBs in a single executemany."""
         person = self.get_person_by_name(person_name)
         if not person:
             return
+        now  = datetime.now().isoformat()
+        rows = [(person['id'],) + self._encode(e) + (now,) for e in embeddings]
+        with self._conn() as conn:
+            if replace:
+                conn.execute("DELETE FROM embeddings WHERE person_id=?", (person['id'],))
+            conn.executemany(
+                "INSERT INTO embeddings (person_id, embedding, dim, created) VALUES (?,?,?,?)",
+                rows
+            )
+
+    def replace_all_embeddings(self, all_embeddings: Dict[str, list]):
+        """
+        Swap the whole embeddings table for {name: embeddings} in one
+        transaction, so a failure part-way leaves the old set in place.
+        """
+        now  = datetime.now().isoformat()
+        rows = []
+        for name, embeddings in all_embeddings.items():
+            person = self.get_person_by_name(name)
+            if person:
+                rows.extend((person['id'],) + self._encode(e) + (now,) for e in embeddings)
         with self._conn() as conn:
-            for emb in embeddings:
-                conn.execute(
-                    "INSERT INTO embeddings (person_id, embedding, created) VALUES (?,?,?)",
-                    (person['id'], pickle.dumps(emb), datetime.now().isoformat())
-                )
-
-    def load_all_embeddings(self) -> Dict[str, list]:
-        """Returns {name: [embedding, ...]}"""
+            conn.execute("DELETE FROM embeddings")
+            conn.executemany(
+                "INSERT INTO embeddings (person_id, embedding, dim, created) VALUES (?,?,?,?)",
+                rows
+            )
+
+    def load_all_embeddings(self) -> Dict[str, np.ndarray]:
+        """Returns {name: (n, dim) float32 array} — zero-copy frombuffer per row."""
         result = {}
         with self._conn() as conn:
             rows = conn.execute("""
                 SELECT p.name, e.embedding
                 FROM embeddings e
                 JOIN persons p ON e.person_id = p.id
+                ORDER BY e.person_id, e.id
             """).fetchall()
         for name, emb_blob in rows:
-            result.setdefault(name, []).append(pickle.loads(emb_blob))
-        return result
+            result.setdefault(name, []).append(np.frombuffer(emb_blob, dtype='<f4'))
+        return {name: np.stack(embs) for name, embs in result.items()}
 
     # ── Recognition Log ───────────────────────────────────────────
     def log_recognition(self, name: str, confidence: float,
-                        source: str = "camera", spoof: bool = False):
+                        source: str = "camera", spoof: bool = False) -> bool:
+        """
+        Buffer one recognition event for the background writer.
+        Returns False when the event was a duplicate and got dropped.
+        """
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = RecognitionLogWriter(self)
+        return self._writer.submit(name, confidence, source, spoof)
+
+    def flush_log(self):
+        if self._writer:
+            self._writer.flush()
+
+    def _insert_recognitions(self, rows: list):
+        """Insert raw events and fold them into the hourly / daily rollups."""
+        agg = {}
+        for name, conf, ts, _source, spoof in rows:
+            for gran, width in self._GRANULARITIES:
+                key = (gran, ts[:width], name)
+                total, spoofs, best = agg.get(key, (0, 0, 0.0))
+                agg[key] = (total + 1, spoofs + spoof, max(best, conf))
         with self._conn() as conn:
-            conn.execute(
+            conn.executemany(
                 "INSERT INTO recognition_log (person_name, confidence, timestamp, source, spoof) VALUES (?,?,?,?,?)",
-                (name, confidence, datetime.now().isoformat(), source, int(spoof))
+                rows
             )
+            conn.executemany("""
+                INSERT INTO recognition_rollup
+                    (granularity, bucket, person_name, total, spoofs, max_conf)
+                VALUES (?,?,?,?,?,?)
+                ON CONFLICT (granularity, bucket, person_name) DO UPDATE SET
+                    total    = total  + excluded.total,
+                    spoofs   = spoofs + excluded.spoofs,
+                    max_conf = MAX(max_conf, excluded.max_conf)
+            """, [k + v for k, v in agg.items()])
+
+    @staticmethod
+    def _range_filter(column: str, since: Optional[datetime],
+                      until: Optional[datetime], width: int = 26) -> Tuple[str, list]:
+        """SQL fragment bounding an ISO-text column to [since, until]."""
+        clauses, params = [], []
+        if since:
+            clauses.append(f"{column} >= ?")
+            params.append(since.isoformat()[:width])
+        if until:
+            clauses.append(f"{column} <= ?")
+            params.append(until.isoformat()[:width])
+        return (" AND ".join(clauses) or "1"), params
+
+    def get_recognition_stats(self, since: Optional[datetime] = None,
+                              until: Optional[datetime] = None) -> Dict:
+        """
+        Summary counts read from the rollup tables.
+        With a time range, hourly buckets are used (hour resolution);
+        otherwise the much smaller daily buckets.
+        """
+        gran, width = self._GRANULARITIES[0] if (since or until) else self._GRANULARITIES[1]
+        where, params = self._range_filter("bucket", since, until, width)
+        where  = f"granularity = ? AND {where}"
+        params = [gran] + params
 
-    def get_recognition_stats(self) -> Dict:
         with self._conn() as conn:
-            total = conn.execute("SELECT COUNT(*) FROM recognition_log").fetchone()[0]
-            known = conn.execute(
-                "SELECT COUNT(*) FROM recognition_log WHERE person_name != 'Unknown'"
-            ).fetchone()[0]
-            spoofs = conn.execute(
-                "SELECT COUNT(*) FROM recognition_log WHERE spoof=1"
-            ).fetchone()[0]
-            top = conn.execute("""
-                SELECT person_name, COUNT(*) as cnt
-                FROM recognition_log
-                WHERE person_name != 'Unknown'
+            total, known, spoofs = conn.execute(f"""
+                SELECT COALESCE(SUM(total), 0),
+                       COALESCE(SUM(CASE WHEN person_name != 'Unknown' THEN total END), 0),
+                       COALESCE(SUM(spoofs), 0)
+                FROM recognition_rollup WHERE {where}
+            """, params).fetchone()
+            top = conn.execute(f"""
+                SELECT person_name, SUM(total) AS cnt
+                FROM recognition_rollup
+                WHERE {where} AND person_name != 'Unknown'
                 GROUP BY person_name
                 ORDER BY cnt DESC LIMIT 5
-            """).fetchall()
-            recent = conn.execute("""
+            """, params).fetchall()
+            timeline = conn.execute(f"""
+                SELECT bucket, SUM(total), SUM(spoofs)
+                FROM recognition_rollup WHERE {where}
+                GROUP BY bucket ORDER BY bucket
+            """, params).fetchall()
+
+            log_where, log_params = self._range_filter("timestamp", since, until)
+            recent = conn.execute(f"""
                 SELECT person_name, confidence, timestamp
                 FROM recognition_log
-                ORDER BY id DESC LIMIT 10
-            """).fetchall()
+                WHERE {log_where}
+                ORDER BY timestamp DESC LIMIT 10
+            """, log_params).fetchall()
+            registered = conn.execute("SELECT COUNT(*) FROM persons").fetchone()[0]
 
         return {
             "total_recognitions":   total,
@@ -193,5 +491,7 @@ class FaceDatabase:
             "spoof_attempts":       spoofs,
             "top_persons":          [{"name": r[0], "count": r[1]} for r in top],
             "recent_events":        [{"name": r[0], "confidence": r[1], "time": r[2]} for r in recent],
-            "registered_persons":   len(self.list_persons()),
-        }
\ No newline at end of file
+            "registered_persons":   registered,
+            "granularity":          gran,
+            "timeline":             [{"bucket": r[0], "count": r[1], "spoofs": r[2]} for r in timeline],
+        }
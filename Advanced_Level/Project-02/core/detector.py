@@ -8,8 +8,31 @@ Multi-backend face detector:
 
 import cv2
 import numpy as np
-from typing import List, Tuple
-from config import Config
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from config     import Config
+from core.frame import FrameContext
+
+
+# ── Process-wide Model Cache ──────────────────────────────────────
+# Models are not safe to call from several threads at once; code that
+# detects concurrently gives each thread its own `slot` (one copy per
+# slot, shared by everything else using that slot).
+@lru_cache(maxsize=None)
+def load_cascade(filename: str, slot: int = 0) -> cv2.CascadeClassifier:
+    """Load a bundled Haar cascade once per process (and slot)."""
+    return cv2.CascadeClassifier(cv2.data.haarcascades + filename)
+
+
+@lru_cache(maxsize=None)
+def _load_dnn(prototxt: str, caffemodel: str, slot: int = 0):
+    return cv2.dnn.readNetFromCaffe(prototxt, caffemodel)
+
+
+@lru_cache(maxsize=None)
+def _load_mtcnn(slot: int = 0):
+    from mtcnn import MTCNN
+    return MTCNN()
 
 
 class FaceDetection:
@@ -51,23 +74,23 @@ class FaceDetection:
 class HaarDetector:
     """Classic Haar Cascade detector — fast, no GPU needed."""
 
-    def __init__(self, cfg: Config):
-        self.cfg      = cfg
-        self._cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        )
-        self._eye_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + "haarcascade_eye.xml"
-        )
+    def __init__(self, cfg: Config, slot: int = 0):
+        self.cfg          = cfg
+        self._cascade     = load_cascade("haarcascade_frontalface_default.xml", slot)
+        self._eye_cascade = load_cascade("haarcascade_eye.xml", slot)
 
-    def detect(self, frame: np.ndarray) -> List[FaceDetection]:
-        gray   = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray   = cv2.equalizeHist(gray) if self.cfg.gray_equalize else gray
+    def detect(self, frame: np.ndarray,
+               ctx: Optional[FrameContext] = None,
+               scale: float = 1.0) -> List[FaceDetection]:
+        """`scale` — how much `frame` was shrunk, so min face size shrinks too."""
+        ctx    = ctx or FrameContext(frame, self.cfg)
+        gray   = ctx.equalized
+        mw, mh = self.cfg.min_face_size
         faces  = self._cascade.detectMultiScale(
             gray,
             scaleFactor  = self.cfg.scale_factor,
             minNeighbors = self.cfg.min_neighbors,
-            minSize      = self.cfg.min_face_size,
+            minSize      = (max(1, int(mw * scale)), max(1, int(mh * scale))),
             flags        = cv2.CASCADE_SCALE_IMAGE
         )
         results = []
@@ -85,19 +108,25 @@ class HaarDetector:
 class DNNDetector:
     """SSD / ResNet-10 DNN detector — more accurate, handles angles."""
 
-    def __init__(self, cfg: Config):
+    def __init__(self, cfg: Config, slot: int = 0):
         self.cfg = cfg
         try:
-            self.net = cv2.dnn.readNetFromCaffe(
-                cfg.dnn_prototxt, cfg.dnn_caffemodel
-            )
+            self.net = _load_dnn(cfg.dnn_prototxt, cfg.dnn_caffemodel, slot)
         except Exception:
             print("  ⚠️  DNN model files not found. Falling back to Haar Cascade.")
-            self.net = None
+            self.net       = None
+            self._fallback = HaarDetector(cfg, slot)
 
-    def detect(self, frame: np.ndarray) -> List[FaceDetection]:
+    @property
+    def resizes_input(self) -> bool:
+        """The blob is always 300x300, so pre-scaling the frame buys nothing."""
+        return self.net is not None
+
+    def detect(self, frame: np.ndarray,
+               ctx: Optional[FrameContext] = None,
+               scale: float = 1.0) -> List[FaceDetection]:
         if self.net is None:
-            return HaarDetector(self.cfg).detect(frame)
+            return self._fallback.detect(frame, ctx, scale)
 
         h, w    = frame.shape[:2]
         blob    = cv2.dnn.blobFromImage(
@@ -125,19 +154,21 @@ class DNNDetector:
 class MTCNNDetector:
     """MTCNN — landmark-aware, best accuracy, requires mtcnn package."""
 
-    def __init__(self, cfg: Config):
+    def __init__(self, cfg: Config, slot: int = 0):
         self.cfg = cfg
         try:
-            from mtcnn import MTCNN
-            self._det = MTCNN()
+            self._det = _load_mtcnn(slot)
         except ImportError:
             print("  ⚠️  mtcnn not installed. pip install mtcnn")
-            self._det = None
+            self._det      = None
+            self._fallback = HaarDetector(cfg, slot)
 
-    def detect(self, frame: np.ndarray) -> List[FaceDetection]:
+    def detect(self, frame: np.ndarray,
+               ctx: Optional[FrameContext] = None,
+               scale: float = 1.0) -> List[FaceDetection]:
         if self._det is None:
-            return HaarDetector(self.cfg).detect(frame)
-        rgb     = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            return self._fallback.detect(frame, ctx, scale)
+        rgb     = ctx.rgb if ctx else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = self._det.detect_faces(rgb)
         faces   = []
         for r in results:
@@ -153,23 +184,110 @@ class MTCNNDetector:
 class FaceDetector:
     """Unified detector — selects backend from config."""
 
-    def __init__(self, cfg: Config):
+    def __init__(self, cfg: Config, slot: int = 0, verbose: bool = True):
         self.cfg = cfg
         backend  = cfg.detector_backend.lower()
         if backend == "dnn":
-            self._backend = DNNDetector(cfg)
+            self._backend = DNNDetector(cfg, slot)
         elif backend == "mtcnn":
-            self._backend = MTCNNDetector(cfg)
+            self._backend = MTCNNDetector(cfg, slot)
         else:
-            self._backend = HaarDetector(cfg)
-        print(f"   🔍 Detector backend : {backend.upper()}")
+            self._backend = HaarDetector(cfg, slot)
+        if verbose:
+            print(f"   🔍 Detector backend : {backend.upper()}")
+
+        # ROI search state — only used by detect_tracked()
+        self._prev_boxes : List[Tuple] = []
+        self._since_full = 0
+
+    @property
+    def is_fallback(self) -> bool:
+        """True when the requested backend was unavailable and Haar runs instead."""
+        return hasattr(self._backend, "_fallback")
+
+    # ── Detection ─────────────────────────────────────────────────
+    def _detect_scale(self, width: int) -> float:
+        """Downscale factor for detection: `detect_scale`, capped by `detect_max_width`."""
+        if getattr(self._backend, "resizes_input", False):
+            return 1.0
+        scale = self.cfg.detect_scale
+        if self.cfg.detect_max_width and width * scale > self.cfg.detect_max_width:
+            scale = self.cfg.detect_max_width / width
+        return min(1.0, scale)
+
+    def detect(self, frame: np.ndarray,
+               ctx: Optional[FrameContext] = None) -> List[FaceDetection]:
+        """
+        Detect on a downscaled copy of the frame and map boxes back to
+        full resolution, so crops / recognition still use every pixel.
+        """
+        ctx   = ctx or FrameContext(frame, self.cfg)
+        scale = self._detect_scale(frame.shape[1])
+        if scale >= 1.0:
+            return self._backend.detect(frame, ctx)
+        small = FrameContext(ctx.resized(scale), self.cfg)
+        faces = self._backend.detect(small.frame, small, scale)
+        return [self._rescale(f, 1.0 / scale) for f in faces]
+
+    def detect_tracked(self, frame: np.ndarray,
+                       ctx: Optional[FrameContext] = None) -> List[FaceDetection]:
+        """
+        Stateful variant for a single video stream: when `detect_roi_search`
+        is on, search only around last frame's faces and fall back to a full
+        detect every `detect_full_every` frames or when the ROI comes up empty.
+        """
+        if not self.cfg.detect_roi_search:
+            return self.detect(frame, ctx)
+        ctx = ctx or FrameContext(frame, self.cfg)
+        self._since_full += 1
+        faces = None
+        if self._prev_boxes and self._since_full < self.cfg.detect_full_every:
+            faces = self._detect_roi(frame, ctx) or None
+        if faces is None:
+            faces = self.detect(frame, ctx)
+            self._since_full = 0
+        self._prev_boxes = [f.bbox for f in faces]
+        return faces
+
+    def reset_tracking(self):
+        self._prev_boxes = []
+        self._since_full = 0
+
+    def _detect_roi(self, frame: np.ndarray, ctx: FrameContext) -> List[FaceDetection]:
+        """Detect inside the union of last frame's boxes grown by `detect_roi_margin`."""
+        h, w = frame.shape[:2]
+        m    = self.cfg.detect_roi_margin
+        x1 = max(0, min(int(x - bw * m) for x, y, bw, bh in self._prev_boxes))
+        y1 = max(0, min(int(y - bh * m) for x, y, bw, bh in self._prev_boxes))
+        x2 = min(w, max(int(x + bw * (1 + m)) for x, y, bw, bh in self._prev_boxes))
+        y2 = min(h, max(int(y + bh * (1 + m)) for x, y, bw, bh in self._prev_boxes))
+        if x2 <= x1 or y2 <= y1:
+            return []
+        roi   = frame[y1:y2, x1:x2]
+        faces = self.detect(roi, FrameContext(roi, self.cfg))
+        return [self._translate(f, x1, y1) for f in faces]
+
+    @staticmethod
+    def _translate(face: FaceDetection, dx: int, dy: int) -> FaceDetection:
+        lm = {key: (int(v[0] + dx), int(v[1] + dy))
+              if isinstance(v, (tuple, list)) and len(v) == 2 else v
+              for key, v in face.landmarks.items()}
+        return FaceDetection(face.x + dx, face.y + dy, face.w, face.h,
+                             confidence=face.confidence, landmarks=lm)
 
-    def detect(self, frame: np.ndarray) -> List[FaceDetection]:
-        return self._backend.detect(frame)
+    @staticmethod
+    def _rescale(face: FaceDetection, k: float) -> FaceDetection:
+        lm = {key: (int(v[0] * k), int(v[1] * k))
+              if isinstance(v, (tuple, list)) and len(v) == 2 else v
+              for key, v in face.landmarks.items()}
+        return FaceDetection(int(face.x * k), int(face.y * k),
+                             int(face.w * k), int(face.h * k),
+                             confidence=face.confidence, landmarks=lm)
 
-    def detect_largest(self, frame: np.ndarray):
+    def detect_largest(self, frame: np.ndarray,
+                       ctx: Optional[FrameContext] = None):
         """Return only the largest face (most prominent)."""
-        faces = self.detect(frame)
+        faces = self.detect(frame, ctx)
         return max(faces, key=lambda f: f.area()) if faces else None
 
     def extract_face(self, frame: np.ndarray,
@@ -0,0 +1,275 @@
+"""
+core/enrollment.py
+Parallel dataset enrollment — decodes, detects, aligns and embeds face
+images in chunks across a process pool.
+Work is checkpointed per person, so an interrupted run resumes from the
+last finished person instead of starting over.
+"""
+
+import cv2
+import os
+import io
+import json
+import hashlib
+import contextlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from config       import Config
+from core.logger  import SystemLogger
+
+IMAGE_EXTS   = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+DATASET_EXTS = ('.jpg', '.png')
+
+# Per-process models, built once by _init_worker
+_worker: Dict = {}
+
+
+# ── Worker Side ───────────────────────────────────────────────────
+def _init_worker(cfg: Config, detect: bool, embed: bool):
+    """Load detector / embedding model once per worker process."""
+    import warnings
+    warnings.filterwarnings('ignore')
+    _worker.clear()
+    _worker['cfg'] = cfg
+    # Backends announce themselves on init — keep worker output quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        if detect:
+            from core.detector import FaceDetector
+            _worker['det'] = FaceDetector(cfg)
+        if embed:
+            from core.embedding import EmbeddingExtractor
+            _worker['emb'] = EmbeddingExtractor(cfg)
+
+
+def _detect_chunk(paths: List[str]) -> List[Optional[np.ndarray]]:
+    """Decode → detect largest face → align → grayscale crop."""
+    det   = _worker['det']
+    crops = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            crops.append(None)
+            continue
+        face = det.detect_largest(img)
+        if face is None:
+            crops.append(None)
+            continue
+        roi = det.align_face(img, face)
+        crops.append(cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY))
+    return crops
+
+
+def _load_chunk(paths: List[str]) -> List[Optional[np.ndarray]]:
+    """Decode registered face crops as resized grayscale arrays."""
+    size  = _worker['cfg'].face_size
+    faces = []
+    for path in paths:
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        faces.append(cv2.resize(img, size) if img is not None else None)
+    return faces
+
+
+def _embed_chunk(paths: List[str]) -> List[Optional[np.ndarray]]:
+    """Decode registered face crops and extract deep embeddings."""
+    extractor = _worker['emb']
+    embs      = []
+    for path in paths:
+        img = cv2.imread(path)
+        embs.append(extractor.extract(img) if img is not None else None)
+    return embs
+
+
+# ──────────────────────────────────────────────────────────────────
+class _Pool:
+    """Runs chunk functions in a process pool, or inline for 1 worker."""
+
+    def __init__(self, cfg: Config, workers: int, detect: bool, embed: bool):
+        self._initargs = (cfg, detect, embed)
+        self._workers  = workers
+        self._executor = None
+
+    def __enter__(self):
+        if self._workers > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers = self._workers,
+                initializer = _init_worker,
+                initargs    = self._initargs,
+            )
+        else:
+            _init_worker(*self._initargs)
+        return self
+
+    def __exit__(self, *exc):
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+
+    def map(self, fn, chunks):
+        if self._executor:
+            return self._executor.map(fn, chunks)
+        return map(fn, chunks)
+
+
+# ──────────────────────────────────────────────────────────────────
+class ParallelEnroller:
+    def __init__(self, cfg: Config, log: SystemLogger,
+                 workers: Optional[int] = None):
+        self.cfg     = cfg
+        self.log     = log
+        self.workers = max(1, workers or cfg.enroll_workers)
+        self.chunk   = max(1, cfg.enroll_chunk_size)
+
+    def _chunks(self, items: List[str]) -> List[List[str]]:
+        return [items[i:i + self.chunk] for i in range(0, len(items), self.chunk)]
+
+    @staticmethod
+    def _progress(done: int, total: int, prefix: str):
+        pct = int(done / max(total, 1) * 100)
+        bar = '█' * (pct // 5) + '░' * (20 - pct // 5)
+        end = '\n' if done >= total else ''
+        print(f"\r   {prefix} [{bar}] {done}/{total}", end=end, flush=True)
+
+    # ── Registration ──────────────────────────────────────────────
+    def enroll_folder(self, label: int, folder: str, save_dir: str) -> int:
+        """Detect & crop every image in `folder`; returns samples written."""
+        files = sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                       if f.lower().endswith(IMAGE_EXTS))
+        chunks = self._chunks(files)
+        count  = 0
+        done   = 0
+        print(f"\n   🔄 Enrolling {len(files)} images with {self.workers} worker(s)...")
+        with _Pool(self.cfg, self.workers, detect=True, embed=False) as pool:
+            for paths, crops in zip(chunks, pool.map(_detect_chunk, chunks)):
+                for crop in crops:
+                    if crop is None:
+                        continue
+                    path = os.path.join(save_dir, f"{label}_{count:04d}.jpg")
+                    cv2.imwrite(path, crop)
+                    count += 1
+                done += len(paths)
+                self._progress(done, len(files), "📷")
+        return count
+
+    # ── Dataset Loading ───────────────────────────────────────────
+    def load_dataset(self, persons: Dict[str, int], mode: str = "faces",
+                     resume: bool = True) -> Dict[str, List[np.ndarray]]:
+        """
+        Load every registered person's samples from `dataset_dir`.
+        mode="faces"      → resized grayscale crops (classical recognizers)
+        mode="embeddings" → deep embeddings
+        Returns {name: [array, ...]}; people without samples are omitted.
+        """
+        fn       = _embed_chunk if mode == "embeddings" else _load_chunk
+        manifest = self._read_manifest() if resume else {}
+        result   = {}
+
+        # 1. Reuse checkpoints whose folder fingerprint is unchanged
+        pending = []
+        for name in sorted(os.listdir(self.cfg.dataset_dir)):
+            person_dir = os.path.join(self.cfg.dataset_dir, name)
+            if not os.path.isdir(person_dir) or name not in persons:
+                continue
+            files = sorted(os.path.join(person_dir, f)
+                           for f in os.listdir(person_dir)
+                           if f.lower().endswith(DATASET_EXTS))
+            key   = f"{persons[name]}_{mode}"
+            sig   = self._signature(files)
+            arrays = None
+            if manifest.get(key, {}).get("signature") == sig:
+                arrays = self._load_checkpoint(key)
+            if arrays is None:
+                pending.append((name, key, sig, files))
+            elif arrays:
+                result[name] = arrays
+
+        if result:
+            print(f"   ♻️  {len(result)} person(s) restored from checkpoint")
+        if not pending:
+            return result
+
+        # 2. Fan every pending chunk out at once; results come back in
+        #    order, so each person is checkpointed as soon as it completes
+        jobs = [(p, chunk) for p, (_, _, _, files) in enumerate(pending)
+                for chunk in self._chunks(files)]
+        remaining = [0] * len(pending)
+        for p, _ in jobs:
+            remaining[p] += 1
+        arrays = [[] for _ in pending]
+
+        print(f"   🔄 Processing {len(pending)} person(s) with {self.workers} worker(s)...")
+        with _Pool(self.cfg, self.workers, detect=False,
+                   embed=(mode == "embeddings")) as pool:
+            chunk_results = pool.map(fn, [chunk for _, chunk in jobs])
+            for (p, _), out in zip(jobs, chunk_results):
+                arrays[p].extend(a for a in out if a is not None)
+                remaining[p] -= 1
+                if remaining[p]:
+                    continue
+                name, key, sig, _ = pending[p]
+                self._save_checkpoint(key, arrays[p])
+                manifest[key] = {"name": name, "signature": sig,
+                                 "count": len(arrays[p])}
+                self._write_manifest(manifest)
+                if arrays[p]:
+                    result[name] = arrays[p]
+                print(f"   [{p + 1:>4}/{len(pending)}] {name:<25} {len(arrays[p]):>4} {mode}")
+
+        self.log.info(f"Loaded {mode} for {len(result)} persons "
+                      f"({self.workers} worker(s))")
+        return result
+
+    # ── Checkpoints ───────────────────────────────────────────────
+    @staticmethod
+    def _signature(files: List[str]) -> str:
+        """Cheap fingerprint of a person folder — names, sizes, mtimes."""
+        h = hashlib.sha1()
+        for path in files:
+            st = os.stat(path)
+            h.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns};".encode())
+        return h.hexdigest()
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.cfg.enroll_checkpoint_dir, "manifest.json")
+
+    def _read_manifest(self) -> Dict:
+        if not os.path.exists(self._manifest_path):
+            return {}
+        try:
+            with open(self._manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest: Dict):
+        os.makedirs(self.cfg.enroll_checkpoint_dir, exist_ok=True)
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._manifest_path)
+
+    def _checkpoint_path(self, key: str) -> str:
+        return os.path.join(self.cfg.enroll_checkpoint_dir, f"{key}.npy")
+
+    def _load_checkpoint(self, key: str) -> Optional[List[np.ndarray]]:
+        try:
+            return list(np.load(self._checkpoint_path(key)))
+        except (OSError, ValueError):
+            return None
+
+    def _save_checkpoint(self, key: str, arrays: List[np.ndarray]):
+        os.makedirs(self.cfg.enroll_checkpoint_dir, exist_ok=True)
+        path = self._checkpoint_path(key)
+        tmp  = path + ".tmp.npy"
+        np.save(tmp, np.stack(arrays) if arrays else np.empty((0,)))
+        os.replace(tmp, path)
+
+    def drop_checkpoints(self, label: int):
+        """Forget cached work for one person (e.g. after deletion)."""
+        manifest = self._read_manifest()
+        for mode in ("faces", "embeddings"):
+            key = f"{label}_{mode}"
+            manifest.pop(key, None)
+            if os.path.exists(self._checkpoint_path(key)):
+                os.remove(self._checkpoint_path(key))
+        self._write_manifest(manifest)
@@ -0,0 +1,197 @@
+"""
+core/events.py
+Outputs for headless recognition:
+  • EventPublisher — newline-delimited JSON to a file, Unix socket or TCP
+                     port; a background thread does the I/O so the
+                     recognition loop never blocks on slow consumers
+  • MJPEGPreview   — optional low-fps multipart/x-mixed-replace stream
+                     served with http.server
+"""
+
+import cv2
+import os
+import json
+import time
+import queue
+import socket
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+
+# ── Sinks ─────────────────────────────────────────────────────────
+class _FileSink:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, 'a', buffering=1)
+
+    def write(self, line: bytes):
+        self._f.write(line.decode())
+
+    def close(self):
+        self._f.close()
+
+
+class _SocketSink:
+    """Listens on a Unix or TCP socket and fans every line out to all clients."""
+
+    def __init__(self, family: int, address):
+        self._server  = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX:
+            if os.path.exists(address):
+                os.remove(address)
+            self._path = address
+        else:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._path = None
+        self._server.bind(address)
+        self._server.listen()
+        self._clients : List[socket.socket] = []
+        self._lock    = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True, name="events-accept").start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return                      # server socket closed
+            conn.settimeout(1.0)            # a stuck client can't stall the sink
+            with self._lock:
+                self._clients.append(conn)
+
+    def write(self, line: bytes):
+        with self._lock:
+            alive = []
+            for conn in self._clients:
+                try:
+                    conn.sendall(line)
+                    alive.append(conn)
+                except OSError:
+                    conn.close()
+            self._clients = alive
+
+    def close(self):
+        self._server.close()
+        with self._lock:
+            for conn in self._clients:
+                conn.close()
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+
+
+def open_sink(spec: str):
+    """`unix:/path`, `tcp:host:port` or a file path (optionally `file:` prefixed)."""
+    kind, sep, rest = spec.partition(":")
+    if sep and kind == "unix":
+        return _SocketSink(socket.AF_UNIX, rest)
+    if sep and kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return _SocketSink(socket.AF_INET, (host or "127.0.0.1", int(port)))
+    return _FileSink(rest if sep and kind == "file" else spec)
+
+
+# ──────────────────────────────────────────────────────────────────
+class EventPublisher:
+    def __init__(self, specs: List[str], queue_size: int = 1000):
+        self._sinks   = [open_sink(s) for s in specs]
+        self._queue   = queue.Queue(maxsize=queue_size)
+        self.dropped  = 0
+        self._thread  = threading.Thread(target=self._run, daemon=True, name="events")
+        self._thread.start()
+
+    def publish(self, event: Dict):
+        """Queue one event; dropped (and counted) if consumers fall behind."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            line = (json.dumps(event, separators=(",", ":")) + "\n").encode()
+            for sink in self._sinks:
+                try:
+                    sink.write(line)
+                except Exception:
+                    pass
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        for sink in self._sinks:
+            sink.close()
+
+
+# ──────────────────────────────────────────────────────────────────
+class MJPEGPreview:
+    """
+    Latest annotated frame as an MJPEG stream at http://host:port/.
+    There is no authentication, so it listens on loopback unless another
+    host is passed.
+    """
+
+    def __init__(self, port: int, fps: float = 2.0, width: int = 640,
+                 host: str = "127.0.0.1"):
+        self.interval = 1.0 / max(0.1, fps)
+        self.width    = width
+        self._jpeg    : Optional[bytes] = None
+        self._last    = 0.0
+        self._cond    = threading.Condition()
+        self._clients = 0
+        preview       = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.end_headers()
+                with preview._cond:
+                    preview._clients += 1
+                try:
+                    while True:
+                        with preview._cond:
+                            preview._cond.wait(timeout=5)
+                            jpeg = preview._jpeg
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n"
+                                         + f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                                         + jpeg + b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with preview._cond:
+                        preview._clients -= 1
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True,
+                         name="mjpeg-preview").start()
+
+    def due(self) -> bool:
+        """True when someone is watching and the next preview frame is due."""
+        return self._clients > 0 and time.monotonic() - self._last >= self.interval
+
+    def update(self, frame: np.ndarray):
+        self._last = time.monotonic()
+        h, w = frame.shape[:2]
+        if w > self.width:
+            frame = cv2.resize(frame, (self.width, int(h * self.width / w)),
+                               interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        if ok:
+            with self._cond:
+                self._jpeg = buf.tobytes()
+                self._cond.notify_all()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,61 @@
+"""
+core/frame.py
+Per-frame context — computes grayscale / equalized / RGB / resized
+variants of a frame once and shares them between the detector,
+recognizer and anti-spoofing stages.
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, Tuple
+from config import Config
+
+
+class FrameContext:
+    def __init__(self, frame: np.ndarray, cfg: Config):
+        self.frame  = frame
+        self.cfg    = cfg
+        self._cache : Dict = {}
+
+    def _get(self, key, make):
+        if key not in self._cache:
+            self._cache[key] = make()
+        return self._cache[key]
+
+    # ── Whole-frame Variants ──────────────────────────────────────
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.frame.shape[:2]
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self._get("gray", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def equalized(self) -> np.ndarray:
+        """Gray frame, histogram-equalized if `gray_equalize` is on."""
+        if not self.cfg.gray_equalize:
+            return self.gray
+        return self._get("equalized", lambda: cv2.equalizeHist(self.gray))
+
+    @property
+    def rgb(self) -> np.ndarray:
+        return self._get("rgb", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB))
+
+    def resized(self, scale: float, variant: str = "frame") -> np.ndarray:
+        """`variant` ("frame" | "gray" | "equalized" | "rgb") scaled by `scale`."""
+        src = self.frame if variant == "frame" else getattr(self, variant)
+        if scale == 1.0:
+            return src
+        return self._get(("resized", variant, scale), lambda: cv2.resize(
+            src, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+
+    # ── Face Crops ────────────────────────────────────────────────
+    def face(self, detection, gray: bool = False) -> np.ndarray:
+        """Padded face crop resized to `face_size` — same as FaceDetector.extract_face."""
+        def make():
+            src  = self.gray if gray else self.frame
+            h, w = src.shape[:2]
+            x, y, fw, fh = detection.padded(h, w, self.cfg.face_padding)
+            return cv2.resize(src[y:y+fh, x:x+fw], self.cfg.face_size)
+        return self._get(("face", detection.bbox, gray), make)
@@ -0,0 +1,136 @@
+"""
+core/gallery.py
+Embedding gallery — every enrolled embedding as one contiguous float32
+matrix, exported to `.npy` so recognizers can memory-map it at start-up
+instead of deserialising Python objects.
+"""
+
+import os
+import json
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from config import Config
+
+
+class EmbeddingGallery:
+    """L2-normalised (N, D) float32 matrix + row → person index."""
+
+    def __init__(self, names: List[str], vectors: np.ndarray, ids: np.ndarray):
+        self.names   = names          # person index → name
+        self.vectors = vectors        # (N, D) float32, unit rows
+        self.ids     = ids            # (N,)   int32, row → person index
+
+    # ── Construction ──────────────────────────────────────────────
+    @classmethod
+    def from_embeddings(cls, embeddings: Dict[str, list]) -> "EmbeddingGallery":
+        """Build from {name: [embedding, ...]}."""
+        names, rows, ids = [], [], []
+        for name, embs in embeddings.items():
+            if not len(embs):
+                continue
+            ids.extend([len(names)] * len(embs))
+            names.append(name)
+            rows.extend(embs)
+        if not rows:
+            return cls.empty()
+        return cls(names, cls._normalise(np.asarray(rows, dtype=np.float32)),
+                   np.asarray(ids, dtype=np.int32))
+
+    @classmethod
+    def empty(cls, dim: int = 0) -> "EmbeddingGallery":
+        return cls([], np.empty((0, dim), dtype=np.float32),
+                   np.empty((0,), dtype=np.int32))
+
+    @staticmethod
+    def _normalise(mat: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        return (mat / (norms + 1e-10)).astype(np.float32)
+
+    # ── Persistence ───────────────────────────────────────────────
+    @staticmethod
+    def exists(cfg: Config) -> bool:
+        return all(os.path.exists(p) for p in
+                   (cfg.gallery_path, cfg.gallery_ids_path, cfg.gallery_names_path))
+
+    @classmethod
+    def load(cls, cfg: Config, mmap: bool = True) -> Optional["EmbeddingGallery"]:
+        """Open the exported gallery; vectors are memory-mapped by default."""
+        if not cls.exists(cfg):
+            return None
+        mode = 'r' if mmap else None
+        with open(cfg.gallery_names_path) as f:
+            names = json.load(f)["names"]
+        return cls(names,
+                   np.load(cfg.gallery_path,     mmap_mode=mode),
+                   np.load(cfg.gallery_ids_path, mmap_mode=mode))
+
+    def save(self, cfg: Config):
+        """Write vectors / ids / names atomically next to the other models."""
+        for path, arr in ((cfg.gallery_path,     self.vectors),
+                          (cfg.gallery_ids_path, self.ids)):
+            tmp = path + ".tmp.npy"
+            np.save(tmp, np.ascontiguousarray(arr))
+            os.replace(tmp, path)
+        tmp = cfg.gallery_names_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"names": self.names, "dim": self.dim}, f)
+        os.replace(tmp, cfg.gallery_names_path)
+
+    # ── Editing ───────────────────────────────────────────────────
+    def add(self, name: str, embeddings: list) -> "EmbeddingGallery":
+        """Return a gallery with `name`'s vectors replaced by `embeddings`."""
+        base = self.remove(name)
+        new  = self._normalise(np.asarray(embeddings, dtype=np.float32))
+        if len(base.vectors) and new.shape[1] != base.dim:
+            raise ValueError(f"embedding dim {new.shape[1]} != gallery dim {base.dim}")
+        idx = len(base.names)
+        return EmbeddingGallery(
+            base.names + [name],
+            np.concatenate([base.vectors.reshape(-1, new.shape[1]), new]),
+            np.concatenate([base.ids, np.full(len(new), idx, dtype=np.int32)]),
+        )
+
+    def remove(self, name: str) -> "EmbeddingGallery":
+        """Return a gallery without `name`; other vectors are untouched."""
+        if name not in self.names:
+            return self
+        idx  = self.names.index(name)
+        keep = self.ids != idx
+        ids  = np.asarray(self.ids[keep])
+        ids  = ids - (ids > idx)                  # close the gap in indices
+        return EmbeddingGallery(self.names[:idx] + self.names[idx + 1:],
+                                np.asarray(self.vectors[keep]),
+                                ids.astype(np.int32))
+
+    # ── Matching ──────────────────────────────────────────────────
+    def match(self, query: np.ndarray) -> Tuple[str, float]:
+        """Nearest neighbour by cosine distance → (name, distance)."""
+        if not len(self.vectors):
+            return "Unknown", float('inf')
+        q    = np.asarray(query, dtype=np.float32).ravel()
+        q   /= (np.linalg.norm(q) + 1e-10)
+        sims = self.vectors @ q
+        best = int(np.argmax(sims))
+        return self.names[self.ids[best]], float(1.0 - sims[best])
+
+    def match_many(self, queries: np.ndarray) -> List[Tuple[str, float]]:
+        """`match` for a (B, D) batch in a single matrix product."""
+        q = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+        if not len(q):
+            return []
+        if not len(self.vectors):
+            return [("Unknown", float('inf'))] * len(q)
+        sims = self._normalise(q) @ self.vectors.T          # (B, N)
+        best = np.argmax(sims, axis=1)
+        return [(self.names[self.ids[j]], float(1.0 - sims[i, j]))
+                for i, j in enumerate(best)]
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def __repr__(self):
+        return f"EmbeddingGallery(persons={len(self.names)}, vectors={len(self)}, dim={self.dim})"
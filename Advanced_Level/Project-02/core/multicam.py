@@ -0,0 +1,316 @@
+"""
+core/multicam.py
+Multi-camera recognition server — one capture thread per source keeps
+only the newest frame, a small worker pool detects on whichever cameras
+have fresh frames and recognizes their faces as one batch against a
+single shared model. Tracking, liveness, stats and output stay per camera.
+"""
+
+import cv2
+import os
+import time
+import threading
+import dataclasses
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config          import Config
+from core.detector   import FaceDetector, FaceDetection
+from core.database   import FaceDatabase
+from core.anti_spoof import AntiSpoofing
+from core.logger     import SystemLogger
+from core.frame      import FrameContext
+from core.tracker    import FaceTracker, NameSmoother
+from core.recognizer import FacialRecognizer, RecognitionResult
+
+
+def parse_sources(specs: List[str]) -> List[Tuple[str, str]]:
+    """`name=url` or bare `url` / camera index → [(name, source), ...]."""
+    out = []
+    for i, spec in enumerate(specs):
+        name, sep, src = spec.partition("=")
+        if not sep or "://" in name:
+            name, src = f"cam{i}", spec
+        out.append((name, src))
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────
+class CameraStream:
+    """Capture thread + per-camera recognition state and counters."""
+
+    def __init__(self, index: int, name: str, source: str, cfg: Config):
+        self.index    = index
+        self.name     = name
+        self.source   = int(source) if source.isdigit() else source
+        self.cfg      = cfg
+        self.tracker  = FaceTracker(cfg)
+        self.smooth   = NameSmoother()
+        self.writer   = None
+        self.busy     = False              # claimed by a worker
+        self.last_out : Optional[np.ndarray] = None
+
+        self._lock    = threading.Lock()
+        self._frame   : Optional[np.ndarray] = None
+        self._seq     = 0                  # frames captured
+        self._done    = 0                  # seq of the last processed frame
+        self._stop    = threading.Event()
+        self._thread  = threading.Thread(target=self._capture, daemon=True,
+                                         name=f"capture-{name}")
+
+        # Stats
+        self.processed  = 0
+        self.faces      = 0
+        self.recognized = 0
+        self.started    = time.time()
+        self.alive      = False
+
+    # ── Capture ───────────────────────────────────────────────────
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _capture(self):
+        while not self._stop.is_set():
+            cap = cv2.VideoCapture(self.source)
+            if isinstance(self.source, int):
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH,  self.cfg.window_width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.cfg.window_height)
+            self.alive = cap.isOpened()
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                with self._lock:           # older unprocessed frame is dropped
+                    self._frame = frame
+                    self._seq  += 1
+            cap.release()
+            self.alive = False
+            if not isinstance(self.source, str) or "://" not in self.source:
+                break                      # files / local cameras: no reconnect
+            self._stop.wait(self.cfg.multicam_reconnect_seconds)
+
+    def take(self) -> Optional[np.ndarray]:
+        """Newest frame not yet processed, or None."""
+        with self._lock:
+            if self._frame is None or self._seq == self._done:
+                return None
+            self._done = self._seq
+            return self._frame
+
+    @property
+    def captured(self) -> int:
+        return self._seq
+
+    @property
+    def finished(self) -> bool:
+        return not self._thread.is_alive() and self._seq == self._done and not self.busy
+
+    @property
+    def fps(self) -> float:
+        return self.processed / max(1e-6, time.time() - self.started)
+
+
+# ──────────────────────────────────────────────────────────────────
+class MultiCameraServer:
+    def __init__(self, cfg: Config, db: FaceDatabase, log: SystemLogger,
+                 sources: List[Tuple[str, str]], spoof: bool = False,
+                 workers: Optional[int] = None):
+        self.cfg     = cfg
+        self.db      = db
+        self.log     = log
+        self.workers = max(1, workers or cfg.multicam_workers)
+        self.cams    = [CameraStream(i, n, s, cfg) for i, (n, s) in enumerate(sources)]
+
+        # One set of recognition models for every camera; detectors are
+        # per worker slot because OpenCV models are not thread-safe.
+        self.rec       = FacialRecognizer(cfg, db, FaceDetector(cfg), None, log)
+        self._dets     = [FaceDetector(cfg, slot=i + 1, verbose=False)
+                          for i in range(self.workers)]
+        self.spoof     = AntiSpoofing(dataclasses.replace(
+                            cfg, spoof_max_tracks=cfg.spoof_max_tracks * len(self.cams))
+                         ) if spoof else None
+        self._rec_lock   = threading.Lock()
+        self._spoof_lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self._next_cam   = 0
+        self._stop       = threading.Event()
+        self._save       = False
+        self._stamp      = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # ── Scheduling ────────────────────────────────────────────────
+    def _claim(self) -> List[Tuple[CameraStream, np.ndarray]]:
+        """Grab fresh frames from idle cameras, round-robin for fairness."""
+        batch = []
+        with self._claim_lock:
+            n = len(self.cams)
+            for k in range(n):
+                cam = self.cams[(self._next_cam + k) % n]
+                if cam.busy:
+                    continue
+                frame = cam.take()
+                if frame is None:
+                    continue
+                cam.busy = True
+                batch.append((cam, frame))
+                if len(batch) >= self.cfg.multicam_batch_frames:
+                    break
+            self._next_cam = (self._next_cam + 1) % n
+        return batch
+
+    def _worker(self, slot: int):
+        det = self._dets[slot]
+        while not self._stop.is_set():
+            batch = self._claim()
+            if not batch:
+                time.sleep(0.005)
+                continue
+            try:
+                self._process(det, batch)
+            except Exception as e:
+                self.log.error(f"Multicam worker {slot}: {e}")
+            finally:
+                for cam, _ in batch:
+                    cam.busy = False
+
+    # ── Processing ────────────────────────────────────────────────
+    def _process(self, det: FaceDetector, batch: List[Tuple[CameraStream, np.ndarray]]):
+        ctxs  = [FrameContext(frame, self.cfg) for _, frame in batch]
+        dets  = [det.detect(ctx.frame, ctx) for ctx in ctxs]
+        faces = [(ctx, d) for ctx, ds in zip(ctxs, dets) for d in ds]
+        with self._rec_lock:
+            results = self.rec.recognize_batch(faces)
+
+        it = iter(results)
+        for (cam, _), ctx, ds in zip(batch, ctxs, dets):
+            self._handle(cam, ctx, ds, [next(it) for _ in ds])
+
+    def _handle(self, cam: CameraStream, ctx: FrameContext,
+                detections: List[FaceDetection], results: List[RecognitionResult]):
+        frame     = ctx.frame
+        track_ids = cam.tracker.update(detections)
+        cam.smooth.prune(cam.tracker.active_ids)
+
+        for tid, d, result in zip(track_ids, detections, results):
+            result = cam.smooth.update(tid, result)
+
+            if self.spoof:
+                with self._spoof_lock:
+                    result.is_spoof = not self.spoof.is_real(
+                        ctx.face(d), frame, d, ctx, track_id=(cam.index, tid))
+
+            frame = self.rec.draw_overlay(frame, d, result)
+            if result.is_known:
+                cam.recognized += 1
+                if self.cfg.log_recognition_events:
+                    self.db.log_recognition(result.name, result.confidence,
+                                            source=cam.name, spoof=result.is_spoof)
+
+        cam.processed += 1
+        cam.faces     += len(detections)
+        cv2.putText(frame, f"{cam.name}  {cam.fps:.1f} FPS", (10, 24),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 220, 255), 2)
+        if self._save:
+            self._write(cam, frame)
+        cam.last_out = frame
+
+    # ── Output ────────────────────────────────────────────────────
+    def _write(self, cam: CameraStream, frame: np.ndarray):
+        """Per-camera output video, opened at the camera's own resolution."""
+        if cam.writer is None:
+            h, w = frame.shape[:2]
+            path = os.path.join(self.cfg.output_dir, f"{cam.name}_{self._stamp}.avi")
+            cam.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'XVID'),
+                                         20.0, (w, h))
+            print(f"   📹 {cam.name} → {path}")
+        cam.writer.write(frame)
+
+    def _mosaic(self) -> Optional[np.ndarray]:
+        tiles = [cam.last_out for cam in self.cams]
+        if all(t is None for t in tiles):
+            return None
+        tw, th = self.cfg.multicam_tile_size
+        cols   = int(np.ceil(np.sqrt(len(tiles))))
+        rows   = int(np.ceil(len(tiles) / cols))
+        grid   = np.zeros((rows * th, cols * tw, 3), dtype=np.uint8)
+        for i, t in enumerate(tiles):
+            if t is not None:
+                r, c = divmod(i, cols)
+                grid[r*th:(r+1)*th, c*tw:(c+1)*tw] = cv2.resize(t, (tw, th))
+        return grid
+
+    def stats(self) -> List[Dict]:
+        return [{
+            "camera":     cam.name,
+            "alive":      cam.alive,
+            "captured":   cam.captured,
+            "processed":  cam.processed,
+            "dropped":    max(0, cam.captured - cam.processed),
+            "fps":        round(cam.fps, 1),
+            "faces":      cam.faces,
+            "recognized": cam.recognized,
+        } for cam in self.cams]
+
+    def _print_stats(self):
+        print(f"\n   {'Camera':<14}{'Status':<8}{'FPS':>6}{'Done':>8}{'Dropped':>9}"
+              f"{'Faces':>8}{'Known':>8}")
+        for s in self.stats():
+            status = "live" if s["alive"] else "down"
+            print(f"   {s['camera']:<14}{status:<8}{s['fps']:>6}{s['processed']:>8}"
+                  f"{s['dropped']:>9}{s['faces']:>8}{s['recognized']:>8}")
+
+    def _finished(self) -> bool:
+        with self._claim_lock:
+            return all(cam.finished for cam in self.cams)
+
+    # ── Main Loop ─────────────────────────────────────────────────
+    def run(self, save: bool = False, show: bool = False):
+        self._save = save
+        for cam in self.cams:
+            cam.start()
+        pool = [threading.Thread(target=self._worker, args=(i,), daemon=True,
+                                 name=f"multicam-worker-{i}")
+                for i in range(self.workers)]
+        for t in pool:
+            t.start()
+
+        print(f"\n   🎥 {len(self.cams)} camera(s) | {self.workers} worker(s). "
+              f"{'Press Q to quit.' if show else 'Ctrl+C to stop.'}\n")
+        self.log.info(f"Multicam started: {', '.join(c.name for c in self.cams)}")
+        last_stats = time.time()
+        try:
+            while not self._finished():
+                if show:
+                    grid = self._mosaic()
+                    if grid is not None:
+                        cv2.imshow("Facial Recognition — Multi-Camera", grid)
+                    if cv2.waitKey(30) & 0xFF == ord('q'):
+                        break
+                else:
+                    time.sleep(0.2)
+                if time.time() - last_stats >= self.cfg.multicam_stats_seconds:
+                    self._print_stats()
+                    last_stats = time.time()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            for cam in self.cams:
+                cam.stop()
+            for t in pool:
+                t.join(timeout=2)
+            for cam in self.cams:
+                if cam.writer is not None:
+                    cam.writer.release()
+            if show:
+                cv2.destroyAllWindows()
+            self.db.flush_log()
+
+        self._print_stats()
+        self.log.info("Multicam stopped | " + " | ".join(
+            f"{s['camera']}: {s['processed']} frames, {s['recognized']} known"
+            for s in self.stats()))
@@ -11,7 +11,6 @@ import pickle
 import numpy as np
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple
-from collections import deque
 
 from config          import Config
 from core.detector   import FaceDetector, FaceDetection
@@ -19,6 +18,9 @@ from core.database   import FaceDatabase
 from core.anti_spoof import AntiSpoofing
 from core.logger     import SystemLogger
 from core.embedding  import EmbeddingExtractor
+from core.gallery    import EmbeddingGallery
+from core.frame      import FrameContext
+from core.tracker    import FaceTracker, NameSmoother
 
 
 class RecognitionResult:
@@ -52,9 +54,10 @@ class FacialRecognizer:
 
         self._lbph_model   = None
         self._label_map    = {}
-        self._embeddings   = {}
+        self._gallery      : Optional[EmbeddingGallery] = None
         self._emb_extractor= None
-        self._smooth_buf   : Dict[int, deque] = {}   # per-face smoothing
+        self._smoother     = NameSmoother()          # per-track smoothing
+        self._tracker      = FaceTracker(cfg)
 
         self._load_models()
 
@@ -82,18 +85,40 @@ class FacialRecognizer:
             self._lbph_model.read(ff_path)
             print("   ✅ Fisherfaces model loaded")
 
-        # Deep embeddings
-        if os.path.exists(self.cfg.embeddings_path):
-            with open(self.cfg.embeddings_path, 'rb') as f:
-                self._embeddings = pickle.load(f)
+        # Deep embeddings — memory-mapped gallery, re-exported from the DB if missing
+        self._gallery = EmbeddingGallery.load(self.cfg)
+        if self._gallery is None:
+            stored = self.db.load_all_embeddings() or self._migrate_pickled_embeddings()
+            if stored:
+                EmbeddingGallery.from_embeddings(stored).save(self.cfg)
+                self._gallery = EmbeddingGallery.load(self.cfg)
+        if self._gallery is not None and len(self._gallery):
             self._emb_extractor = EmbeddingExtractor(self.cfg)
-            print(f"   ✅ Deep embeddings loaded ({len(self._embeddings)} persons)")
+            print(f"   ✅ Deep embeddings loaded ({len(self._gallery.names)} persons)")
+        else:
+            self._gallery = None
 
         # Label map
         self._label_map = self.db.load_label_map()
-        if not self._lbph_model and not self._embeddings:
+        if not self._lbph_model and not self._gallery:
             print("   ⚠️  No trained model found. Run: python main.py train")
 
+    def _migrate_pickled_embeddings(self) -> Dict[str, np.ndarray]:
+        """
+        Older deep training kept embeddings only in embeddings.pkl. Copy them
+        into the DB once (the gallery is then exported from there as usual).
+        """
+        if not os.path.exists(self.cfg.embeddings_path):
+            return {}
+        with open(self.cfg.embeddings_path, 'rb') as f:
+            legacy = pickle.load(f)
+        unknown = [name for name in legacy if not self.db.get_person_by_name(name)]
+        if unknown:
+            self.log.warn(f"embeddings.pkl: skipping unregistered {', '.join(unknown)}")
+        self.db.replace_all_embeddings(legacy)
+        print(f"   🔁 Migrated embeddings.pkl into the database ({len(legacy) - len(unknown)} persons)")
+        return self.db.load_all_embeddings()
+
     # ── Recognition Logic ─────────────────────────────────────────
     def _recognize_lbph(self, gray_face: np.ndarray) -> Tuple[str, float]:
         if self._lbph_model is None:
@@ -104,40 +129,35 @@ class FacialRecognizer:
         conf = max(0.0, 100.0 - dist)
         if dist > self.cfg.recognition_threshold:
             return "Unknown", conf
-        name = self._label_map.get(label, "Unknown")
+        name = self._label_map.get(label) or self.db.identities.name_for(label)
         return name, conf
 
     def _recognize_deep(self, face_img: np.ndarray) -> Tuple[str, float]:
-        if not self._embeddings or self._emb_extractor is None:
+        if not self._gallery or self._emb_extractor is None:
             return "Unknown", 0.0
         query_emb = self._emb_extractor.extract(face_img)
         if query_emb is None:
             return "Unknown", 0.0
 
-        best_name = "Unknown"
-        best_dist = float('inf')
-
-        for person_name, emb_list in self._embeddings.items():
-            for emb in emb_list:
-                dist = self._emb_extractor.compare(query_emb, emb, "cosine")
-                if dist < best_dist:
-                    best_dist = dist
-                    best_name = person_name
+        return self._deep_result(*self._gallery.match(query_emb))
 
+    def _deep_result(self, best_name: str, best_dist: float) -> Tuple[str, float]:
         if best_dist > self.cfg.deep_threshold:
             return "Unknown", max(0.0, (1.0 - best_dist) * 100)
         return best_name, max(0.0, (1.0 - best_dist) * 100)
 
-    def _recognize_face(self, frame: np.ndarray,
-                        detection: FaceDetection) -> RecognitionResult:
-        face_bgr  = self.det.extract_face(frame, detection)
-        face_gray = cv2.cvtColor(face_bgr, cv2.COLOR_BGR2GRAY)
+    def recognize_face(self, frame: np.ndarray, detection: FaceDetection,
+                       ctx: Optional[FrameContext] = None) -> RecognitionResult:
+        """Identify one detected face; pass the frame's `ctx` to reuse its crops."""
+        ctx       = ctx or FrameContext(frame, self.cfg)
+        face_bgr  = ctx.face(detection)
+        face_gray = ctx.face(detection, gray=True)
 
         rtype = self.cfg.recognizer_type.lower()
         if rtype == "deep":
             name, conf = self._recognize_deep(face_bgr)
             method = "deep"
-        elif self._embeddings and self._lbph_model:
+        elif self._gallery and self._lbph_model:
             # Ensemble: average both
             n1, c1 = self._recognize_lbph(face_gray)
             n2, c2 = self._recognize_deep(face_bgr)
@@ -150,21 +170,31 @@ class FacialRecognizer:
 
         return RecognitionResult(name, conf, method=method)
 
-    # ── Temporal Smoothing ────────────────────────────────────────
-    def _smooth_result(self, face_id: int, result: RecognitionResult,
-                       window: int = 5) -> RecognitionResult:
-        if face_id not in self._smooth_buf:
-            self._smooth_buf[face_id] = deque(maxlen=window)
-        self._smooth_buf[face_id].append(result.name)
-        # Majority vote
-        names    = list(self._smooth_buf[face_id])
-        majority = max(set(names), key=names.count)
-        result.name = majority
-        return result
+    def recognize_batch(self, faces: List[Tuple[FrameContext, FaceDetection]]
+                        ) -> List[RecognitionResult]:
+        """
+        Recognize faces gathered from several frames (or cameras) at once.
+        Deep matching is one gallery product for the whole batch; the other
+        recognizers fall back to one `recognize_face` call per face.
+        """
+        if self.cfg.recognizer_type.lower() != "deep":
+            return [self.recognize_face(ctx.frame, d, ctx) for ctx, d in faces]
+        if not self._gallery or self._emb_extractor is None:
+            return [RecognitionResult("Unknown", 0.0, method="deep") for _ in faces]
+
+        embs  = [self._emb_extractor.extract(ctx.face(d)) for ctx, d in faces]
+        valid = [i for i, e in enumerate(embs) if e is not None]
+        out   = [RecognitionResult("Unknown", 0.0, method="deep") for _ in faces]
+        if valid:
+            matches = self._gallery.match_many(np.stack([embs[i] for i in valid]))
+            for i, match in zip(valid, matches):
+                out[i] = RecognitionResult(*self._deep_result(*match), method="deep")
+        return out
 
     # ── Overlay Drawing ───────────────────────────────────────────
-    def _draw_overlay(self, frame: np.ndarray, detection: FaceDetection,
-                      result: RecognitionResult) -> np.ndarray:
+    def draw_overlay(self, frame: np.ndarray, detection: FaceDetection,
+                     result: RecognitionResult) -> np.ndarray:
+        """Draw the box, name and confidence of `result` onto `frame`."""
         x, y, w, h = detection.bbox
         is_known   = result.is_known and not result.is_spoof
 
@@ -225,6 +255,33 @@ class FacialRecognizer:
                     0.45, (120,120,120), 1)
         return frame
 
+    # ── Per-frame Pipeline ────────────────────────────────────────
+    def _process_frame(self, frame: np.ndarray, source: str = "camera"
+                       ) -> List[Tuple[int, FaceDetection, RecognitionResult]]:
+        """Detect → track → recognize → smooth → liveness → log. No drawing."""
+        ctx        = FrameContext(frame, self.cfg)
+        detections = self.det.detect_tracked(frame, ctx)
+        track_ids  = self._tracker.update(detections)
+        self._smoother.prune(self._tracker.active_ids)
+
+        faces = []
+        for track_id, det in zip(track_ids, detections):
+            result = self.recognize_face(frame, det, ctx)
+            result = self._smoother.update(track_id, result)
+
+            # Anti-spoofing check (liveness state is per track)
+            if self.spoof:
+                face_roi = ctx.face(det)
+                result.is_spoof = not self.spoof.is_real(
+                    face_roi, frame, det, ctx, track_id=track_id)
+
+            if self.cfg.log_recognition_events and result.is_known:
+                if self.db.log_recognition(result.name, result.confidence,
+                                           source=source, spoof=result.is_spoof):
+                    self.log.info(f"Recognized: {result.name} ({result.confidence:.1f}%)")
+            faces.append((track_id, det, result))
+        return faces
+
     # ── Real-Time Loop ────────────────────────────────────────────
     def run_realtime(self, source: str, save: bool = False):
         src = int(source) if source.isdigit() else source
@@ -241,6 +298,7 @@ class FacialRecognizer:
                                      (self.cfg.window_width, self.cfg.window_height))
             print(f"   📹 Saving to {out_path}")
 
+        self.det.reset_tracking()
         print("\n   🎥 Recognition running. Press 'Q' to quit, 'S' for screenshot.\n")
         fps_timer  = time.time()
         fps        = 0.0
@@ -259,25 +317,10 @@ class FacialRecognizer:
                 fps_timer = time.time()
                 fps_count = 0
 
-            detections = self.det.detect(frame)
-
-            for i, det in enumerate(detections):
-                result = self._recognize_face(frame, det)
-                result = self._smooth_result(i, result)
-
-                # Anti-spoofing check
-                if self.spoof:
-                    face_roi = self.det.extract_face(frame, det)
-                    result.is_spoof = not self.spoof.is_real(face_roi, frame, det)
-
-                frame = self._draw_overlay(frame, det, result)
-
-                if self.cfg.log_recognition_events and result.is_known:
-                    self.db.log_recognition(result.name, result.confidence,
-                                            spoof=result.is_spoof)
-                    self.log.info(f"Recognized: {result.name} ({result.confidence:.1f}%)")
-
-            frame = self._draw_hud(frame, fps, len(detections), frame_num)
+            faces = self._process_frame(frame)
+            for track_id, det, result in faces:
+                frame = self.draw_overlay(frame, det, result)
+            frame = self._draw_hud(frame, fps, len(faces), frame_num)
 
             if writer:
                 writer.write(frame)
@@ -296,6 +339,100 @@ class FacialRecognizer:
         if writer:
             writer.release()
         cv2.destroyAllWindows()
+        self.db.flush_log()
+
+    # ── Headless Loop ─────────────────────────────────────────────
+    def run_headless(self, source: str, events: List[str],
+                     preview_port: Optional[int] = None,
+                     preview_host: str = "127.0.0.1"):
+        """
+        Recognition without any rendering: results go out as NDJSON events
+        (identity changes, periodic repeats, track ends, stats); frames are
+        only annotated when an MJPEG preview client is due a frame.
+        """
+        import signal
+        from core.events import EventPublisher, MJPEGPreview
+
+        src = int(source) if source.isdigit() else source
+        cap = cv2.VideoCapture(src)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH,  self.cfg.window_width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.cfg.window_height)
+
+        pub     = EventPublisher(events, self.cfg.event_queue_size)
+        preview = MJPEGPreview(preview_port, self.cfg.preview_fps,
+                               self.cfg.preview_width, preview_host) if preview_port else None
+        stop    = []
+        signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+
+        print(f"\n   🛰️  Headless recognition → {', '.join(events)}")
+        if preview:
+            print(f"   📺 Preview at http://{preview_host}:{preview_port}/")
+        self.det.reset_tracking()
+        src_name  = str(source)
+        announced : Dict[int, Tuple] = {}       # track → (name, spoof, time sent)
+        frame_num = 0
+        fps_timer = time.time()
+        fps_count = 0
+
+        try:
+            while not stop:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frame_num += 1
+                fps_count += 1
+                now   = time.time()
+                faces = self._process_frame(frame, source=src_name)
+
+                for track_id, det, result in faces:
+                    key  = (result.name, result.is_spoof)
+                    prev = announced.get(track_id)
+                    if prev and prev[:2] == key and now - prev[2] < self.cfg.event_repeat_seconds:
+                        continue
+                    announced[track_id] = (*key, now)
+                    pub.publish({
+                        "type":       "recognition",
+                        "ts":         datetime.fromtimestamp(now).isoformat(timespec="milliseconds"),
+                        "source":     src_name,
+                        "frame":      frame_num,
+                        "track_id":   track_id,
+                        "name":       result.name,
+                        "confidence": round(result.confidence, 2),
+                        "spoof":      result.is_spoof,
+                        "method":     result.method,
+                        "bbox":       [int(v) for v in det.bbox],
+                    })
+
+                active = set(self._tracker.active_ids)
+                for track_id in [t for t in announced if t not in active]:
+                    name = announced.pop(track_id)[0]
+                    pub.publish({"type": "track_end", "ts": datetime.now().isoformat(timespec="milliseconds"),
+                                 "source": src_name, "track_id": track_id, "name": name})
+
+                if now - fps_timer >= self.cfg.event_stats_seconds:
+                    pub.publish({"type": "stats", "ts": datetime.now().isoformat(timespec="seconds"),
+                                 "source": src_name, "frame": frame_num,
+                                 "fps": round(fps_count / (now - fps_timer), 2),
+                                 "tracks": len(active), "dropped_events": pub.dropped})
+                    fps_timer, fps_count = now, 0
+
+                if preview and preview.due():
+                    view = frame.copy()
+                    for _, det, result in faces:
+                        view = self.draw_overlay(view, det, result)
+                    preview.update(view)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            cap.release()
+            for track_id, (name, *_) in announced.items():
+                pub.publish({"type": "track_end", "ts": datetime.now().isoformat(timespec="milliseconds"),
+                             "source": src_name, "track_id": track_id, "name": name})
+            pub.close()
+            if preview:
+                preview.close()
+            self.db.flush_log()
+        print(f"   ✅ Processed {frame_num} frames")
 
     # ── File Analysis ─────────────────────────────────────────────
     def analyze_file(self, input_path: str, output_path: Optional[str],
@@ -310,12 +447,13 @@ class FacialRecognizer:
 
     def _analyze_image(self, path: str, out: Optional[str]):
         frame      = cv2.imread(path)
-        detections = self.det.detect(frame)
+        ctx        = FrameContext(frame, self.cfg)
+        detections = self.det.detect(frame, ctx)
         results    = []
 
         for det in detections:
-            result = self._recognize_face(frame, det)
-            frame  = self._draw_overlay(frame, det, result)
+            result = self.recognize_face(frame, det, ctx)
+            frame  = self.draw_overlay(frame, det, result)
             results.append(result)
             print(f"   👤 {result.name:<20} conf={result.confidence:.1f}%  method={result.method}")
 
@@ -342,9 +480,10 @@ class FacialRecognizer:
             i += 1
             if i % 50 == 0:
                 print(f"   Processing frame {i}/{frame_count}...")
-            for det in self.det.detect(frame):
-                result = self._recognize_face(frame, det)
-                frame  = self._draw_overlay(frame, det, result)
+            ctx = FrameContext(frame, self.cfg)
+            for det in self.det.detect(frame, ctx):
+                result = self.recognize_face(frame, det, ctx)
+                frame  = self.draw_overlay(frame, det, result)
             writer.write(frame)
         cap.release()
         writer.release()
@@ -0,0 +1,87 @@
+"""
+core/tracker.py
+Lightweight IoU tracker — gives each face a stable id across frames so
+per-face state (smoothing, liveness) follows the person, not the
+detection order.
+"""
+
+from collections import deque
+from typing import Dict, List, Tuple
+from config        import Config
+from core.detector import FaceDetection
+
+
+def iou(a: Tuple, b: Tuple) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    def __init__(self, cfg: Config):
+        self.cfg      = cfg
+        self._tracks  : Dict[int, Tuple] = {}    # id → last bbox
+        self._missed  : Dict[int, int]   = {}    # id → frames unseen
+        self._next_id = 0
+
+    def update(self, detections: List[FaceDetection]) -> List[int]:
+        """Match detections to existing tracks; returns one id per detection."""
+        pairs = sorted(
+            ((iou(d.bbox, box), i, tid)
+             for i, d in enumerate(detections)
+             for tid, box in self._tracks.items()),
+            reverse=True,
+        )
+        ids       = [None] * len(detections)
+        used      = set()
+        for score, i, tid in pairs:
+            if score < self.cfg.track_iou_threshold:
+                break
+            if ids[i] is None and tid not in used:
+                ids[i] = tid
+                used.add(tid)
+
+        for i, d in enumerate(detections):
+            if ids[i] is None:
+                ids[i] = self._next_id
+                self._next_id += 1
+            self._tracks[ids[i]] = d.bbox
+            self._missed[ids[i]] = 0
+
+        for tid in list(self._tracks):
+            if tid in ids:
+                continue
+            self._missed[tid] += 1
+            if self._missed[tid] > self.cfg.track_max_missed:
+                del self._tracks[tid], self._missed[tid]
+        return ids
+
+    @property
+    def active_ids(self) -> List[int]:
+        return list(self._tracks)
+
+
+class NameSmoother:
+    """Majority vote over each track's last `window` recognized names."""
+
+    def __init__(self, window: int = 5):
+        self.window = window
+        self._names : Dict[int, deque] = {}      # id → recent names
+
+    def update(self, track_id: int, result):
+        """Replace `result.name` with the track's majority name; returns `result`."""
+        buf = self._names.setdefault(track_id, deque(maxlen=self.window))
+        buf.append(result.name)
+        names       = list(buf)
+        result.name = max(set(names), key=names.count)
+        return result
+
+    def prune(self, active_ids: List[int]):
+        """Drop the names of tracks the tracker has expired."""
+        active = set(active_ids)
+        for tid in [k for k in self._names if k not in active]:
+            del self._names[tid]
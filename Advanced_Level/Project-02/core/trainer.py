@@ -6,23 +6,26 @@ Supports LBPH, Eigenfaces, Fisherfaces, and deep embedding training.
 
 import cv2
 import os
+import shutil
 import numpy as np
-import pickle
-from typing import List
+from typing import List, Optional
 from config  import Config
-from core.detector  import FaceDetector
-from core.database  import FaceDatabase
-from core.logger    import SystemLogger
-from core.embedding import EmbeddingExtractor
+from core.detector   import FaceDetector
+from core.database   import FaceDatabase
+from core.logger     import SystemLogger
+from core.enrollment import ParallelEnroller
+from core.gallery    import EmbeddingGallery
 
 
 class FaceTrainer:
     def __init__(self, cfg: Config, db: FaceDatabase,
-                 det: FaceDetector, log: SystemLogger):
-        self.cfg = cfg
-        self.db  = db
-        self.det = det
-        self.log = log
+                 det: FaceDetector, log: SystemLogger,
+                 workers: Optional[int] = None):
+        self.cfg      = cfg
+        self.db       = db
+        self.det      = det
+        self.log      = log
+        self.enroller = ParallelEnroller(cfg, log, workers)
 
     # ── Registration ──────────────────────────────────────────────
     def register(self, name: str, source: str, n_samples: int):
@@ -39,7 +42,7 @@ class FaceTrainer:
         self.db.increment_sample_count(name, count)
         self.log.info(f"Registered {count} samples for '{name}' (label={label})")
         print(f"\n   ✅ Registered {count} samples for '{name}'")
-        print(f"   ℹ️  Run: python main.py train")
+        print(f"   ℹ️  Run: python main.py train --person '{name}'")
 
     def _register_from_camera(self, name, label, cam_idx,
                                n_samples, save_dir) -> int:
@@ -85,28 +88,18 @@ class FaceTrainer:
         return count
 
     def _register_from_folder(self, name, label, folder, save_dir) -> int:
-        exts  = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
-        files = [f for f in os.listdir(folder)
-                 if f.lower().endswith(exts)]
-        count = 0
-        for fname in files:
-            img = cv2.imread(os.path.join(folder, fname))
-            if img is None:
-                continue
-            face = self.det.detect_largest(img)
-            if face:
-                roi = self.det.extract_face(img, face)
-                gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-                path = os.path.join(save_dir, f"{label}_{count:04d}.jpg")
-                cv2.imwrite(path, gray_roi)
-                count += 1
-        return count
+        return self.enroller.enroll_folder(label, folder, save_dir)
 
     # ── Training ──────────────────────────────────────────────────
-    def train(self):
+    def train(self, resume: bool = True):
         """Train the selected recognizer on all registered faces."""
+        rtype = self.cfg.recognizer_type.lower()
+        if rtype == "deep":
+            self._train_deep_embeddings(resume)
+            return
+
         print("\n   🔄 Loading dataset...")
-        faces, labels = self._load_dataset()
+        faces, labels = self._load_dataset(resume)
 
         if len(faces) == 0:
             print("   ❌ No face data found. Register faces first.")
@@ -115,16 +108,12 @@ class FaceTrainer:
         persons = self.db.list_persons()
         print(f"   ✅ {len(faces)} samples | {len(persons)} persons")
 
-        rtype = self.cfg.recognizer_type.lower()
-
         if rtype == "lbph":
             self._train_lbph(faces, labels)
         elif rtype == "eigenfaces":
             self._train_eigenfaces(faces, labels)
         elif rtype == "fisherfaces":
             self._train_fisherfaces(faces, labels)
-        elif rtype == "deep":
-            self._train_deep_embeddings()
         else:
             self._train_lbph(faces, labels)
 
@@ -132,30 +121,16 @@ class FaceTrainer:
         self.log.info(f"Model trained: {rtype} | {len(faces)} samples | {len(persons)} persons")
         print(f"   ✅ Training complete → {self.cfg.model_dir}/")
 
-    def _load_dataset(self):
-        faces, labels = [], []
-        dataset_dir   = self.cfg.dataset_dir
-
-        for person_name in os.listdir(dataset_dir):
-            person_dir = os.path.join(dataset_dir, person_name)
-            if not os.path.isdir(person_dir):
-                continue
-            person = self.db.get_person_by_name(person_name)
-            if not person:
-                continue
-            label = person['label']
-
-            for fname in os.listdir(person_dir):
-                if not fname.lower().endswith(('.jpg', '.png')):
-                    continue
-                img = cv2.imread(os.path.join(person_dir, fname),
-                                 cv2.IMREAD_GRAYSCALE)
-                if img is None:
-                    continue
-                img = cv2.resize(img, self.cfg.face_size)
-                faces.append(img)
-                labels.append(label)
+    def _person_labels(self) -> dict:
+        return self.db.identities.name_to_label()
 
+    def _load_dataset(self, resume: bool = True):
+        faces, labels = [], []
+        persons       = self._person_labels()
+        by_person     = self.enroller.load_dataset(persons, "faces", resume)
+        for name, imgs in by_person.items():
+            faces.extend(imgs)
+            labels.extend([persons[name]] * len(imgs))
         return faces, labels
 
     def _train_lbph(self, faces: List[np.ndarray], labels: List[int]):
@@ -181,31 +156,138 @@ class FaceTrainer:
         recognizer.save(os.path.join(self.cfg.model_dir, "fisherfaces.yml"))
         print("   ✅ Fisherfaces model saved")
 
-    def _train_deep_embeddings(self):
+    def _train_deep_embeddings(self, resume: bool = True):
         """Extract and store FaceNet embeddings for all registered persons."""
-        print("   🔄 Extracting deep embeddings...")
-        extractor  = EmbeddingExtractor(self.cfg)
-        dataset_dir = self.cfg.dataset_dir
-        all_embs   = {}
-
-        for person_name in os.listdir(dataset_dir):
-            person_dir = os.path.join(dataset_dir, person_name)
-            if not os.path.isdir(person_dir):
-                continue
-            embs = []
-            for fname in os.listdir(person_dir):
-                if not fname.lower().endswith(('.jpg', '.png')):
-                    continue
-                img = cv2.imread(os.path.join(person_dir, fname))
-                if img is None:
-                    continue
-                emb = extractor.extract(img)
-                if emb is not None:
-                    embs.append(emb)
-            if embs:
-                all_embs[person_name] = embs
-                print(f"      {person_name}: {len(embs)} embeddings")
-
-        with open(self.cfg.embeddings_path, 'wb') as f:
-            pickle.dump(all_embs, f)
-        print(f"   ✅ Embeddings saved → {self.cfg.embeddings_path}")
\ No newline at end of file
+        print("\n   🔄 Extracting deep embeddings...")
+        all_embs = self.enroller.load_dataset(self._person_labels(),
+                                              "embeddings", resume)
+        if not all_embs:
+            print("   ❌ No face data found. Register faces first.")
+            return
+
+        self.db.replace_all_embeddings(all_embs)
+        gallery = EmbeddingGallery.from_embeddings(all_embs)
+        gallery.save(self.cfg)
+        self.db.save_label_map()
+        self.log.info(f"Model trained: deep | {len(gallery)} samples | {len(all_embs)} persons")
+        print(f"   ✅ Embeddings saved → {self.cfg.gallery_path}")
+
+    # ── Incremental Training ──────────────────────────────────────
+    def add_person(self, name: str, resume: bool = True):
+        """Enroll one person into the existing model without a full retrain."""
+        person = self.db.get_person_by_name(name)
+        if not person:
+            print(f"   ❌ '{name}' is not registered. Run: python main.py register --name '{name}'")
+            return
+        label = person['label']
+        rtype = self.cfg.recognizer_type.lower()
+
+        if rtype == "deep":
+            gallery = EmbeddingGallery.load(self.cfg, mmap=False)
+            if gallery is None:
+                self._train_deep_embeddings(resume)
+                return
+            print(f"\n   🔄 Extracting embeddings for '{name}'...")
+            embs = self.enroller.load_dataset({name: label}, "embeddings", resume)
+            if name not in embs:
+                print(f"   ❌ No face data found for '{name}'.")
+                return
+            self.db.save_embeddings(name, embs[name], replace=True)
+            gallery.add(name, embs[name]).save(self.cfg)
+            n_samples = len(embs[name])
+
+        elif rtype in ("eigenfaces", "fisherfaces"):
+            # Eigen/Fisher projections depend on every sample — no update()
+            print(f"   ⚠️  {rtype} cannot be updated incrementally; retraining all persons.")
+            self.train(resume)
+            return
+
+        else:
+            if not os.path.exists(self.cfg.lbph_model_path):
+                self.train(resume)
+                return
+            print(f"\n   🔄 Loading samples for '{name}'...")
+            faces = self.enroller.load_dataset({name: label}, "faces", resume)
+            if name not in faces:
+                print(f"   ❌ No face data found for '{name}'.")
+                return
+            recognizer = self._lbph_without(label)
+            if recognizer is None:
+                self._train_lbph(faces[name], [label] * len(faces[name]))
+            else:
+                recognizer.update(faces[name], np.array([label] * len(faces[name])))
+                recognizer.save(self.cfg.lbph_model_path)
+            n_samples = len(faces[name])
+
+        self.db.save_label_map()
+        self.log.info(f"Incremental enroll: {name} | {rtype} | {n_samples} samples")
+        print(f"   ✅ '{name}' added to {rtype} model ({n_samples} samples)")
+
+    def delete_person(self, name: str, keep_images: bool = False):
+        """Remove one person's samples from every model, DB and dataset."""
+        person = self.db.get_person_by_name(name)
+        if not person:
+            print(f"   ❌ '{name}' is not registered.")
+            return
+        label = person['label']
+
+        gallery = EmbeddingGallery.load(self.cfg, mmap=False)
+        if gallery is not None and name in gallery.names:
+            gallery.remove(name).save(self.cfg)
+
+        if os.path.exists(self.cfg.lbph_model_path):
+            self._lbph_without(label)
+
+        for fname in ("eigenfaces.yml", "fisherfaces.yml"):
+            if os.path.exists(os.path.join(self.cfg.model_dir, fname)):
+                print(f"   ⚠️  {fname} still contains '{name}' — run: python main.py train")
+
+        self.db.delete_person(name)
+        self.enroller.drop_checkpoints(label)
+        if not keep_images:
+            shutil.rmtree(os.path.join(self.cfg.dataset_dir, name), ignore_errors=True)
+        self.db.save_label_map()
+        self.log.info(f"Deleted person: {name} (label={label})")
+        print(f"   ✅ '{name}' removed")
+
+    def _lbph_without(self, label: int):
+        """
+        Load the LBPH model minus every histogram belonging to `label`.
+        Returns None (and removes the model file) if nothing is left.
+        """
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(self.cfg.lbph_model_path)
+        labels = recognizer.getLabels().ravel()
+        if label not in labels:
+            return recognizer
+
+        # LBPH has no per-label removal API, so rebuild the model file
+        # from the surviving histograms and read it back.
+        keep = labels != label
+        if not keep.any():
+            os.remove(self.cfg.lbph_model_path)
+            return None
+        hists = [h for h, k in zip(recognizer.getHistograms(), keep) if k]
+        self._write_lbph(recognizer, hists, labels[keep])
+        pruned = cv2.face.LBPHFaceRecognizer_create()
+        pruned.read(self.cfg.lbph_model_path)
+        return pruned
+
+    def _write_lbph(self, recognizer, hists, labels):
+        """Serialise LBPH state in OpenCV's own `opencv_lbphfaces` layout."""
+        fs = cv2.FileStorage(self.cfg.lbph_model_path, cv2.FILE_STORAGE_WRITE)
+        fs.startWriteStruct("opencv_lbphfaces", cv2.FileNode_MAP)
+        fs.write("threshold", recognizer.getThreshold())
+        fs.write("radius",    recognizer.getRadius())
+        fs.write("neighbors", recognizer.getNeighbors())
+        fs.write("grid_x",    recognizer.getGridX())
+        fs.write("grid_y",    recognizer.getGridY())
+        fs.startWriteStruct("histograms", cv2.FileNode_SEQ)
+        for h in hists:
+            fs.write("", h)
+        fs.endWriteStruct()
+        fs.write("labels", np.asarray(labels, dtype=np.int32).reshape(-1, 1))
+        fs.startWriteStruct("labelsInfo", cv2.FileNode_SEQ)
+        fs.endWriteStruct()
+        fs.endWriteStruct()
+        fs.release()
@@ -8,8 +8,10 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
+from matplotlib.patches import FancyBboxPatch
 import numpy as np
 from datetime import datetime
+from typing   import Optional
 from config   import Config
 from core.database import FaceDatabase
 
@@ -27,12 +29,15 @@ class Visualizer:
         self.cfg = cfg
         plt.style.use('dark_background')
 
-    def show_stats(self, db: FaceDatabase):
-        stats   = db.get_recognition_stats()
+    def show_stats(self, db: FaceDatabase, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None):
+        stats   = db.get_recognition_stats(since, until)
         persons = db.list_persons()
 
         print(f"\n{'='*55}")
         print(f"  📊 System Statistics")
+        if since or until:
+            print(f"  Range : {since or '…'} → {until or 'now'}")
         print(f"{'='*55}")
         print(f"  Registered Persons   : {stats['registered_persons']}")
         print(f"  Total Recognitions   : {stats['total_recognitions']}")
@@ -54,8 +59,9 @@ class Visualizer:
             self._plot_stats(stats)
 
     def _plot_stats(self, stats: dict):
-        fig = plt.figure(figsize=(16, 10), facecolor=DARK)
-        gs  = gridspec.GridSpec(2, 2, figure=fig, hspace=0.35, wspace=0.3)
+        fig = plt.figure(figsize=(16, 14), facecolor=DARK)
+        gs  = gridspec.GridSpec(3, 2, figure=fig, hspace=0.45, wspace=0.3,
+                                height_ratios=[1, 0.8, 1])
 
         # ── 1. Known vs Unknown Pie ────────────────────────────────
         ax1 = fig.add_subplot(gs[0, 0])
@@ -91,8 +97,27 @@ class Visualizer:
                       fontsize=12, fontweight='bold')
         ax2.set_xlabel('Recognition Count', color=TEXT)
 
-        # ── 3. KPI Cards ──────────────────────────────────────────
-        ax3 = fig.add_subplot(gs[1, :])
+        # ── 3. Activity Timeline (from rollups) ────────────────────
+        ax4 = fig.add_subplot(gs[1, :])
+        ax4.set_facecolor(DARK)
+        ax4.spines[:].set_color(GRID)
+        ax4.tick_params(colors=TEXT)
+        if stats['timeline']:
+            buckets = [t['bucket'] for t in stats['timeline']]
+            x       = np.arange(len(buckets))
+            ax4.bar(x, [t['count'] for t in stats['timeline']],
+                    color=GREEN, alpha=0.85, label='Recognitions')
+            ax4.bar(x, [t['spoofs'] for t in stats['timeline']],
+                    color=RED, alpha=0.9, label='Spoofs')
+            step = max(1, len(buckets) // 12)
+            ax4.set_xticks(x[::step])
+            ax4.set_xticklabels(buckets[::step], rotation=30, ha='right', fontsize=8)
+            ax4.legend(facecolor=GRID, edgecolor=GRID, labelcolor=TEXT)
+        ax4.set_title(f"Activity per {stats['granularity']}", color=TEXT,
+                      fontsize=12, fontweight='bold')
+
+        # ── 4. KPI Cards ──────────────────────────────────────────
+        ax3 = fig.add_subplot(gs[2, :])
         ax3.set_facecolor(DARK)
         ax3.axis('off')
         kpis = [
@@ -104,7 +129,7 @@ class Visualizer:
         ]
         for i, (label, value, color) in enumerate(kpis):
             x  = 0.05 + i * 0.19
-            ax3.add_patch(plt.FancyBboxPatch(
+            ax3.add_patch(FancyBboxPatch(
                 (x, 0.1), 0.16, 0.8,
                 boxstyle="round,pad=0.02",
                 facecolor=GRID, edgecolor=color, linewidth=2,
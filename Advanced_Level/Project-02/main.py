@@ -6,8 +6,10 @@
 ╚══════════════════════════════════════════════════════════════════╝
 """
 
+import os
 import argparse
 import warnings
+from datetime import datetime, time
 warnings.filterwarnings('ignore')
 
 from core.recognizer   import FacialRecognizer
@@ -17,9 +19,20 @@ from core.anti_spoof   import AntiSpoofing
 from core.database     import FaceDatabase
 from core.visualizer   import Visualizer
 from core.logger       import SystemLogger
+from core.batch        import BatchVideoAnalyzer
+from core.multicam     import MultiCameraServer, parse_sources
+from core.benchmark    import FaceBenchmark, BACKENDS, RECOGNIZERS
 from config            import Config
 
 
+def parse_until(value: str) -> datetime:
+    """--until value; a bare date means the end of that day, not its first hour."""
+    until = datetime.fromisoformat(value)
+    if "T" not in value and " " not in value:
+        until = datetime.combine(until.date(), time.max)
+    return until
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Advanced Facial Recognition System")
     sub    = parser.add_subparsers(dest="command")
@@ -29,23 +42,68 @@ def parse_args():
     reg.add_argument("--name",   required=True,  help="Person's name")
     reg.add_argument("--source", default="0",    help="Camera index or image folder path")
     reg.add_argument("--samples",type=int, default=30, help="Number of face samples to capture")
+    reg.add_argument("--workers",type=int, default=None, help="Parallel workers for folder enrollment")
 
     # train
-    sub.add_parser("train", help="Train recognizer on registered faces")
+    trn = sub.add_parser("train", help="Train recognizer on registered faces")
+    trn.add_argument("--workers", type=int, default=None, help="Parallel dataset workers")
+    trn.add_argument("--fresh",   action="store_true", help="Ignore per-person checkpoints")
+    trn.add_argument("--person",  default=None, help="Incrementally add one registered person")
+
+    # delete
+    dlt = sub.add_parser("delete", help="Remove a person from models and database")
+    dlt.add_argument("--name",        required=True, help="Person's name")
+    dlt.add_argument("--keep-images", action="store_true", help="Keep dataset images on disk")
 
     # recognize
     rec = sub.add_parser("recognize", help="Real-time recognition")
     rec.add_argument("--source",  default="0",    help="Camera index or video file")
     rec.add_argument("--spoof",   action="store_true", help="Enable anti-spoofing")
     rec.add_argument("--save",    action="store_true", help="Save output video")
+    rec.add_argument("--headless",action="store_true", help="No display; publish NDJSON events")
+    rec.add_argument("--events",  nargs="+", default=None,
+                     help="Event sinks: file path, unix:/path.sock or tcp:host:port")
+    rec.add_argument("--preview", type=int, default=None, help="MJPEG preview port (headless)")
+    rec.add_argument("--preview-host", default="127.0.0.1",
+                     help="Preview bind address; 0.0.0.0 exposes the unauthenticated feed to the network")
+
+    # multicam
+    mc  = sub.add_parser("multicam", help="Recognize on several cameras with one shared model")
+    mc.add_argument("--sources", nargs="+", required=True,
+                    help="Camera sources: index, file or URL, optionally name=source")
+    mc.add_argument("--workers", type=int, default=None, help="Detection / recognition workers")
+    mc.add_argument("--spoof",   action="store_true", help="Enable anti-spoofing")
+    mc.add_argument("--save",    action="store_true", help="Save one output video per camera")
+    mc.add_argument("--show",    action="store_true", help="Show all cameras in a mosaic window")
 
     # analyze
     ana = sub.add_parser("analyze", help="Analyze an image or video file")
     ana.add_argument("--input",   required=True,  help="Path to image or video")
     ana.add_argument("--output",  default=None,   help="Output path")
+    ana.add_argument("--batch",   action="store_true", help="Parallel timeline analysis for long videos")
+    ana.add_argument("--stride",  type=int, default=1, help="Analyse every Nth frame (batch mode)")
+    ana.add_argument("--workers", type=int, default=None, help="Worker processes (batch mode)")
+    ana.add_argument("--timeline",default=None,   help="Timeline output (.json or .csv, batch mode)")
+    ana.add_argument("--annotate",action="store_true", help="Also write annotated video (batch mode)")
+
+    # bench
+    bn  = sub.add_parser("bench", help="Headless throughput / accuracy benchmark")
+    bn.add_argument("--identities",  type=int, default=20,  help="Synthetic gallery size")
+    bn.add_argument("--samples",     type=int, default=15,  help="Samples per identity")
+    bn.add_argument("--frames",      type=int, default=200, help="Generated clip length")
+    bn.add_argument("--faces",       type=int, default=3,   help="Faces per generated frame")
+    bn.add_argument("--video",       default=None, help="Replay a recorded clip instead")
+    bn.add_argument("--backends",    nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    bn.add_argument("--recognizers", nargs="+", default=list(RECOGNIZERS), choices=RECOGNIZERS)
+    bn.add_argument("--workers",     type=int, default=None, help="Training worker processes")
+    bn.add_argument("--output",      default=None, help="JSON report path")
 
     # stats
-    sub.add_parser("stats", help="Show database & recognition statistics")
+    sts = sub.add_parser("stats", help="Show database & recognition statistics")
+    sts.add_argument("--since", type=datetime.fromisoformat, default=None,
+                     help="Start of range, e.g. 2024-05-01 or 2024-05-01T08:00")
+    sts.add_argument("--until", type=parse_until, default=None,
+                     help="End of range (inclusive, hour resolution); a date covers the whole day")
 
     return parser.parse_args()
 
@@ -63,21 +121,49 @@ def main():
     if args.command == "register":
         db      = FaceDatabase(cfg)
         det     = FaceDetector(cfg)
-        trainer = FaceTrainer(cfg, db, det, log)
+        trainer = FaceTrainer(cfg, db, det, log, workers=args.workers)
         trainer.register(args.name, args.source, args.samples)
 
     elif args.command == "train":
+        db      = FaceDatabase(cfg)
+        det     = FaceDetector(cfg)
+        trainer = FaceTrainer(cfg, db, det, log, workers=args.workers)
+        if args.person:
+            trainer.add_person(args.person, resume=not args.fresh)
+        else:
+            trainer.train(resume=not args.fresh)
+
+    elif args.command == "delete":
         db      = FaceDatabase(cfg)
         det     = FaceDetector(cfg)
         trainer = FaceTrainer(cfg, db, det, log)
-        trainer.train()
+        trainer.delete_person(args.name, keep_images=args.keep_images)
 
     elif args.command == "recognize":
         db      = FaceDatabase(cfg)
         det     = FaceDetector(cfg)
         spoof   = AntiSpoofing(cfg) if args.spoof else None
         rec     = FacialRecognizer(cfg, db, det, spoof, log)
-        rec.run_realtime(args.source, save=args.save)
+        if args.headless:
+            events = args.events or [os.path.join(cfg.output_dir, "events.ndjson")]
+            rec.run_headless(args.source, events, preview_port=args.preview,
+                             preview_host=args.preview_host)
+        else:
+            rec.run_realtime(args.source, save=args.save)
+
+    elif args.command == "multicam":
+        db      = FaceDatabase(cfg)
+        server  = MultiCameraServer(cfg, db, log, parse_sources(args.sources),
+                                    spoof=args.spoof, workers=args.workers)
+        server.run(save=args.save, show=args.show)
+
+    elif args.command == "analyze" and args.batch:
+        batch   = BatchVideoAnalyzer(cfg, log, workers=args.workers, stride=args.stride)
+        annotate = None
+        if args.annotate:
+            annotate = args.output or os.path.join(
+                cfg.output_dir, "analyzed_" + os.path.basename(args.input))
+        batch.analyze(args.input, args.timeline, annotate)
 
     elif args.command == "analyze":
         db      = FaceDatabase(cfg)
@@ -86,18 +172,30 @@ def main():
         viz     = Visualizer(cfg)
         rec.analyze_file(args.input, args.output, viz)
 
+    elif args.command == "bench":
+        bench   = FaceBenchmark(cfg, log, identities=args.identities, samples=args.samples,
+                                frames=args.frames, faces=args.faces,
+                                video=args.video, workers=args.workers)
+        bench.run(args.backends, args.recognizers, args.output)
+
     elif args.command == "stats":
         db  = FaceDatabase(cfg)
         viz = Visualizer(cfg)
-        viz.show_stats(db)
+        viz.show_stats(db, since=args.since, until=args.until)
 
     else:
         print("  Usage examples:")
         print("    python main.py register --name 'John Doe' --samples 40")
-        print("    python main.py train")
+        print("    python main.py train --workers 8")
+        print("    python main.py train --person 'John Doe'")
+        print("    python main.py delete --name 'John Doe'")
         print("    python main.py recognize --source 0 --spoof")
+        print("    python main.py recognize --source rtsp://cam --headless --events unix:/tmp/frs.sock --preview 8080")
+        print("    python main.py multicam --sources lobby=rtsp://10.0.0.5/stream door=0")
         print("    python main.py analyze --input photo.jpg")
-        print("    python main.py stats\n")
+        print("    python main.py analyze --input cctv.mp4 --batch --stride 5 --timeline out.csv")
+        print("    python main.py bench --identities 50 --output bench.json")
+        print("    python main.py stats --since 2024-05-01\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,37 @@
+"""ROI search maps detections found in the crop back to frame coordinates."""
+import dataclasses
+
+import numpy as np
+
+from config import Config
+from core.detector import FaceDetection, FaceDetector
+
+FRAME = (480, 640)
+
+
+class StubBackend:
+    """One face at (200, 150) in frame coordinates, wherever it is asked to look."""
+
+    def detect(self, frame, ctx=None, scale=1.0):
+        if frame.shape[:2] == FRAME:
+            return [FaceDetection(200, 150, 60, 60,
+                                  landmarks={"left_eye": (215, 170), "right_eye": (245, 170)})]
+        # The ROI around that box starts at (170, 120)
+        return [FaceDetection(30, 30, 60, 60,
+                              landmarks={"left_eye": (45, 50), "right_eye": (75, 50),
+                                         "eyes_count": 2})]
+
+
+def test_roi_search_moves_landmarks_into_frame_coordinates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Config paths are relative
+    cfg = dataclasses.replace(Config(), detect_roi_search=True, detect_roi_margin=0.5)
+    det = FaceDetector(cfg, verbose=False)
+    det._backend = StubBackend()
+    frame = np.zeros((*FRAME, 3), dtype=np.uint8)
+
+    full = det.detect_tracked(frame)          # full frame, seeds the ROI
+    roi = det.detect_tracked(frame)           # searched inside the ROI
+
+    assert roi[0].bbox == full[0].bbox == (200, 150, 60, 60)
+    assert roi[0].landmarks == {"left_eye": (215, 170), "right_eye": (245, 170),
+                                "eyes_count": 2}
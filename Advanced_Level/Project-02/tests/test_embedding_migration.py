@@ -0,0 +1,29 @@
+"""Deep-trained installs from before the gallery keep their embeddings."""
+import pickle
+
+import numpy as np
+
+from config import Config
+from core.database import FaceDatabase
+from core.detector import FaceDetector
+from core.logger import SystemLogger
+from core.recognizer import FacialRecognizer
+
+
+def test_pickled_embeddings_are_migrated_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Config paths are relative
+    cfg = Config(recognizer_type="deep", log_to_file=False)
+    db = FaceDatabase(cfg)
+    db.add_person("alice")
+    rng = np.random.default_rng(0)
+    legacy = {"alice": [rng.random(128), rng.random(128)], "ghost": [rng.random(128)]}
+    with open(cfg.embeddings_path, "wb") as f:
+        pickle.dump(legacy, f)
+
+    rec = FacialRecognizer(cfg, db, FaceDetector(cfg, verbose=False), None, SystemLogger(cfg))
+
+    stored = db.load_all_embeddings()
+    assert list(stored) == ["alice"]
+    np.testing.assert_allclose(stored["alice"], np.stack(legacy["alice"]), rtol=1e-6)
+    assert rec._gallery is not None and len(rec._gallery) == 2
+    db.close()
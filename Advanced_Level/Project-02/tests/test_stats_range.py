@@ -0,0 +1,36 @@
+"""Range bounds of `stats --since/--until` over the hourly rollups."""
+from datetime import datetime
+
+import pytest
+
+from config import Config
+from core.database import FaceDatabase
+from main import parse_until
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Config paths are relative
+    db = FaceDatabase(Config())
+    # One event per hour of 2024-05-01, plus the first hour of the next day
+    rows = [("alice", 50.0, f"2024-05-01T{h:02d}:30:00", "camera", 0) for h in range(24)]
+    rows.append(("alice", 50.0, "2024-05-02T00:30:00", "camera", 0))
+    db._insert_recognitions(rows)
+    yield db
+    db.close()
+
+
+def test_date_only_until_covers_the_whole_day(db):
+    stats = db.get_recognition_stats(since=datetime(2024, 5, 1), until=parse_until("2024-05-01"))
+    assert stats["total_recognitions"] == 24
+    assert stats["timeline"][-1]["bucket"] == "2024-05-01T23"
+
+
+def test_until_with_a_time_is_inclusive_to_the_hour(db):
+    stats = db.get_recognition_stats(until=parse_until("2024-05-01T08:00"))
+    assert stats["total_recognitions"] == 9
+
+
+def test_parse_until():
+    assert parse_until("2024-05-01") == datetime(2024, 5, 1, 23, 59, 59, 999999)
+    assert parse_until("2024-05-01T08:15") == datetime(2024, 5, 1, 8, 15)
@@ -0,0 +1,163 @@
+"""
+tools/bench_frame_context.py
+Frame-time benchmark for the shared per-frame context.
+
+Both runs drive the real FaceDetector, FacialRecognizer (LBPH, trained on
+synthetic faces in a scratch data dir) and AntiSpoofing objects.  "before"
+calls them without a FrameContext, so every stage converts the frame or
+crop on its own; "after" shares one FrameContext per frame.  Cascades are
+cached in both runs, so the difference is the shared conversions alone.
+
+Usage:
+    python tools/bench_frame_context.py                 # synthetic 1280x720
+    python tools/bench_frame_context.py --video clip.mp4 --frames 300
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import dataclasses
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config          import Config
+from core.anti_spoof import AntiSpoofing
+from core.database   import FaceDatabase
+from core.detector   import FaceDetector, FaceDetection
+from core.frame      import FrameContext
+from core.logger     import SystemLogger
+from core.recognizer import FacialRecognizer
+
+
+def load_frames(video, n, size):
+    if video:
+        cap, frames = cv2.VideoCapture(video), []
+        while len(frames) < n:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+    rng = np.random.default_rng(0)
+    w, h = size
+    return [cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (7, 7), 0)
+            for _ in range(n)]
+
+
+def fixed_faces(frame, k):
+    """K evenly spaced face boxes so per-face stages always run."""
+    h, w = frame.shape[:2]
+    side = h // 4
+    return [FaceDetection(int((i + 0.5) * w / k - side / 2), h // 3, side, side)
+            for i in range(k)]
+
+
+def scratch_config(tmp):
+    """Config rooted in `tmp`; liveness can never pass, so it runs every frame."""
+    return dataclasses.replace(
+        Config(),
+        data_dir    = os.path.join(tmp, "data"),
+        dataset_dir = os.path.join(tmp, "data", "dataset"),
+        model_dir   = os.path.join(tmp, "data", "models"),
+        log_dir     = os.path.join(tmp, "data", "logs"),
+        output_dir  = os.path.join(tmp, "output"),
+        log_to_file = False,
+        log_recognition_events = False,
+        spoof_texture_threshold = float("inf"),
+        spoof_blink_threshold   = sys.maxsize,
+    )
+
+
+def train_lbph(cfg, db, identities=5, samples=10):
+    """Small LBPH model on random textures, written where the recognizer loads it."""
+    rng = np.random.default_rng(1)
+    w, h = cfg.face_size
+    images, labels = [], []
+    for i in range(identities):
+        label   = db.add_person(f"id_{i:02d}")
+        pattern = cv2.GaussianBlur(rng.integers(0, 255, (h, w), dtype=np.uint8), (9, 9), 0)
+        for _ in range(samples):
+            noise = rng.integers(-20, 20, pattern.shape)
+            images.append(np.clip(pattern.astype(np.int32) + noise, 0, 255).astype(np.uint8))
+            labels.append(label)
+    model = cv2.face.LBPHFaceRecognizer_create()
+    model.train(images, np.array(labels))
+    model.write(cfg.lbph_model_path)
+    db.save_label_map()
+
+
+def before(frame, det, rec, spoof, faces, detect=True):
+    if detect:
+        det.detect(frame)
+    for i, f in enumerate(faces):
+        rec.recognize_face(frame, f)
+        spoof.is_real(det.extract_face(frame, f), frame, f, track_id=i)
+
+
+def after(frame, det, rec, spoof, faces, detect=True):
+    ctx = FrameContext(frame, rec.cfg)
+    if detect:
+        det.detect(frame, ctx)
+    for i, f in enumerate(faces):
+        rec.recognize_face(frame, f, ctx)
+        spoof.is_real(ctx.face(f), frame, f, ctx, track_id=i)
+
+
+def timed(fn, frames):
+    out = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        fn(frame)
+        out.append((time.perf_counter() - t0) * 1000)
+    return np.array(out)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--video",  default=None)
+    ap.add_argument("--frames", type=int, default=120)
+    ap.add_argument("--faces",  type=int, default=3, help="Per-frame face boxes")
+    ap.add_argument("--no-detect", action="store_true",
+                    help="Skip detectMultiScale to isolate the per-face stages")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="frs_bench_ctx_")
+    try:
+        cfg    = scratch_config(tmp)
+        frames = load_frames(args.video, args.frames, (cfg.window_width, cfg.window_height))
+        if not frames:
+            print("   ❌ No frames to benchmark")
+            return
+        faces  = fixed_faces(frames[0], args.faces)
+        db     = FaceDatabase(cfg)
+        train_lbph(cfg, db)
+        with contextlib.redirect_stdout(io.StringIO()):
+            det = FaceDetector(cfg, verbose=False)
+            rec = FacialRecognizer(cfg, db, det, None, SystemLogger(cfg))
+
+        detect   = not args.no_detect
+        spoof    = AntiSpoofing(cfg)
+        t_before = timed(lambda f: before(f, det, rec, spoof, faces, detect), frames)
+        spoof    = AntiSpoofing(cfg)
+        t_after  = timed(lambda f: after(f, det, rec, spoof, faces, detect), frames)
+        db.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"\n   {'':<8}{'mean ms':>10}{'p95 ms':>10}")
+    for name, t in (("before", t_before), ("after", t_after)):
+        print(f"   {name:<8}{t.mean():>10.2f}{np.percentile(t, 95):>10.2f}")
+    print(f"   speed-up {t_before.mean() / t_after.mean():.2f}x "
+          f"({len(frames)} frames, {args.faces} faces/frame)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,20 @@ def create_app(config_class=Config):
     bcrypt.init_app(app)
     migrate.init_app(app, db)
 
+    from app.views import view_counter
+    from app.cache import cache
+    from app.images import images
+    from app.recommend import recommender
+    view_counter.init_app(app)
+    cache.init_app(app)
+    images.init_app(app)
+    recommender.init_app(app)
+
+    # The like button's fetch() sends this token; the global is normally
+    # registered by CSRFProtect, which the app doesn't enable.
+    from flask_wtf.csrf import generate_csrf
+    app.jinja_env.globals["csrf_token"] = generate_csrf
+
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "info"
     login_manager.login_message = "Please log in to access this page."
@@ -27,9 +41,11 @@ def create_app(config_class=Config):
     from app.routes.auth import auth_bp
     from app.routes.blog import blog_bp
     from app.routes.main import main_bp
+    from app.routes.api import api_bp
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(blog_bp, url_prefix="/blog")
     app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp, url_prefix="/api")
 
     return app
@@ -0,0 +1,208 @@
+"""Page and fragment cache.
+
+Mirrors the parts of Flask-Caching's API the app uses (``get``, ``set``,
+``delete``, ``clear``, ``cached``) so it can be swapped for it, and adds
+tag-based invalidation: every entry remembers the version of each tag it
+depends on, and ``invalidate("posts")`` bumps that version so all dependent
+entries miss on their next read. Versions live in the backend, so with
+``CACHE_TYPE = "redis"`` an invalidation in one worker reaches all of them.
+
+Config: ``CACHE_TYPE`` ("simple", "redis" or "null"), ``CACHE_DEFAULT_TIMEOUT``,
+``CACHE_REDIS_URL``, ``CACHE_KEY_PREFIX``, ``CACHE_THRESHOLD``.
+"""
+import pickle
+import threading
+import time
+import uuid
+from functools import wraps
+from flask import request, session
+from flask_login import current_user
+
+
+class NullBackend:
+    def get_many(self, keys):
+        return [None] * len(keys)
+
+    def set(self, key, value, timeout):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class SimpleBackend:
+    """In-process dict with expiry; per worker, so fine for a single process."""
+
+    def __init__(self, threshold=500):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.threshold = threshold
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            out = []
+            for key in keys:
+                expires, value = self._data.get(key, (0, None))
+                out.append(value if expires == -1 or expires > now else None)
+            return out
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            if len(self._data) >= self.threshold:
+                self._prune()
+            self._data[key] = (time.time() + timeout if timeout else -1, value)
+
+    def _prune(self):
+        now = time.time()
+        for key in [k for k, (exp, _) in self._data.items() if exp != -1 and exp <= now]:
+            del self._data[key]
+        # Still full: drop the oldest half (dicts keep insertion order)
+        if len(self._data) >= self.threshold:
+            for key in list(self._data)[: self.threshold // 2]:
+                del self._data[key]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    def __init__(self, url, prefix):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get_many(self, keys):
+        return [None if v is None else pickle.loads(v) for v in self._client.mget(keys)]
+
+    def set(self, key, value, timeout):
+        self._client.set(key, pickle.dumps(value), ex=timeout or None)
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+class Cache:
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.prefix = ""
+        self.default_timeout = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Flask-Caching spellings ("SimpleCache", "RedisCache") work too
+        kind = app.config.get("CACHE_TYPE", "simple").lower().replace("cache", "")
+        self.prefix = app.config.get("CACHE_KEY_PREFIX", "blog:")
+        if kind == "redis":
+            self.backend = RedisBackend(app.config["CACHE_REDIS_URL"], self.prefix)
+        elif kind == "null":
+            self.backend = NullBackend()
+        else:
+            self.backend = SimpleBackend(app.config.get("CACHE_THRESHOLD", 500))
+        self.default_timeout = app.config.get("CACHE_DEFAULT_TIMEOUT", 300)
+        app.extensions["cache"] = self
+
+    # ── Plain key/value ───────────────────────────────────────────
+    def get(self, key):
+        return self.get_tagged(key)
+
+    def set(self, key, value, timeout=None, tags=()):
+        self._store(key, value, timeout, self._versions(tags))
+
+    def _store(self, key, value, timeout, versions):
+        self.backend.set(self.prefix + key, (versions, value),
+                         self.default_timeout if timeout is None else timeout)
+
+    def delete(self, key):
+        self.backend.delete(self.prefix + key)
+
+    def clear(self):
+        self.backend.clear()
+
+    # ── Tags ──────────────────────────────────────────────────────
+    def _tag_key(self, tag):
+        return f"{self.prefix}tag:{tag}"
+
+    def _versions(self, tags):
+        """Current version of each tag, creating missing ones."""
+        tags = sorted(tags)
+        if not tags:
+            return {}
+        current = self.backend.get_many([self._tag_key(t) for t in tags])
+        versions = {}
+        for tag, version in zip(tags, current):
+            if version is None:
+                version = uuid.uuid4().hex
+                self.backend.set(self._tag_key(tag), version, 0)
+            versions[tag] = version
+        return versions
+
+    def get_tagged(self, key):
+        """Cached value for ``key``, or None if missing, expired or invalidated."""
+        entry = self.backend.get_many([self.prefix + key])[0]
+        if entry is None:
+            return None
+        versions, value = entry
+        if versions:
+            tags = list(versions)
+            current = self.backend.get_many([self._tag_key(t) for t in tags])
+            if any(versions[t] != v for t, v in zip(tags, current)):
+                return None
+        return value
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.set(self._tag_key(tag), uuid.uuid4().hex, 0)
+
+    # ── Helpers ───────────────────────────────────────────────────
+    def fragment(self, key, tags, compute, timeout=None):
+        """Return the cached value for ``key`` or compute and store it."""
+        value = self.get_tagged(key)
+        if value is None:
+            # Versions are read first, so an invalidation that lands while
+            # computing leaves this entry already stale rather than cached.
+            versions = self._versions(tags)
+            value = compute()
+            self._store(key, value, timeout, versions)
+        return value
+
+    def cached(self, timeout=None, tags=(), unless=None):
+        """Cache a whole GET response for anonymous visitors, keyed by URL.
+
+        Skipped for logged-in users and when flash messages are waiting, since
+        both change what the shared page would show.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if (request.method != "GET" or current_user.is_authenticated
+                        or session.get("_flashes") or (unless and unless())):
+                    return view(*args, **kwargs)
+                key = f"page:{request.full_path}"
+                html = self.get_tagged(key)
+                if html is None:
+                    versions = self._versions(tags)
+                    html = view(*args, **kwargs)
+                    if not isinstance(html, str):
+                        return html  # redirects etc. are not cached
+                    self._store(key, html, timeout, versions)
+                return html
+            return wrapper
+        return decorator
+
+
+cache = Cache()
@@ -1,7 +1,10 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, PasswordField, BooleanField, TextAreaField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, Optional
 
+IMAGE_TYPES = ["jpg", "jpeg", "png", "gif", "webp", "avif"]
+
 
 class RegisterForm(FlaskForm):
     username = StringField("Username", validators=[DataRequired(), Length(3, 80)])
@@ -22,6 +25,7 @@ class UpdateProfileForm(FlaskForm):
     username = StringField("Username", validators=[DataRequired(), Length(3, 80)])
     email = StringField("Email", validators=[DataRequired(), Email()])
     bio = TextAreaField("Bio", validators=[Optional(), Length(max=500)])
+    picture = FileField("Profile Picture", validators=[FileAllowed(IMAGE_TYPES, "Images only.")])
     submit = SubmitField("Update Profile")
 
 
@@ -31,6 +35,7 @@ class PostForm(FlaskForm):
     content = TextAreaField("Content", validators=[DataRequired()])
     category_id = SelectField("Category", coerce=int, validators=[Optional()])
     tags = StringField("Tags (comma-separated)", validators=[Optional()])
+    thumbnail = FileField("Cover Image", validators=[FileAllowed(IMAGE_TYPES, "Images only.")])
     is_published = BooleanField("Publish Now")
     submit = SubmitField("Save Post")
 
@@ -0,0 +1,182 @@
+"""Uploaded image pipeline.
+
+An upload is decoded, EXIF-rotated, capped at ``IMAGE_MAX_SIDE`` and stored
+under a content hash (``<sha256[:20]>.jpg``/``.png``). A background pool then
+writes responsive variants next to it (``<hash>-<width>.webp`` / ``.avif``)
+and finally ``<hash>.json`` listing their widths.
+Names never change content, so ``/media/`` serves them as immutable for a
+year, and templates use ``picture()`` to emit ``srcset`` for whichever
+variants exist so far (the stored original until then).
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import send_from_directory, url_for
+from markupsafe import Markup, escape
+from werkzeug.datastructures import FileStorage
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+WIDTHS = {
+    "post": (320, 640, 1024, 1600),
+    "avatar": (64, 128, 256),
+}
+FORMATS = tuple(f for f in ("avif", "webp") if features.check(f))
+QUALITY = {"avif": 55, "webp": 75}
+UPLOAD_NAME = re.compile(r"^[0-9a-f]{20}\.(jpg|png)$")
+ONE_YEAR = 365 * 24 * 3600
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+class ImagePipeline:
+    def __init__(self, app=None):
+        self.executor = None
+        self._manifests = {}  # name -> variant widths; content-addressed, so never stale
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.folder = app.config["UPLOAD_FOLDER"]
+        self.max_side = app.config.get("IMAGE_MAX_SIDE", 2400)
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get("IMAGE_WORKERS", 2), thread_name_prefix="images"
+        )
+        self.app = app
+        app.extensions["images"] = self
+        app.add_url_rule("/media/<path:filename>", "media", self.serve)
+        app.jinja_env.globals["picture"] = self.picture
+
+    # ── Upload ────────────────────────────────────────────────────
+    def save(self, storage, kind="post"):
+        """Store an uploaded FileStorage; returns its content-addressed filename."""
+        data = storage.read()
+        try:
+            img = Image.open(io.BytesIO(data))
+            img.load()
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            raise InvalidImage(storage.filename)
+
+        img = ImageOps.exif_transpose(img)
+        alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        img = img.convert("RGBA" if alpha else "RGB")
+        img.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+
+        name = f"{hashlib.sha256(data).hexdigest()[:20]}.{'png' if alpha else 'jpg'}"
+        path = os.path.join(self.folder, name)
+        if not os.path.exists(path):
+            os.makedirs(self.folder, exist_ok=True)
+            # Re-encoding drops EXIF (GPS etc.) along with the extra megabytes
+            self._write(img, path, "PNG" if alpha else "JPEG", optimize=True,
+                        **({} if alpha else {"quality": 85, "progressive": True}))
+        self.executor.submit(self._render_variants, name, kind)
+        return name
+
+    @staticmethod
+    def _tmp(path):
+        return f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+    def save_field(self, field, kind="post"):
+        """Save a form FileField's upload; None if no file was sent.
+
+        An unreadable file adds a field error (check ``field.errors``).
+        """
+        if not isinstance(field.data, FileStorage) or not field.data.filename:
+            return None
+        try:
+            return self.save(field.data, kind)
+        except InvalidImage:
+            field.errors.append("That file isn't a readable image.")
+            return None
+
+    def _write(self, img, path, fmt, **opts):
+        tmp = self._tmp(path)
+        img.save(tmp, fmt, **opts)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    def _render_variants(self, name, kind):
+        try:
+            manifest = os.path.join(self.folder, self._stem(name) + ".json")
+            if os.path.exists(manifest):
+                return  # same image uploaded before
+            with Image.open(os.path.join(self.folder, name)) as img:
+                img.load()
+                widths = self._widths(img.width, kind)
+                for width in widths:
+                    resized = img if width >= img.width else img.resize(
+                        (width, round(img.height * width / img.width)), Image.LANCZOS)
+                    for fmt in FORMATS:
+                        path = os.path.join(self.folder, self._variant(name, width, fmt))
+                        self._write(resized, path, fmt.upper(), quality=QUALITY[fmt])
+            tmp = self._tmp(manifest)
+            with open(tmp, "w") as f:
+                json.dump({"widths": widths, "formats": list(FORMATS)}, f)
+            os.replace(tmp, manifest)
+            # Cached pages were rendered with the original only
+            with self.app.app_context():
+                from app.cache import cache
+                cache.invalidate("posts")
+        except Exception as e:
+            self.app.logger.warning("Image variants for %s failed: %s", name, e)
+
+    @staticmethod
+    def _widths(source_width, kind):
+        widths = [w for w in WIDTHS[kind] if w < source_width]
+        top = min(source_width, WIDTHS[kind][-1])
+        return widths if top in widths else widths + [top]
+
+    @staticmethod
+    def _stem(name):
+        return name.rsplit(".", 1)[0]
+
+    def _variant(self, name, width, fmt):
+        return f"{self._stem(name)}-{width}.{fmt}"
+
+    # ── Serving ───────────────────────────────────────────────────
+    def serve(self, filename):
+        response = send_from_directory(self.folder, filename, max_age=ONE_YEAR)
+        response.cache_control.immutable = True
+        return response
+
+    def _manifest(self, name):
+        if name not in self._manifests:
+            try:
+                with open(os.path.join(self.folder, self._stem(name) + ".json")) as f:
+                    self._manifests[name] = json.load(f)
+            except (OSError, ValueError):
+                return None  # not rendered yet; look again next time
+        return self._manifests[name]
+
+    def variants(self, name, fmt):
+        """[(url, width)] for ``name``'s variants in ``fmt``, once rendered."""
+        manifest = self._manifest(name)
+        if not manifest or fmt not in manifest["formats"]:
+            return []
+        return [(url_for("media", filename=self._variant(name, w, fmt)), w) for w in manifest["widths"]]
+
+    def url(self, name):
+        """URL of an uploaded image; None for default/missing images."""
+        if not name or not UPLOAD_NAME.match(name):
+            return None
+        return url_for("media", filename=name, _external=True)
+
+    def picture(self, name, sizes="100vw", alt="", class_=""):
+        """<picture> with AVIF/WebP srcsets; empty for default/missing images."""
+        if not name or not UPLOAD_NAME.match(name):
+            return Markup("")
+        sources = []
+        for fmt in FORMATS:
+            srcset = ", ".join(f"{url} {w}w" for url, w in self.variants(name, fmt))
+            if srcset:
+                sources.append(f'<source type="image/{fmt}" srcset="{srcset}" sizes="{escape(sizes)}">')
+        return Markup(
+            "<picture>{}<img src=\"{}\" alt=\"{}\" class=\"{}\" loading=\"lazy\" decoding=\"async\"></picture>"
+        ).format(Markup("".join(sources)), url_for("media", filename=name), alt, class_)
+
+
+images = ImagePipeline()
@@ -1,5 +1,12 @@
+import re
 from datetime import datetime
+from slugify import slugify
+from sqlalchemy import event, select, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import column_property, defer, selectinload
 from app import db, login_manager, bcrypt
+from app.render import render
 from flask_login import UserMixin
 
 
@@ -38,6 +45,8 @@ post_tags = db.Table(
     "post_tags",
     db.Column("post_id", db.Integer, db.ForeignKey("posts.id"), primary_key=True),
     db.Column("tag_id", db.Integer, db.ForeignKey("tags.id"), primary_key=True),
+    # The primary key leads with post_id; tag pages look up by tag_id
+    db.Index("ix_post_tags_tag_post", "tag_id", "post_id"),
 )
 
 
@@ -47,41 +56,133 @@ class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
 
+    @staticmethod
+    def resolve(raw):
+        """Comma-separated tag names → Tag objects, creating missing ones.
+
+        One IN query for the existing tags and one bulk insert for the rest;
+        a tag created concurrently by another writer is simply picked up.
+        """
+        names = []
+        for name in raw.split(","):
+            name = name.strip().lower()[:50]
+            if name and name not in names:
+                names.append(name)
+        if not names:
+            return []
+
+        found = {t.name: t for t in Tag.query.filter(Tag.name.in_(names))}
+        missing = [{"name": n} for n in names if n not in found]
+        if missing:
+            dialect = db.engine.dialect.name
+            if dialect in ("sqlite", "postgresql"):
+                module = sqlite if dialect == "sqlite" else postgresql
+                db.session.execute(
+                    module.insert(Tag).on_conflict_do_nothing(index_elements=["name"]), missing
+                )
+            else:
+                for row in missing:
+                    try:
+                        with db.session.begin_nested():
+                            db.session.execute(insert(Tag), [row])
+                    except IntegrityError:
+                        pass
+            found.update(
+                (t.name, t) for t in Tag.query.filter(Tag.name.in_([r["name"] for r in missing]))
+            )
+        return [found[n] for n in names]
+
     def __repr__(self):
         return f"<Tag {self.name}>"
 
 
 class Post(db.Model):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Public feed keyset pagination (app/pagination.py)
+        db.Index("ix_posts_published_created", "is_published", "created_at", "id"),
+        # Popular posts by views, and by trending score
+        db.Index("ix_posts_published_views", "is_published", "views"),
+        db.Index("ix_posts_published_trending", "is_published", "trending"),
+        # Category pages and related posts
+        db.Index("ix_posts_category_published", "category_id", "is_published", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     slug = db.Column(db.String(220), unique=True, nullable=False)
     content = db.Column(db.Text, nullable=False)
     summary = db.Column(db.String(300), default="")
+    # Rendered from content whenever it is set (app/render.py)
+    content_html = db.Column(db.Text, nullable=True)
+    reading_minutes = db.Column(db.Integer, nullable=True)
+    excerpt = db.Column(db.String(300), nullable=True)
     thumbnail = db.Column(db.String(200), default="default_post.png")
     is_published = db.Column(db.Boolean, default=False)
     views = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # Maintained by app/recommend.py: a decaying sum of recent views, likes
+    # and comments, plus the view count and time it was last brought up to.
+    trending = db.Column(db.Float, default=0.0, nullable=False)
+    trending_views = db.Column(db.Integer, default=0, nullable=False)
+    trending_at = db.Column(db.DateTime, nullable=True)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=True)
 
     comments = db.relationship("Comment", backref="post", lazy=True, cascade="all, delete-orphan")
     likes = db.relationship("Like", backref="post", lazy=True, cascade="all, delete-orphan")
     tags = db.relationship("Tag", secondary=post_tags, backref=db.backref("posts", lazy="dynamic"))
 
+    # like_total / comment_total are column_property subqueries (defined below
+    # the Like and Comment models), so counts load with the post itself.
     def like_count(self):
-        return len(self.likes)
+        return self.like_total
 
     def comment_count(self):
-        return len(self.comments)
+        return self.comment_total
+
+    @staticmethod
+    def unique_slug(title):
+        """Slug for ``title``, suffixed -2, -3... past those already taken.
+
+        Only slugs sharing the prefix are read (a range on the unique index).
+        """
+        base = slugify(title)[:200] or "post"
+        taken = db.session.scalars(
+            select(Post.slug).where(
+                (Post.slug == base) | ((Post.slug > base + "-") & (Post.slug < base + "."))
+            )
+        ).all()
+        if base not in taken:
+            return base
+        suffixes = [int(m.group(1)) for s in taken if (m := re.fullmatch(re.escape(base) + r"-(\d+)", s))]
+        return f"{base}-{max(suffixes, default=1) + 1}"
+
+    @staticmethod
+    def listing_options(body=False):
+        """Eager-load everything a post card renders; the content only with ``body``."""
+        options = (
+            selectinload(Post.author),
+            selectinload(Post.category),
+            selectinload(Post.tags),
+        )
+        if not body:
+            options += (defer(Post.content), defer(Post.content_html))
+        return options
 
     def __repr__(self):
         return f"<Post {self.title}>"
 
 
+@event.listens_for(Post.content, "set")
+def _render_content(post, value, oldvalue, initiator):
+    # On save, so pages never render Markdown or cut excerpts per request
+    post.content_html, post.reading_minutes, post.excerpt = render(value)
+
+
 class Category(db.Model):
     __tablename__ = "categories"
 
@@ -102,8 +203,8 @@ class Comment(db.Model):
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey("posts.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id"), nullable=False, index=True)
 
     def __repr__(self):
         return f"<Comment by {self.user_id} on Post {self.post_id}>"
@@ -114,10 +215,32 @@ class Like(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey("posts.id"), nullable=False)
+    # unique_like leads with user_id, so counting a post's likes needs its own index
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id"), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     __table_args__ = (db.UniqueConstraint("user_id", "post_id", name="unique_like"),)
 
     def __repr__(self):
         return f"<Like by {self.user_id} on Post {self.post_id}>"
+
+
+class RelatedPost(db.Model):
+    """Top-k most similar posts per post, written by app/recommend.py."""
+    __tablename__ = "related_posts"
+
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    related_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"<RelatedPost {self.post_id} #{self.rank} → {self.related_id}>"
+
+
+Post.like_total = column_property(
+    select(func.count(Like.id)).where(Like.post_id == Post.id).correlate_except(Like).scalar_subquery()
+)
+Post.comment_total = column_property(
+    select(func.count(Comment.id)).where(Comment.post_id == Post.id).correlate_except(Comment).scalar_subquery()
+)
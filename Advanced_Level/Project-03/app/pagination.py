@@ -0,0 +1,76 @@
+"""Keyset (cursor) pagination over posts, newest first.
+
+Pages are fetched with ``WHERE (created_at, id) < (:created_at, :id)`` on the
+``ix_posts_published_created`` index instead of OFFSET + COUNT(*), so page
+1000 costs the same as page 1. Cursors are opaque url-safe strings.
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+from app.models import Post
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(post):
+    raw = json.dumps([post.created_at.isoformat(), post.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, post_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, prev_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def keyset_page(query, after=None, before=None, per_page=6):
+    """One page of ``query`` (a Post query, unordered) after or before a cursor.
+
+    Raises InvalidCursor for a malformed cursor.
+    """
+    key = tuple_(Post.created_at, Post.id)
+    if before:
+        # Walk backwards from the cursor, then flip back to newest first
+        rows = (
+            query.filter(key > tuple_(*decode_cursor(before)))
+            .order_by(Post.created_at.asc(), Post.id.asc())
+            .limit(per_page + 1).all()
+        )
+        more = len(rows) > per_page
+        items = rows[:per_page][::-1]
+        return KeysetPage(
+            items,
+            next_cursor=encode_cursor(items[-1]) if items else None,
+            prev_cursor=encode_cursor(items[0]) if more else None,
+        )
+
+    if after:
+        query = query.filter(key < tuple_(*decode_cursor(after)))
+    rows = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1]) if len(rows) > per_page else None,
+        prev_cursor=encode_cursor(items[0]) if after and items else None,
+    )
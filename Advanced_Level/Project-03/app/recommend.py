@@ -0,0 +1,230 @@
+"""Related-posts and trending recommendations, computed off the request path.
+
+``refresh()`` rebuilds ``related_posts`` (top-k TF-IDF cosine neighbours over
+title, tags and content) and brings every post's ``trending`` score up to
+date. Pages then read them with one indexed lookup each. Both run in a
+background thread of the web process (see Recommender) or from cron via
+``flask refresh-recommendations``.
+
+Trending is an exponentially decaying activity sum with a half-life of
+``TRENDING_HALF_LIFE_HOURS``: each refresh multiplies the old score by
+0.5 ** (elapsed / half-life) and adds the views, likes and comments that
+arrived since the post was last scored.
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from heapq import nlargest
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from app.models import Comment, Like, Post, RelatedPost, Tag, post_tags
+
+TOP_K = 5
+TERMS_PER_POST = 25  # strongest terms kept per post
+POSTINGS_PER_TERM = 100  # strongest posts kept per term; with the above, bounds the join
+MAX_DF = 0.5  # terms in more than half the posts don't discriminate
+FIELD_WEIGHTS = {"title": 3, "tags": 3, "content": 1}
+ACTIVITY_WEIGHTS = {"views": 1.0, "likes": 5.0, "comments": 8.0}
+CHUNK = 1000
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could
+did do does for from had has have he her his how i if in into is it its just
+me more most my no not of on one or our out she so some than that the their
+them then there these they this to up us was we were what when which who will
+with would you your
+""".split())
+
+
+def _tokens(text):
+    return [t for t in re.findall(r"[a-z0-9]{2,}", (text or "").lower()) if t not in STOPWORDS]
+
+
+# ── Related posts ─────────────────────────────────────────────────
+def _documents(session):
+    """{post_id: Counter(term -> weighted count)} for published posts."""
+    tags = defaultdict(list)
+    for post_id, name in session.execute(
+        select(post_tags.c.post_id, Tag.name).join(Tag, Tag.id == post_tags.c.tag_id)
+    ):
+        tags[post_id].append(name)
+
+    docs = {}
+    rows = session.execute(
+        select(Post.id, Post.title, Post.content).where(Post.is_published == True)
+    )
+    for post_id, title, content in rows:
+        terms = Counter()
+        for field, text in (("title", title), ("tags", " ".join(tags[post_id])), ("content", content)):
+            for token in _tokens(text):
+                terms[token] += FIELD_WEIGHTS[field]
+        docs[post_id] = terms
+    return docs
+
+
+def _vectors(docs):
+    """Sparse, L2-normalised TF-IDF vectors, pruned to each post's top terms."""
+    n = len(docs)
+    df = Counter(term for terms in docs.values() for term in terms)
+    idf = {t: math.log((1 + n) / (1 + d)) + 1 for t, d in df.items() if d <= max(2, MAX_DF * n)}
+
+    vectors = {}
+    for post_id, terms in docs.items():
+        weights = {t: (1 + math.log(c)) * idf[t] for t, c in terms.items() if t in idf}
+        top = dict(nlargest(TERMS_PER_POST, weights.items(), key=lambda kv: kv[1]))
+        norm = math.sqrt(sum(w * w for w in top.values())) or 1.0
+        vectors[post_id] = {t: w / norm for t, w in top.items()}
+    return vectors
+
+
+def related(docs, k=TOP_K):
+    """{post_id: [(other_id, cosine), ...]} via an inverted index over the vectors."""
+    vectors = _vectors(docs)
+    postings = defaultdict(list)
+    for post_id, vec in vectors.items():
+        for term, w in vec.items():
+            postings[term].append((post_id, w))
+    # Weak postings add little to any cosine; dropping them keeps this linear-ish
+    for term, plist in postings.items():
+        if len(plist) > POSTINGS_PER_TERM:
+            postings[term] = nlargest(POSTINGS_PER_TERM, plist, key=lambda pw: pw[1])
+
+    out = {}
+    for post_id, vec in vectors.items():
+        scores = defaultdict(float)
+        for term, w in vec.items():
+            for other, ow in postings[term]:
+                scores[other] += w * ow
+        scores.pop(post_id, None)
+        out[post_id] = nlargest(k, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+    return out
+
+
+def refresh_related(session):
+    neighbours = related(_documents(session))
+    session.execute(delete(RelatedPost))
+    rows = [
+        {"post_id": post_id, "rank": rank, "related_id": other, "score": round(score, 6)}
+        for post_id, top in neighbours.items()
+        for rank, (other, score) in enumerate(top)
+    ]
+    for i in range(0, len(rows), CHUNK):
+        session.execute(insert(RelatedPost), rows[i:i + CHUNK])
+    return len(rows)
+
+
+# ── Trending ──────────────────────────────────────────────────────
+def refresh_trending(session, half_life_hours, now=None):
+    now = now or datetime.utcnow()
+    first_window = now - timedelta(hours=half_life_hours)
+
+    def recent(model):
+        # Likes / comments since each post was last scored
+        since = func.coalesce(Post.trending_at, first_window)
+        return dict(session.execute(
+            select(model.post_id, func.count(model.id))
+            .join(Post, Post.id == model.post_id)
+            .where(model.created_at > since)
+            .group_by(model.post_id)
+        ).all())
+
+    likes, comments = recent(Like), recent(Comment)
+    updates = []
+    for post_id, views, score, seen, scored_at, created_at in session.execute(
+        select(Post.id, Post.views, Post.trending, Post.trending_views, Post.trending_at, Post.created_at)
+        .where(Post.is_published == True)
+    ):
+        elapsed = (now - (scored_at or first_window)).total_seconds() / 3600
+        decayed = (score or 0.0) * 0.5 ** (max(elapsed, 0) / half_life_hours)
+        new_views = max((views or 0) - (seen or 0), 0)
+        if scored_at is None:
+            # First scoring: views are lifetime totals, so decay them by post age
+            age = (now - (created_at or now)).total_seconds() / 3600
+            new_views *= 0.5 ** (max(age, 0) / half_life_hours)
+        activity = (ACTIVITY_WEIGHTS["views"] * new_views
+                    + ACTIVITY_WEIGHTS["likes"] * likes.get(post_id, 0)
+                    + ACTIVITY_WEIGHTS["comments"] * comments.get(post_id, 0))
+        updates.append({"pid": post_id, "score": round(decayed + activity, 4), "seen": views or 0})
+
+    posts = Post.__table__
+    stmt = (
+        update(posts).where(posts.c.id == bindparam("pid"))
+        # Not an edit, so leave updated_at alone
+        .values(trending=bindparam("score"), trending_views=bindparam("seen"),
+                trending_at=now, updated_at=posts.c.updated_at)
+    )
+    conn = session.connection()
+    for i in range(0, len(updates), CHUNK):
+        conn.execute(stmt, updates[i:i + CHUNK])
+    return len(updates)
+
+
+def refresh(app, related_posts=True, trending=True):
+    """Recompute related posts and/or trending scores; returns (links, posts)."""
+    from app import db
+    from app.cache import cache
+    links = scored = 0
+    with app.app_context():
+        if related_posts:
+            links = refresh_related(db.session)
+        if trending:
+            scored = refresh_trending(db.session, app.config.get("TRENDING_HALF_LIFE_HOURS", 24))
+        db.session.commit()
+        cache.invalidate("posts")
+    return links, scored
+
+
+class Recommender:
+    """Runs the refreshes in a daemon thread, from the first request on.
+
+    Trending is cheap and runs every ``TRENDING_INTERVAL`` seconds; the
+    TF-IDF rebuild grows with the corpus (minutes at 100k posts) and every
+    web worker runs its own thread, so ``RELATED_INTERVAL`` defaults to 0:
+    cron only. A job whose interval is 0 never runs here.
+    """
+
+    def __init__(self, app=None):
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.intervals = {
+            "trending": app.config.get("TRENDING_INTERVAL", 0),
+            "related_posts": app.config.get("RELATED_INTERVAL", 0),
+        }
+        app.extensions["recommender"] = self
+        if any(self.intervals.values()):
+            # Not at import time: CLI commands (e.g. migrations) must not start it
+            app.before_request(self._start)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="recommender")
+                self._thread.start()
+
+    def _run(self):
+        due = {job: time.monotonic() for job, every in self.intervals.items() if every}
+        while True:
+            now = time.monotonic()
+            jobs = {job: when <= now for job, when in due.items()}
+            if any(jobs.values()):
+                try:
+                    refresh(self.app, related_posts=jobs.get("related_posts", False),
+                            trending=jobs.get("trending", False))
+                except Exception as e:
+                    self.app.logger.warning("Recommendation refresh failed: %s", e)
+                for job, ran in jobs.items():
+                    if ran:
+                        due[job] = time.monotonic() + self.intervals[job]
+            time.sleep(max(min(due.values()) - time.monotonic(), 1))
+
+
+recommender = Recommender()
@@ -0,0 +1,77 @@
+"""Post content rendering, done once when the content is saved.
+
+Content is Markdown (inline HTML allowed). Assigning ``Post.content`` runs
+it through ``render()`` (see the listener in app/models.py): Markdown is
+converted, the HTML is sanitized against nh3's tag allowlist, and the
+result is stored in ``content_html`` with ``reading_minutes`` and a
+plain-text ``excerpt``. Templates print those columns as they are.
+
+Rows written around the ORM (bulk inserts, databases from before these
+columns) are rendered by ``flask render-posts``.
+"""
+import html
+import re
+from datetime import datetime
+import markdown
+import nh3
+from sqlalchemy import bindparam, select, update
+
+EXTENSIONS = ["fenced_code", "tables", "sane_lists"]
+# Fenced code keeps its "language-x" class for client-side highlighting
+ATTRIBUTES = {**nh3.ALLOWED_ATTRIBUTES, "code": {"class"}}
+LINK_REL = "nofollow noopener noreferrer"
+WORDS_PER_MINUTE = 200
+EXCERPT_CHARS = 160
+CHUNK = 500
+
+# Block boundaries become spaces in the plain text, so words don't run together
+BLOCK_TAG = re.compile(r"</?(?:p|div|h[1-6]|li|ul|ol|pre|blockquote|table|tr|td|th|br|hr)\b[^>]*>", re.I)
+
+
+def excerpt(text, limit=EXCERPT_CHARS):
+    if len(text) <= limit:
+        return text
+    cut = text[:limit + 1].rsplit(" ", 1)[0]  # whole words only
+    return cut.rstrip(" ,;:.-") + "…"
+
+
+def render(source):
+    """Markdown ``source`` → (sanitized HTML, reading minutes, excerpt)."""
+    body = nh3.clean(
+        markdown.markdown(source or "", extensions=EXTENSIONS),
+        attributes=ATTRIBUTES, link_rel=LINK_REL,
+    )
+    text = " ".join(html.unescape(nh3.clean(BLOCK_TAG.sub(" ", body), tags=set())).split())
+    minutes = max(1, round(len(text.split()) / WORDS_PER_MINUTE))
+    return body, minutes, excerpt(text)
+
+
+def render_stored(session, everything=False):
+    """Render posts whose ``content_html`` is missing (or all of them); returns the count."""
+    from app.models import Post  # app.models imports this module
+
+    posts = Post.__table__
+    stmt = update(posts).where(posts.c.id == bindparam("pid")).values(
+        content_html=bindparam("body"), reading_minutes=bindparam("minutes"),
+        excerpt=bindparam("text"),
+        # The HTML the API serves changed, so its validators must too
+        updated_at=datetime.utcnow(),
+    )
+    conn = session.connection()
+    done, last_id = 0, 0
+    while True:
+        query = select(posts.c.id, posts.c.content).where(posts.c.id > last_id)
+        if not everything:
+            query = query.where(posts.c.content_html.is_(None))
+        rows = conn.execute(query.order_by(posts.c.id).limit(CHUNK)).all()
+        if not rows:
+            return done
+        updates = []
+        for post_id, content in rows:
+            body, minutes, text = render(content)
+            updates.append({"pid": post_id, "body": body, "minutes": minutes, "text": text})
+        conn.execute(stmt, updates)
+        session.commit()
+        conn = session.connection()
+        done += len(rows)
+        last_id = rows[-1].id
@@ -0,0 +1,164 @@
+"""Read-only JSON API with conditional responses.
+
+Every response carries an ETag, built from a narrow query before anything
+is loaded or serialized: post ids and ``Post.updated_at`` plus the ids and
+names of the author and category the payload embeds, so renaming either
+changes it. A matching ``If-None-Match`` costs one indexed query and returns
+an empty 304.
+
+There is no Last-Modified: no single timestamp moves when an author or
+category is renamed, or when a post is unpublished and drops off a page.
+
+Payloads leave out the live counters (views, likes, comments): they change
+without touching ``updated_at`` and would make every validator stale.
+"""
+import hashlib
+import json
+from flask import Blueprint, Response, current_app, request, url_for
+from sqlalchemy import select
+from sqlalchemy.orm import defer
+from app import db
+from app.images import images
+from app.models import Category, Post, Tag, User
+from app.pagination import InvalidCursor, keyset_page
+
+api_bp = Blueprint("api", __name__)
+
+
+def _etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def _validate(response, etag):
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get("API_MAX_AGE", 0)
+    return response
+
+
+def _not_modified(etag):
+    """An empty 304 if the request's If-None-Match still matches, else None."""
+    if request.if_none_match and request.if_none_match.contains_weak(etag):
+        return _validate(Response(status=304), etag)
+    return None
+
+
+def _json(payload, etag=None, status=200):
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    response = Response(body, status=status, mimetype="application/json")
+    return _validate(response, etag) if etag else response
+
+
+def _post_json(post, content=False):
+    data = {
+        "id": post.id,
+        "slug": post.slug,
+        "title": post.title,
+        "summary": post.summary,
+        "excerpt": post.excerpt,
+        "reading_minutes": post.reading_minutes,
+        "author": post.author.username,
+        "category": {"id": post.category.id, "name": post.category.name} if post.category else None,
+        "tags": [t.name for t in post.tags],
+        "thumbnail": images.url(post.thumbnail),
+        "created_at": post.created_at.isoformat(),
+        "updated_at": (post.updated_at or post.created_at).isoformat(),
+        "url": url_for("api.post", slug=post.slug, _external=True),
+        "html_url": url_for("blog.post_detail", slug=post.slug, _external=True),
+    }
+    if content:
+        data["content"] = post.content  # Markdown source
+        data["content_html"] = post.content_html
+    return data
+
+
+def _validator_columns():
+    """What a post's validators are built from; renames of its author or category count."""
+    return (Post.id, Post.created_at, Post.updated_at,
+            User.id.label("author_id"), User.username,
+            Category.id.label("category_id"), Category.name.label("category_name"))
+
+
+def _version(row):
+    return (row.id, row.updated_at or row.created_at, row.author_id, row.username,
+            row.category_id, row.category_name)
+
+
+def _posts_query():
+    # The counters aren't served, so skip their subqueries
+    return Post.query.filter_by(is_published=True).options(
+        defer(Post.like_total), defer(Post.comment_total)
+    )
+
+
+@api_bp.route("/posts")
+def posts():
+    """Published posts, newest first; follow ``next`` until it is null."""
+    per_page = max(min(request.args.get("per_page", 20, type=int), 50), 1)
+    query = Post.query.filter_by(is_published=True)
+    category_id = request.args.get("category", None, type=int)
+    tag_name = request.args.get("tag", None)
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+    if tag_name:
+        query = query.join(Post.tags).filter(Tag.name == tag_name)
+
+    try:
+        # Keys only; ORM objects are loaded once we know the client needs them
+        keys = (query.join(User, User.id == Post.user_id)
+                .outerjoin(Category, Category.id == Post.category_id)
+                .with_entities(*_validator_columns()))
+        page = keyset_page(keys, after=request.args.get("after"), per_page=per_page)
+    except InvalidCursor:
+        return _json({"error": "invalid cursor"}, status=400)
+    etag = _etag([_version(row) for row in page.items], page.next_cursor)
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    ids = [row.id for row in page.items]
+    loaded = {p.id: p for p in _posts_query().options(*Post.listing_options()).filter(Post.id.in_(ids))}
+    args = {k: v for k, v in request.args.items() if k != "after"}
+    return _json({
+        "items": [_post_json(loaded[i]) for i in ids if i in loaded],
+        "next": url_for("api.posts", after=page.next_cursor, _external=True, **args)
+        if page.has_next else None,
+    }, etag)
+
+
+@api_bp.route("/posts/<string:slug>")
+def post(slug):
+    row = db.session.execute(
+        select(*_validator_columns())
+        .join(User, User.id == Post.user_id)
+        .outerjoin(Category, Category.id == Post.category_id)
+        .where(Post.slug == slug, Post.is_published == True)
+    ).first()
+    if row is None:
+        return _json({"error": "not found"}, status=404)
+    etag = _etag(_version(row))
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    post = _posts_query().options(*Post.listing_options(body=True)).filter(Post.id == row.id).one()
+    return _json(_post_json(post, content=True), etag)
+
+
+@api_bp.route("/categories")
+def categories():
+    rows = db.session.execute(
+        select(Category.id, Category.name, Category.description).order_by(Category.id)
+    ).all()
+    # No timestamps on categories; the table is tiny, so hash the rows
+    etag = _etag([tuple(r) for r in rows])
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    return _json({
+        "items": [
+            {"id": r.id, "name": r.name, "description": r.description,
+             "posts": url_for("api.posts", category=r.id, _external=True)}
+            for r in rows
+        ],
+    }, etag)
@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
-from app.models import User
+from app.cache import cache
+from app.images import images
+from app.models import User, Post
 from app.forms import RegisterForm, LoginForm, UpdateProfileForm
 
 auth_bp = Blueprint("auth", __name__)
@@ -68,12 +70,17 @@ def logout():
 def profile():
     form = UpdateProfileForm(obj=current_user)
     if form.validate_on_submit():
-        current_user.username = form.username.data
-        current_user.email = form.email.data
-        current_user.bio = form.bio.data
-        db.session.commit()
-        flash("Profile updated successfully!", "success")
-        return redirect(url_for("auth.profile"))
+        picture = images.save_field(form.picture, kind="avatar")
+        if not form.picture.errors:
+            current_user.username = form.username.data
+            current_user.email = form.email.data
+            current_user.bio = form.bio.data
+            if picture:
+                current_user.profile_pic = picture
+            db.session.commit()
+            cache.invalidate("posts")  # author names appear on cached listings
+            flash("Profile updated successfully!", "success")
+            return redirect(url_for("auth.profile"))
 
     return render_template("auth/profile.html", form=form, title="My Profile")
 
@@ -81,9 +88,10 @@ def profile():
 @auth_bp.route("/dashboard")
 @login_required
 def dashboard():
-    user_posts = current_user.posts
+    # Counts come from Post.like_total / comment_total, loaded with the posts
+    user_posts = Post.query.filter_by(user_id=current_user.id).order_by(Post.id).all()
     total_likes = sum(post.like_count() for post in user_posts)
-    total_views = sum(post.views for post in user_posts)
+    total_views = sum(post.views or 0 for post in user_posts)
     total_comments = sum(post.comment_count() for post in user_posts)
     return render_template(
         "auth/dashboard.html",
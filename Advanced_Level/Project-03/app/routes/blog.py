@@ -1,19 +1,50 @@
+import secrets
+from datetime import datetime
 from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify
 from flask_login import login_required, current_user
-from slugify import slugify
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from app import db
-from app.models import Post, Comment, Like, Category, Tag
+from app.cache import cache
+from app.images import images
+from app.models import Post, Comment, Like, Category, Tag, RelatedPost
 from app.forms import PostForm, CommentForm
+from app.pagination import InvalidCursor, encode_cursor, keyset_page
+from app.search import apply as search_posts
+from app.views import view_counter
 
 blog_bp = Blueprint("blog", __name__)
 
 
+# Sidebar fragments are cached as plain rows (no ORM state to detach), shared
+# by logged-in and anonymous pages alike.
+def category_links():
+    return cache.fragment(
+        "fragment:categories", ("categories",),
+        lambda: db.session.execute(select(Category.id, Category.name).order_by(Category.id)).all(),
+    )
+
+
+def popular_posts():
+    # Trending scores are refreshed in the background (app/recommend.py)
+    return cache.fragment(
+        "fragment:popular", ("posts",),
+        lambda: db.session.execute(
+            select(Post.slug, Post.title, Post.views)
+            .where(Post.is_published == True).order_by(Post.trending.desc()).limit(5)
+        ).all(),
+    )
+
+
 @blog_bp.route("/")
+@cache.cached(tags=("posts", "categories"))
 def index():
     page = request.args.get("page", 1, type=int)
     category_id = request.args.get("category", None, type=int)
     tag_name = request.args.get("tag", None)
     search = request.args.get("search", "")
+    title_only = request.args.get("in") == "title"
 
     query = Post.query.filter_by(is_published=True)
 
@@ -23,30 +54,79 @@ def index():
     if tag_name:
         query = query.join(Post.tags).filter(Tag.name == tag_name)
 
+    query = query.options(*Post.listing_options())
     if search:
-        query = query.filter(
-            (Post.title.ilike(f"%{search}%")) | (Post.content.ilike(f"%{search}%"))
-        )
-
-    posts = query.order_by(Post.created_at.desc()).paginate(page=page, per_page=6)
-    categories = Category.query.all()
-    popular_posts = Post.query.filter_by(is_published=True).order_by(Post.views.desc()).limit(5).all()
+        # Ranked full-text match; rank order can't be keyset-paged, so use pages
+        posts = search_posts(query, search, title_only=title_only).paginate(page=page, per_page=6)
+    else:
+        try:
+            posts = keyset_page(query, after=request.args.get("after"),
+                                before=request.args.get("before"), per_page=6)
+        except InvalidCursor:
+            abort(400)
 
     return render_template(
         "blog/index.html",
         title="Blog",
         posts=posts,
-        categories=categories,
-        popular_posts=popular_posts,
+        categories=category_links(),
+        popular_posts=popular_posts(),
         search=search,
+        title_only=title_only,
+        filters={k: v for k, v in request.args.items()
+                 if k not in ("page", "after", "before") and v},
     )
 
 
+@blog_bp.route("/feed.json")
+def feed():
+    """Published posts, newest first; follow ``next`` until it is null."""
+    per_page = min(request.args.get("per_page", 20, type=int), 50)
+    query = Post.query.filter_by(is_published=True).options(*Post.listing_options())
+    category_id = request.args.get("category", None, type=int)
+    tag_name = request.args.get("tag", None)
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+    if tag_name:
+        query = query.join(Post.tags).filter(Tag.name == tag_name)
+
+    try:
+        posts = keyset_page(query, after=request.args.get("after"), per_page=max(per_page, 1))
+    except InvalidCursor:
+        return jsonify({"error": "invalid cursor"}), 400
+
+    args = {k: v for k, v in request.args.items() if k != "after"}
+    return jsonify({
+        "items": [
+            {
+                "id": p.id,
+                "title": p.title,
+                "slug": p.slug,
+                "summary": p.summary,
+                "url": url_for("blog.post_detail", slug=p.slug, _external=True),
+                "author": p.author.username,
+                "category": p.category.name if p.category else None,
+                "tags": [t.name for t in p.tags],
+                "views": p.views,
+                "likes": p.like_count(),
+                "comments": p.comment_count(),
+                "created_at": p.created_at.isoformat(),
+                "cursor": encode_cursor(p),
+            }
+            for p in posts.items
+        ],
+        "next_cursor": posts.next_cursor,
+        "next": url_for("blog.feed", after=posts.next_cursor, _external=True, **args)
+        if posts.has_next else None,
+    })
+
+
 @blog_bp.route("/post/<string:slug>", methods=["GET", "POST"])
 def post_detail(slug):
-    post = Post.query.filter_by(slug=slug, is_published=True).first_or_404()
-    post.views += 1
-    db.session.commit()
+    post = Post.query.options(
+        *Post.listing_options(body=True),
+        selectinload(Post.comments).selectinload(Comment.commenter),
+    ).filter_by(slug=slug, is_published=True).first_or_404()
 
     comment_form = CommentForm()
     if comment_form.validate_on_submit():
@@ -61,6 +141,7 @@ def post_detail(slug):
         )
         db.session.add(comment)
         db.session.commit()
+        cache.invalidate("posts")
         flash("Comment added!", "success")
         return redirect(url_for("blog.post_detail", slug=slug))
 
@@ -68,13 +149,20 @@ def post_detail(slug):
     if current_user.is_authenticated:
         user_liked = Like.query.filter_by(user_id=current_user.id, post_id=post.id).first() is not None
 
-    related_posts = Post.query.filter(
-        Post.category_id == post.category_id,
-        Post.id != post.id,
-        Post.is_published == True,
-    ).limit(3).all()
-
-    return render_template(
+    related_posts = (
+        Post.query.join(RelatedPost, RelatedPost.related_id == Post.id)
+        .filter(RelatedPost.post_id == post.id, Post.is_published == True)
+        .order_by(RelatedPost.rank).limit(3).all()
+    )
+    if not related_posts:
+        # Not scored yet (new post): fall back to the same category
+        related_posts = Post.query.filter(
+            Post.category_id == post.category_id,
+            Post.id != post.id,
+            Post.is_published == True,
+        ).limit(3).all()
+
+    page = render_template(
         "blog/post_detail.html",
         post=post,
         comment_form=comment_form,
@@ -82,6 +170,9 @@ def post_detail(slug):
         related_posts=related_posts,
         title=post.title,
     )
+    # Buffered and flushed in batches (app/views.py), so no write here
+    view_counter.record(post.id)
+    return page
 
 
 @blog_bp.route("/create", methods=["GET", "POST"])
@@ -93,33 +184,33 @@ def create_post():
     ]
 
     if form.validate_on_submit():
-        slug = slugify(form.title.data)
-        existing = Post.query.filter_by(slug=slug).first()
-        if existing:
-            slug = f"{slug}-{Post.query.count() + 1}"
-
-        post = Post(
-            title=form.title.data,
-            slug=slug,
-            content=form.content.data,
-            summary=form.summary.data,
-            is_published=form.is_published.data,
-            user_id=current_user.id,
-            category_id=form.category_id.data if form.category_id.data != 0 else None,
-        )
-
-        tag_names = [t.strip() for t in form.tags.data.split(",") if t.strip()]
-        for tag_name in tag_names:
-            tag = Tag.query.filter_by(name=tag_name.lower()).first()
-            if not tag:
-                tag = Tag(name=tag_name.lower())
-                db.session.add(tag)
-            post.tags.append(tag)
-
-        db.session.add(post)
-        db.session.commit()
-        flash("Post created successfully!", "success")
-        return redirect(url_for("blog.post_detail", slug=post.slug))
+        thumbnail = images.save_field(form.thumbnail)
+        if not form.thumbnail.errors:
+            post = Post(
+                title=form.title.data,
+                slug=Post.unique_slug(form.title.data),
+                content=form.content.data,
+                summary=form.summary.data,
+                is_published=form.is_published.data,
+                user_id=current_user.id,
+                category_id=form.category_id.data if form.category_id.data != 0 else None,
+            )
+            if thumbnail:
+                post.thumbnail = thumbnail
+            tags = Tag.resolve(form.tags.data or "")
+
+            try:
+                with db.session.begin_nested():
+                    db.session.add(post)
+                    post.tags = tags
+            except IntegrityError:
+                # Another writer took the slug between unique_slug() and the insert
+                post.slug = f"{post.slug}-{secrets.token_hex(3)}"
+                db.session.add(post)
+            db.session.commit()
+            cache.invalidate("posts")
+            flash("Post created successfully!", "success")
+            return redirect(url_for("blog.post_detail", slug=post.slug))
 
     return render_template("blog/create_post.html", form=form, title="Create Post")
 
@@ -137,24 +228,24 @@ def edit_post(post_id):
     ]
 
     if form.validate_on_submit():
-        post.title = form.title.data
-        post.content = form.content.data
-        post.summary = form.summary.data
-        post.is_published = form.is_published.data
-        post.category_id = form.category_id.data if form.category_id.data != 0 else None
-
-        post.tags.clear()
-        tag_names = [t.strip() for t in form.tags.data.split(",") if t.strip()]
-        for tag_name in tag_names:
-            tag = Tag.query.filter_by(name=tag_name.lower()).first()
-            if not tag:
-                tag = Tag(name=tag_name.lower())
-                db.session.add(tag)
-            post.tags.append(tag)
-
-        db.session.commit()
-        flash("Post updated successfully!", "success")
-        return redirect(url_for("blog.post_detail", slug=post.slug))
+        thumbnail = images.save_field(form.thumbnail)
+        if not form.thumbnail.errors:
+            post.title = form.title.data
+            post.content = form.content.data
+            post.summary = form.summary.data
+            post.is_published = form.is_published.data
+            post.category_id = form.category_id.data if form.category_id.data != 0 else None
+
+            post.tags = Tag.resolve(form.tags.data or "")
+            if thumbnail:
+                post.thumbnail = thumbnail
+            # Also when only the tags changed: the API's ETags are built from it
+            post.updated_at = datetime.utcnow()
+
+            db.session.commit()
+            cache.invalidate("posts")
+            flash("Post updated successfully!", "success")
+            return redirect(url_for("blog.post_detail", slug=post.slug))
 
     if request.method == "GET":
         form.tags.data = ", ".join([t.name for t in post.tags])
@@ -171,6 +262,7 @@ def delete_post(post_id):
 
     db.session.delete(post)
     db.session.commit()
+    cache.invalidate("posts")
     flash("Post deleted.", "info")
     return redirect(url_for("auth.dashboard"))
 
@@ -191,6 +283,7 @@ def like_post(post_id):
         db.session.commit()
         liked = True
 
+    cache.invalidate("posts")
     return jsonify({"liked": liked, "count": post.like_count()})
 
 
@@ -203,5 +296,6 @@ def delete_comment(comment_id):
     post_slug = comment.post.slug
     db.session.delete(comment)
     db.session.commit()
+    cache.invalidate("posts")
     flash("Comment deleted.", "info")
     return redirect(url_for("blog.post_detail", slug=post_slug))
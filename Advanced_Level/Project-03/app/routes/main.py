@@ -1,21 +1,37 @@
 from flask import Blueprint, render_template
-from app.models import Post, Category, User
+from sqlalchemy import select
+from app import db
+from app.cache import cache
+from app.models import Post, User
+from app.routes.blog import category_links
 
 main_bp = Blueprint("main", __name__)
 
 
 @main_bp.route("/")
+@cache.cached(tags=("posts", "categories"))
 def index():
-    featured_posts = Post.query.filter_by(is_published=True).order_by(Post.views.desc()).limit(3).all()
-    recent_posts = Post.query.filter_by(is_published=True).order_by(Post.created_at.desc()).limit(6).all()
-    categories = Category.query.all()
-    top_authors = User.query.join(User.posts).filter(Post.is_published == True).distinct().limit(4).all()
+    featured_posts = (
+        Post.query.options(*Post.listing_options())
+        .filter_by(is_published=True).order_by(Post.trending.desc()).limit(3).all()
+    )
+    recent_posts = (
+        Post.query.options(*Post.listing_options())
+        .filter_by(is_published=True).order_by(Post.created_at.desc()).limit(6).all()
+    )
+    top_authors = cache.fragment(
+        "fragment:top_authors", ("posts",),
+        lambda: db.session.execute(
+            select(User.id, User.username).join(User.posts)
+            .where(Post.is_published == True).distinct().limit(4)
+        ).all(),
+    )
     return render_template(
         "main/index.html",
         title="Home",
         featured_posts=featured_posts,
         recent_posts=recent_posts,
-        categories=categories,
+        categories=category_links(),
         top_authors=top_authors,
     )
 
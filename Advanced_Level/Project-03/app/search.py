@@ -0,0 +1,160 @@
+"""Full-text search over posts.
+
+SQLite uses an FTS5 external-content table (``posts_fts``) kept in sync with
+``posts`` by triggers; Postgres uses a weighted ``tsvector`` expression with a
+GIN index. Any other database (or a SQLite build without FTS5) falls back to
+``ILIKE`` matching.
+"""
+import logging
+import re
+from flask import current_app
+from sqlalchemy import column, event, func, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from app import db
+from app.models import Post
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, summary, content, content='posts', content_rowid='id',
+        tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, summary, content ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, summary, content)
+        VALUES ('delete', old.id, old.title, old.summary, old.content);
+        INSERT INTO posts_fts(rowid, title, summary, content)
+        VALUES (new.id, new.title, new.summary, new.content);
+    END""",
+]
+
+# Must match _pg_document() exactly for the planner to use the index.
+POSTGRES_DDL = [
+    """CREATE INDEX IF NOT EXISTS ix_posts_fts ON posts USING GIN ((
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')))""",
+    """CREATE INDEX IF NOT EXISTS ix_posts_fts_title ON posts USING GIN (
+        to_tsvector('english', coalesce(title, '')))""",
+]
+
+log = logging.getLogger(__name__)
+
+posts_fts = table("posts_fts", column("rowid"))
+
+# bm25 weights for (title, summary, content): a title hit outranks a body hit
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+def install(connection):
+    """Create the search index for this connection's dialect (idempotent)."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        for stmt in SQLITE_DDL:
+            connection.execute(text(stmt))
+    elif dialect == "postgresql":
+        for stmt in POSTGRES_DDL:
+            connection.execute(text(stmt))
+
+
+def rebuild(connection):
+    """Re-index every existing post (needed once after adding FTS to an old DB)."""
+    install(connection)
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+
+
+@event.listens_for(Post.__table__, "after_create")
+def _create_index(target, connection, **kw):
+    # A savepoint, so a failed statement doesn't abort the rest of create_all
+    # (Postgres refuses every later statement in an aborted transaction)
+    try:
+        with connection.begin_nested():
+            install(connection)
+    except (OperationalError, ProgrammingError) as e:
+        # e.g. SQLite compiled without FTS5
+        log.warning("Search index not created, falling back to ILIKE: %s", e.orig)
+
+
+def backend():
+    """"fts5", "postgres" or "like" for the current app's database."""
+    cache = current_app.extensions.setdefault("search_backend", {})
+    url = str(db.engine.url)
+    if url not in cache:
+        dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            cache[url] = "postgres"
+        elif dialect == "sqlite":
+            found = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='posts_fts'")
+            ).first()
+            cache[url] = "fts5" if found else "like"
+        else:
+            cache[url] = "like"
+    return cache[url]
+
+
+def _terms(q):
+    return re.findall(r"\w+", q.lower())
+
+
+def _fts5_match(terms, title_only):
+    """User input → safe FTS5 expression: every term quoted, last one a prefix."""
+    phrases = ['"%s"' % t for t in terms]
+    phrases[-1] += "*"
+    if title_only:
+        phrases = ["title : %s" % p for p in phrases]
+    return " AND ".join(phrases)
+
+
+def _pg_document(title_only):
+    if title_only:
+        return func.to_tsvector("english", func.coalesce(Post.title, ""))
+    return (
+        func.setweight(func.to_tsvector("english", func.coalesce(Post.title, "")), "A")
+        .op("||")(func.setweight(func.to_tsvector("english", func.coalesce(Post.summary, "")), "B"))
+        .op("||")(func.setweight(func.to_tsvector("english", func.coalesce(Post.content, "")), "C"))
+    )
+
+
+def apply(query, q, title_only=False):
+    """Filter ``query`` (a Post query) to matches for ``q``, best matches first.
+
+    Other filters (category, tag, published) already on ``query`` are kept,
+    so they combine with the text match in one statement.
+    """
+    terms = _terms(q)
+    if not terms:
+        return query.order_by(Post.created_at.desc())
+
+    kind = backend()
+    if kind == "fts5":
+        rank = func.bm25(literal_column("posts_fts"), *BM25_WEIGHTS).label("rank")
+        # MATERIALIZED runs the MATCH once; otherwise the planner may put posts
+        # on the outside and re-run it per row (seconds for common terms).
+        hits = (
+            select(posts_fts.c.rowid.label("post_id"), rank)
+            .select_from(posts_fts)
+            .where(literal_column("posts_fts").op("MATCH")(_fts5_match(terms, title_only)))
+            .cte("fts_hits")
+            .prefix_with("MATERIALIZED")
+        )
+        return query.join(hits, hits.c.post_id == Post.id).order_by(hits.c.rank, Post.created_at.desc())
+
+    if kind == "postgres":
+        tsquery = func.to_tsquery("english", " & ".join(t + ":*" for t in terms))
+        document = _pg_document(title_only)
+        return query.filter(document.op("@@")(tsquery)).order_by(
+            func.ts_rank_cd(document, tsquery).desc(), Post.created_at.desc()
+        )
+
+    for term in terms:
+        like = f"%{term}%"
+        query = query.filter(Post.title.ilike(like) if title_only else
+                             Post.title.ilike(like) | Post.content.ilike(like))
+    return query.order_by(Post.created_at.desc())
@@ -0,0 +1,138 @@
+"""Synthetic blog data at production-like volumes (``flask seed-db --scale N``).
+
+Generates N posts plus proportional users, tags, comments and likes with
+skewed (Zipf-like) distributions: a few prolific authors, a few very
+popular posts, a long tail of quiet ones. Rows go in with chunked bulk
+inserts, so it works the same on SQLite and Postgres. Running it again adds
+another N posts; the ``load<i>@example.com`` users (password
+``LOAD_PASSWORD``) are reused, which is what ``loadtest.py`` logs in as.
+"""
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from slugify import slugify
+from sqlalchemy import func, insert, select
+from app import bcrypt, db
+from app.models import Category, Comment, Like, Post, Tag, User, post_tags
+from app.render import render
+
+LOAD_PASSWORD = "loadtest123"
+VOCABULARY = 5000
+CHUNK = 2000
+SYLLABLES = ("ka", "lo", "mi", "ne", "ru", "ta", "shi", "po", "ven", "dor",
+             "el", "an", "qui", "sa", "ber", "ix", "mon", "tra", "gel", "fu")
+
+
+def _zipf(n):
+    """Cumulative weights making the r-th of n items 1/r as likely as the first."""
+    return list(accumulate(1 / r for r in range(1, n + 1)))
+
+
+def _vocabulary(rng):
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words, _zipf(len(words))
+
+
+def _sentence(rng, words, cum, lo=6, hi=16):
+    sentence = " ".join(rng.choices(words, cum_weights=cum, k=rng.randint(lo, hi)))
+    return sentence.capitalize() + "."
+
+
+def _users(count):
+    """Ids of ``count`` load-test users and how many had to be created."""
+    names = [f"load{i}" for i in range(count)]
+    existing = set(db.session.scalars(select(User.username).where(User.username.like("load%"))))
+    password_hash = bcrypt.generate_password_hash(LOAD_PASSWORD).decode("utf-8")  # bcrypt is slow; hash once
+    rows = [
+        {"username": name, "email": f"{name}@example.com", "password_hash": password_hash,
+         "bio": "Synthetic load-test user.", "created_at": datetime.utcnow()}
+        for name in names if name not in existing
+    ]
+    for i in range(0, len(rows), CHUNK):
+        db.session.execute(insert(User), rows[i:i + CHUNK])
+    by_name = dict(db.session.execute(select(User.username, User.id).where(User.username.in_(names))).all())
+    return [by_name[n] for n in names], len(rows)
+
+
+def _tags(words, count):
+    names = words[:count]  # the commonest words make the busiest tags
+    existing = set(db.session.scalars(select(Tag.name).where(Tag.name.in_(names))))
+    missing = [{"name": n} for n in names if n not in existing]
+    if missing:
+        db.session.execute(insert(Tag), missing)
+    by_name = dict(db.session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    return [by_name[n] for n in names], len(missing)
+
+
+def generate(n_posts, seed=0, now=None):
+    """Insert ``n_posts`` posts with users, tags, comments and likes; returns counts."""
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    words, cum = _vocabulary(rng)
+
+    user_ids, new_users = _users(max(10, n_posts // 20))
+    tag_ids, new_tags = _tags(words, min(1000, max(20, n_posts // 50)))
+    user_cum, tag_cum = _zipf(len(user_ids)), _zipf(len(tag_ids))
+    category_ids = list(db.session.scalars(select(Category.id))) or [None]
+    first = (db.session.scalar(select(func.max(Post.id))) or 0) + 1
+    counts = {"users": new_users, "tags": new_tags, "posts": 0, "comments": 0, "likes": 0}
+
+    def after(created):
+        # Some time in the post's first month, but not in the future
+        return min(created + timedelta(hours=rng.randrange(1, 24 * 30)), now)
+
+    for start in range(0, n_posts, CHUNK):
+        rows = []
+        for i in range(start, min(start + CHUNK, n_posts)):
+            title = _sentence(rng, words, cum, 3, 8)[:-1]
+            paragraphs = [
+                " ".join(_sentence(rng, words, cum) for _ in range(rng.randint(3, 8)))
+                for _ in range(rng.randint(2, 6))
+            ]
+            created = now - timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600))
+            content = "\n\n".join(paragraphs)
+            content_html, minutes, excerpt = render(content)  # bulk inserts skip the ORM listener
+            rows.append({
+                "title": title,
+                "slug": f"{slugify(title)[:200]}-{first + i}",
+                "content": content,
+                "content_html": content_html,
+                "reading_minutes": minutes,
+                "excerpt": excerpt,
+                "summary": "" if rng.random() < 0.7 else paragraphs[0].split(".")[0][:290] + ".",
+                "is_published": rng.random() < 0.9,
+                "views": int(rng.lognormvariate(4, 1.5)),
+                "created_at": created,
+                "updated_at": created,
+                "user_id": rng.choices(user_ids, cum_weights=user_cum)[0],
+                "category_id": rng.choice(category_ids),
+            })
+        post_ids = db.session.scalars(
+            insert(Post).returning(Post.id, sort_by_parameter_order=True), rows
+        ).all()
+
+        links, comments, likes = [], [], []
+        for post_id, row in zip(post_ids, rows):
+            for tag_id in set(rng.choices(tag_ids, cum_weights=tag_cum, k=rng.randint(1, 4))):
+                links.append({"post_id": post_id, "tag_id": tag_id})
+            # Engagement follows views, so popular posts collect most of it
+            n_likes = min(int(row["views"] * rng.uniform(0, 0.05)), len(user_ids))
+            for user_id in rng.sample(user_ids, n_likes):
+                likes.append({"user_id": user_id, "post_id": post_id, "created_at": after(row["created_at"])})
+            for _ in range(int(n_likes * rng.uniform(0, 0.5))):
+                comments.append({"content": _sentence(rng, words, cum, 4, 30),
+                                 "user_id": rng.choice(user_ids), "post_id": post_id,
+                                 "created_at": after(row["created_at"])})
+        for table, batch in ((post_tags, links), (Like, likes), (Comment, comments)):
+            for i in range(0, len(batch), CHUNK):
+                db.session.execute(insert(table), batch[i:i + CHUNK])
+        db.session.commit()
+
+        counts["posts"] += len(rows)
+        counts["comments"] += len(comments)
+        counts["likes"] += len(likes)
+    return counts
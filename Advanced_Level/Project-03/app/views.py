@@ -0,0 +1,88 @@
+"""Write-behind post view counter.
+
+Page views are counted in memory and written out every
+``VIEW_FLUSH_SECONDS`` as one batched ``UPDATE posts SET views = views + ?``,
+so a hot post costs one write per interval instead of one per request.
+Counts on the page (and the popular-posts list) lag by up to one interval;
+set ``VIEW_FLUSH_SECONDS = 0`` to write through on every view.
+"""
+import atexit
+import threading
+from collections import Counter
+from sqlalchemy import bindparam, update
+from app.models import Post
+
+
+class ViewCounter:
+    def __init__(self, app=None):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.app is None:
+            atexit.register(self.close)
+        self.app = app
+        self.interval = app.config.get("VIEW_FLUSH_SECONDS", 5)
+        app.extensions["view_counter"] = self
+
+    def record(self, post_id):
+        with self._lock:
+            self._pending[post_id] += 1
+        if not self.interval:
+            self.flush()
+        elif self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="view-counter")
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.warning("View counter flush failed: %s", e)
+
+    def close(self):
+        """Stop the flush thread and write what is still buffered."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.flush()
+
+    def flush(self):
+        """Write all buffered views in one statement; returns posts updated."""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return 0
+
+        from app import db
+        posts = Post.__table__
+        stmt = (
+            update(posts)
+            .where(posts.c.id == bindparam("post_id"))
+            # Keep updated_at as is: a view is not an edit.
+            .values(views=posts.c.views + bindparam("n"), updated_at=posts.c.updated_at)
+        )
+        rows = [{"post_id": pid, "n": n} for pid, n in batch.items()]
+        try:
+            with self.app.app_context(), db.engine.begin() as conn:
+                conn.execute(stmt, rows)
+        except Exception:
+            with self._lock:  # put them back for the next attempt
+                self._pending.update(batch)
+            raise
+        return len(rows)
+
+
+view_counter = ViewCounter()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,6 +15,18 @@ class Config:
     WTF_CSRF_ENABLED = True
     UPLOAD_FOLDER = os.path.join(BASE_DIR, "app", "static", "uploads")
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5 MB
+    IMAGE_MAX_SIDE = 2400  # uploads are downscaled to this before storing
+    IMAGE_WORKERS = 2  # threads rendering WebP/AVIF variants
+    # Seconds between background refreshes; 0 = cron only (flask refresh-recommendations).
+    # The related-posts rebuild is heavy and would run in every worker, so it is cron only by default.
+    TRENDING_INTERVAL = int(os.environ.get("TRENDING_INTERVAL") or 15 * 60)
+    RELATED_INTERVAL = int(os.environ.get("RELATED_INTERVAL") or 0)
+    TRENDING_HALF_LIFE_HOURS = 24
+    VIEW_FLUSH_SECONDS = 5  # post views are batched in memory this long
+    CACHE_TYPE = os.environ.get("CACHE_TYPE") or "simple"  # simple | redis | null
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL") or "redis://localhost:6379/0"
+    CACHE_DEFAULT_TIMEOUT = 120
+    API_MAX_AGE = 0  # seconds clients/CDNs may reuse /api/ responses before revalidating
 
 
 class DevelopmentConfig(Config):
@@ -29,3 +42,8 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     WTF_CSRF_ENABLED = False
+    VIEW_FLUSH_SECONDS = 0
+    CACHE_TYPE = "null"
+    TRENDING_INTERVAL = 0
+    RELATED_INTERVAL = 0
+    UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), "blog-test-uploads")
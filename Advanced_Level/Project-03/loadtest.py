@@ -0,0 +1,185 @@
+"""Load test: requests per second and latency percentiles for the hot routes.
+
+Start the app against the database you want to size (SQLite or Postgres),
+seed it with ``flask seed-db --scale N``, then:
+
+    pip install httpx
+    python loadtest.py http://127.0.0.1:8000 --users 50 --duration 60
+
+Each virtual user loops over a weighted mix of home, listing, search, post
+detail and like requests with no think time (a closed loop), so the
+reported RPS is the server's throughput at that concurrency. A share of
+the users (``--members``) log in as the ``load<i>`` users created by the
+seeder: they bypass the page cache and are the only ones who like posts.
+The exit status is 1 if any route's p95 is over its budget (``BUDGET_MS``,
+overridable with ``--budget route=ms``) or more than 1% of requests failed.
+"""
+import argparse
+import asyncio
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+LOAD_PASSWORD = "loadtest123"  # app/seed.py
+MIX = {"home": 15, "listing": 25, "search": 15, "detail": 35, "like": 10}
+BUDGET_MS = {"home": 200, "listing": 200, "search": 300, "detail": 200, "like": 150}
+CSRF = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+class Corpus:
+    """Slugs, ids, tags and search words sampled from the live feed."""
+
+    def __init__(self, items):
+        if not items:
+            raise SystemExit("The feed is empty; run `flask seed-db --scale N` first.")
+        self.posts = [(item["id"], item["slug"]) for item in items]
+        self.tags = sorted({t for item in items for t in item["tags"]}) or [None]
+        self.words = sorted({w for item in items for w in re.findall(r"[a-z]{4,}", item["title"].lower())})
+
+    @classmethod
+    async def load(cls, client, pages):
+        items, url = [], "/blog/feed.json?per_page=50"
+        for _ in range(pages):
+            feed = (await client.get(url)).raise_for_status().json()
+            items += feed["items"]
+            if not feed["next"]:
+                break
+            url = feed["next"]
+        return cls(items)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route, seconds, ok):
+        self.latencies[route].append(seconds * 1000)
+        if not ok:
+            self.errors[route] += 1
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+async def login(client, user_index):
+    page = await client.get("/auth/login")
+    token = CSRF.search(page.text).group(1)
+    response = await client.post("/auth/login", data={
+        "csrf_token": token, "email": f"load{user_index}@example.com", "password": LOAD_PASSWORD,
+    })
+    if response.status_code != 302:  # success redirects; failure re-renders the form
+        raise SystemExit(f"Could not log in as load{user_index}; was the database seeded with --scale?")
+    return token  # the session's CSRF token stays valid for its other forms
+
+
+def request_for(route, corpus, rng):
+    """(method, url) for one request of the given kind."""
+    post_id, slug = rng.choice(corpus.posts)
+    if route == "home":
+        return "GET", "/"
+    if route == "listing":
+        tag = rng.choice(corpus.tags)
+        return "GET", rng.choice(["/blog/", "/blog/?category=1", f"/blog/?tag={tag}" if tag else "/blog/"])
+    if route == "search":
+        return "GET", f"/blog/?search={rng.choice(corpus.words)}"
+    if route == "detail":
+        return "GET", f"/blog/post/{slug}"
+    return "POST", f"/blog/like/{post_id}"
+
+
+async def virtual_user(base_url, index, member, corpus, stats, start, deadline, seed):
+    rng = random.Random(seed + index)
+    routes = [r for r in MIX if member or r != "like"]
+    weights = [MIX[r] for r in routes]
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        headers = {"X-CSRFToken": await login(client, index)} if member else {}
+        while time.monotonic() < deadline:
+            route = rng.choices(routes, weights)[0]
+            method, url = request_for(route, corpus, rng)
+            began = time.monotonic()
+            try:
+                response = await client.request(method, url, headers=headers)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if began >= start:  # skip the warm-up
+                stats.record(route, time.monotonic() - began, ok)
+
+
+def report(stats, duration, budgets):
+    print(f"{'route':<10}{'requests':>10}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>8}{'budget':>8}")
+    failed, total, errors = [], 0, 0
+    for route in [*MIX, "total"]:
+        if route == "total":
+            values = sorted(v for vs in stats.latencies.values() for v in vs)
+            n_errors = errors
+        else:
+            values = sorted(stats.latencies[route])
+            n_errors = stats.errors[route]
+            total += len(values)
+            errors += n_errors
+        if not values:
+            continue
+        p95 = percentile(values, 95)
+        budget = budgets.get(route)
+        over = budget is not None and p95 > budget
+        if over:
+            failed.append(route)
+        print(f"{route:<10}{len(values):>10}{len(values) / duration:>9.1f}{percentile(values, 50):>9.1f}"
+              f"{p95:>9.1f}{percentile(values, 99):>9.1f}{n_errors:>8}"
+              f"{'' if budget is None else budget:>7}{'!' if over else ' '}")
+    if total and errors / total > 0.01:
+        failed.append("errors")
+    return failed
+
+
+async def main(args):
+    budgets = dict(BUDGET_MS)
+    for item in args.budget:
+        route, _, ms = item.partition("=")
+        budgets[route] = float(ms)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        corpus = await Corpus.load(client, args.sample_pages)
+    members = round(args.users * args.members)
+    print(f"{args.users} users ({members} logged in), {len(corpus.posts)} sampled posts, "
+          f"{args.warmup}s warm-up + {args.duration}s against {args.url}")
+
+    stats = Stats()
+    start = time.monotonic() + args.warmup
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        virtual_user(args.url, i, i < members, corpus, stats, start, deadline, args.seed)
+        for i in range(args.users)
+    ))
+    failed = report(stats, args.duration, budgets)
+    if failed:
+        print(f"Over budget: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("url", nargs="?", default="http://127.0.0.1:5000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds first")
+    parser.add_argument("--members", type=float, default=0.2, help="fraction of users logged in")
+    parser.add_argument("--sample-pages", type=int, default=10, help="feed pages of posts to sample")
+    parser.add_argument("--budget", action="append", default=[], metavar="ROUTE=MS",
+                        help="p95 budget override, e.g. --budget search=500 (or total=...)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -1,4 +1,7 @@
+import click
+from sqlalchemy import inspect, text
 from app import create_app, db
+from app.cache import cache
 from app.models import User, Post, Category, Tag, Comment, Like
 
 app = create_app()
@@ -18,7 +21,9 @@ def make_shell_context():
 
 
 @app.cli.command("seed-db")
-def seed_db():
+@click.option("--scale", type=int, default=0,
+              help="Also generate this many posts, with users, tags, comments and likes.")
+def seed_db(scale):
     """Seed the database with sample data."""
     # Create categories
     categories = ["Technology", "Travel", "Food", "Health", "Science"]
@@ -33,8 +38,60 @@ def seed_db():
         db.session.add(admin)
 
     db.session.commit()
+    cache.invalidate("categories")
     print("✅ Database seeded successfully!")
 
+    if scale:
+        from app.seed import generate
+        counts = generate(scale)
+        cache.invalidate("posts")
+        print("✅ Generated " + ", ".join(f"{n} {what}" for what, n in counts.items()) + ".")
+        print("   Run `flask refresh-recommendations` to score them.")
+
+
+@app.cli.command("create-indexes")
+def create_indexes():
+    """Create indexes declared on the models that an existing database lacks."""
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {ix["name"] for ix in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    print(f"   + {index.name}")
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))  # refresh planner statistics
+    print("✅ Indexes up to date.")
+
+
+@app.cli.command("refresh-recommendations")
+@click.option("--only", type=click.Choice(["related", "trending"]), help="Run just one of the jobs.")
+def refresh_recommendations(only):
+    """Rebuild related posts and trending scores (for cron)."""
+    from app.recommend import refresh
+    links, scored = refresh(app, related_posts=only != "trending", trending=only != "related")
+    print(f"✅ {links} related-post links, {scored} trending scores updated.")
+
+
+@app.cli.command("render-posts")
+@click.option("--all", "everything", is_flag=True, help="Re-render every post, not just unrendered ones.")
+def render_posts(everything):
+    """Render post Markdown to stored HTML, reading time and excerpt."""
+    from app.render import render_stored
+    count = render_stored(db.session, everything=everything)
+    cache.invalidate("posts")
+    print(f"✅ {count} posts rendered.")
+
+
+@app.cli.command("search-index")
+def search_index():
+    """Create the full-text search index and (re)index existing posts."""
+    from app import search
+    with db.engine.begin() as conn:
+        search.rebuild(conn)
+    app.extensions.pop("search_backend", None)
+    print(f"✅ Search index ready ({db.engine.dialect.name}).")
+
 
 if __name__ == "__main__":
     app.run(debug=True)
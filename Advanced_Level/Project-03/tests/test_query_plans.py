@@ -0,0 +1,161 @@
+"""Query-plan regression tests.
+
+Seeds a large blog (BLOG_PLAN_POSTS posts, default 100k), requests each hot
+route, captures every SQL statement it runs and checks ``EXPLAIN QUERY PLAN``
+for full scans of the big tables. A missing index shows up here as
+``SCAN posts`` long before it shows up as a slow page.
+"""
+import os
+import random
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from app import create_app, db
+from app.models import Category, Comment, Like, Post, Tag, User, post_tags
+from config import TestingConfig
+
+N_POSTS = int(os.environ.get("BLOG_PLAN_POSTS", 100_000))
+N_USERS = 500
+N_TAGS = 200
+N_CATEGORIES = 12
+BIG_TABLES = {"posts", "comments", "likes", "post_tags", "related_posts"}
+CHUNK = 5_000
+
+
+def _seed():
+    rng = random.Random(0)
+    now = datetime(2026, 1, 1)
+    db.session.execute(insert(User), [
+        {"username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x"}
+        for i in range(N_USERS)
+    ])
+    db.session.execute(insert(Category), [{"name": f"category{i}"} for i in range(N_CATEGORIES)])
+    db.session.execute(insert(Tag), [{"name": f"tag{i}"} for i in range(N_TAGS)])
+
+    for start in range(0, N_POSTS, CHUNK):
+        ids = range(start + 1, min(start + CHUNK, N_POSTS) + 1)
+        db.session.execute(insert(Post), [
+            {
+                "id": i,
+                "title": f"Post {i} about flask and sqlalchemy",
+                "slug": f"post-{i}",
+                "content": f"Body of post {i}. " * 10,
+                "summary": "",
+                "is_published": i % 10 != 0,
+                "views": rng.randrange(10_000),
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+                "user_id": rng.randrange(1, N_USERS + 1),
+                "category_id": rng.randrange(1, N_CATEGORIES + 1),
+            }
+            for i in ids
+        ])
+        db.session.execute(insert(post_tags), [
+            {"post_id": i, "tag_id": t}
+            for i in ids for t in rng.sample(range(1, N_TAGS + 1), 2)
+        ])
+        db.session.execute(insert(Comment), [
+            {"content": "Nice post", "user_id": rng.randrange(1, N_USERS + 1), "post_id": i}
+            for i in ids for _ in range(i % 3)
+        ])
+        db.session.execute(insert(Like), [
+            {"user_id": u, "post_id": i}
+            for i in ids for u in rng.sample(range(1, N_USERS + 1), i % 4)
+        ])
+    db.session.commit()
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        _seed()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(scope="module")
+def client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = "2"  # password hashes are fake, so log in via the session
+        sess["_fresh"] = True
+    return client
+
+
+def _captured(app, client, url):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    assert response.status_code == 200, url
+    return statements
+
+
+def _plan(statement, parameters):
+    rows = db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    return [row[-1] for row in rows]
+
+
+def _full_scans(statement, parameters):
+    scans = []
+    for detail in _plan(statement, parameters):
+        # "SCAN posts" reads the whole table; "SCAN posts USING INDEX" walks a
+        # whole index, which is no better for tables this size.
+        m = re.match(r"SCAN (\w+)", detail)
+        if m and m.group(1) in BIG_TABLES:
+            scans.append(detail)
+    return scans
+
+
+HOT_ROUTES = [
+    "/",
+    "/blog/",
+    "/blog/?category=3",
+    "/blog/?tag=tag7",
+    "/blog/?search=flask",
+    "/blog/?search=flask&category=3",
+    "/blog/feed.json",
+    f"/blog/post/post-{N_POSTS // 20 * 10 + 1}",  # mid-table, published
+    "/auth/dashboard",
+    "/api/posts",
+    "/api/posts?tag=tag7",
+    f"/api/posts/post-{N_POSTS // 20 * 10 + 1}",
+]
+
+
+@pytest.mark.parametrize("url", HOT_ROUTES)
+def test_route_has_no_full_scans(app, client, url):
+    statements = _captured(app, client, url)
+    assert statements, f"{url} ran no queries"
+    problems = {}
+    for statement, parameters in statements:
+        scans = _full_scans(statement, parameters)
+        if scans:
+            problems[statement.split("\n")[0][:120]] = scans
+    assert not problems, f"{url} scans big tables: {problems}"
+
+
+def test_feed_deep_page_uses_keyset_index(app, client):
+    feed = client.get("/blog/feed.json?per_page=50").get_json()
+    for _ in range(5):
+        feed = client.get(feed["next"]).get_json()
+    statements = _captured(app, client, feed["next"])
+    plans = [
+        detail
+        for statement, parameters in statements if "FROM posts" in statement
+        for detail in _plan(statement, parameters)
+    ]
+    assert any("ix_posts_published_created" in p for p in plans), plans